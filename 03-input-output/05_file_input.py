@@ -17,6 +17,9 @@
 import os
 import json
 import csv
+import mmap
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # ============================================================================
@@ -374,6 +377,195 @@ def read_in_chunks(filename, chunk_size=1024):
 chunks = read_in_chunks('large_file.txt', 512)
 print(f"总共读取了{chunks}块（实际可能更多）")
 
+# 内存映射逐行读取（零拷贝）
+print("\n--- 内存映射逐行读取 ---")
+
+class LazyLine:
+    """
+    一行数据的零拷贝视图：保存 memoryview，访问 text 时才解码
+    
+    行对象自己持有视图，读取器关闭后仍然有效，可以随时访问 text；
+    只要还有行对象存在，映射的内存就不会被释放
+    """
+    __slots__ = ('view', 'encoding', '_text')
+    
+    def __init__(self, view, encoding='utf-8'):
+        self.view = view
+        self.encoding = encoding
+        self._text = None
+    
+    @property
+    def text(self):
+        """第一次访问时解码并缓存"""
+        if self._text is None:
+            self._text = str(self.view, self.encoding)
+        return self._text
+    
+    def __len__(self):
+        return len(self.view)
+    
+    def __bytes__(self):
+        return bytes(self.view)
+
+
+class MmapLineReader:
+    """
+    基于内存映射的行读取器
+    
+    - 把文件映射到内存，按换行符切出 memoryview，不复制、不解码
+    - 可以把文件按行边界切成多个区间，用线程池并行扫描
+    - 行视图引用着映射的内存：close() 时如果还有行视图存在，映射不会立即解除，
+      而是在最后一个行视图被回收时释放，所以调用方不必手动 del
+    """
+    
+    COUNT_BLOCK_SIZE = 1024 * 1024
+    
+    def __init__(self, filename, encoding='utf-8'):
+        self.filename = filename
+        self.encoding = encoding
+        self._file = open(filename, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        # 空文件无法映射，用空字节串代替
+        if self.size:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mm)
+        else:
+            self._mm = None
+            self._view = memoryview(b'')
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """释放映射并关闭文件（映射有独立的文件描述符，关闭文件不影响仍在使用的行视图）"""
+        self._view.release()
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # 还有行视图引用着映射，最后一个视图被回收时自动解除映射
+            self._mm = None
+        self._file.close()
+    
+    def iter_views(self, start=0, end=None):
+        """逐行产生 memoryview（不含换行符），范围为 [start, end)"""
+        end = self.size if end is None else end
+        if self._mm is None:
+            return
+        find = self._mm.find
+        view = self._view
+        pos = start
+        while pos < end:
+            newline = find(b'\n', pos, end)
+            if newline == -1:
+                yield view[pos:end]
+                break
+            yield view[pos:newline]
+            pos = newline + 1
+    
+    def __iter__(self):
+        """逐行产生 LazyLine，需要文本时才解码"""
+        encoding = self.encoding
+        for view in self.iter_views():
+            yield LazyLine(view, encoding)
+    
+    def split_ranges(self, parts):
+        """把文件切成 parts 个区间，每个区间的边界都落在行首"""
+        ranges = []
+        start = 0
+        for i in range(1, parts + 1):
+            if start >= self.size:
+                break
+            end = self.size if i == parts else self.size * i // parts
+            if end < self.size:
+                newline = self._mm.find(b'\n', max(end - 1, start))
+                end = self.size if newline == -1 else newline + 1
+            if end > start:
+                ranges.append((start, end))
+            start = end
+        return ranges
+    
+    def parallel_scan(self, scan_range, workers=4):
+        """
+        并行扫描：scan_range(reader, start, end) 在各个区间上执行，返回结果列表
+        切片查找等操作在C层完成，多线程共享同一个映射，不需要复制数据
+        """
+        ranges = self.split_ranges(workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(scan_range, self, start, end) for start, end in ranges]
+            return [future.result() for future in futures]
+    
+    def count_lines(self, start=0, end=None):
+        """统计区间内的行数（按换行符计数，最后一行没有换行符也算一行）"""
+        end = self.size if end is None else end
+        if end <= start:
+            return 0
+        # 标准库没有能直接在mmap上计数的方法，所以分块复制到同一个缓冲区再计数，
+        # 每次调用只分配一块内存；对短行很多的文件，这比逐个 find 换行符快一个数量级
+        block_size = self.COUNT_BLOCK_SIZE
+        buffer = bytearray(min(block_size, end - start))
+        buffer_view = memoryview(buffer)
+        view = self._view
+        count = 0
+        for block_start in range(start, end, block_size):
+            n = min(block_size, end - block_start)
+            buffer_view[:n] = view[block_start:block_start + n]
+            count += buffer.count(b'\n', 0, n)
+        buffer_view.release()
+        if self._mm[end - 1] != ord('\n'):
+            count += 1
+        return count
+
+
+def benchmark_line_readers(filename, workers=4):
+    """
+    对比文本模式逐行迭代和内存映射读取（统计行数和字节数）
+    GB级文件也可以直接传入，内存占用不会随文件大小增长
+    """
+    results = {}
+    
+    start_time = time.perf_counter()
+    line_count = 0
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            line_count += 1
+    results['文本模式逐行迭代'] = (line_count, time.perf_counter() - start_time)
+    
+    start_time = time.perf_counter()
+    line_count = 0
+    with MmapLineReader(filename) as reader:
+        for view in reader.iter_views():
+            line_count += 1
+    results['mmap 逐行视图'] = (line_count, time.perf_counter() - start_time)
+    
+    start_time = time.perf_counter()
+    with MmapLineReader(filename) as reader:
+        line_count = sum(reader.parallel_scan(
+            lambda r, start, end: r.count_lines(start, end), workers))
+    results[f'mmap 并行计数({workers}线程)'] = (line_count, time.perf_counter() - start_time)
+    
+    size = os.path.getsize(filename)
+    for name, (count, elapsed) in results.items():
+        speed = size / 1024 / 1024 / elapsed if elapsed > 0 else 0.0
+        print(f"{name:<22} {count:>8} 行  {elapsed:.4f} 秒  {speed:8.1f} MB/秒")
+    return results
+
+with MmapLineReader('large_file.txt') as reader:
+    for i, line in enumerate(reader):
+        if i < 3:
+            print(f"行{i+1}：{line.text}（{len(line)}字节）")
+    
+    ranges = reader.split_ranges(4)
+    print(f"按行边界切分的区间：{ranges}")
+    counts = reader.parallel_scan(lambda r, start, end: r.count_lines(start, end), 4)
+    print(f"并行统计行数：{counts}，合计 {sum(counts)} 行")
+
+print("\n性能对比（large_file.txt）：")
+benchmark_line_readers('large_file.txt')
+
 # ============================================================================
 # 8. 实际应用示例
 # ============================================================================
@@ -570,6 +762,7 @@ print("""
 5. 性能优化：
    - 大文件使用迭代读取
    - 分块处理超大文件
+   - 内存映射 + memoryview 零拷贝读取
    - 及时关闭文件句柄
 
 6. 最佳实践：
@@ -17,7 +17,14 @@
 import os
 import json
 import csv
+import io
+import gzip
 import datetime
+import shutil
+import time
+import tracemalloc
+import tempfile
+from contextlib import contextmanager
 from pathlib import Path
 
 # ============================================================================
@@ -358,28 +365,149 @@ def safe_write_file(filename, content, encoding='utf-8', backup=True):
         print(f"未知错误：{e}")
         return False
 
-def atomic_write_file(filename, content, encoding='utf-8'):
+def _current_umask():
+    """读取当前进程的umask（只能先设置再恢复，所以只在导入时调用一次）"""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+# 导入时读取一次：umask 是进程级设置，运行中临时改成0会让其他线程创建的文件变成全局可写
+_UMASK = _current_umask()
+
+class AtomicWriter:
     """
-    原子性写入文件（先写临时文件，再重命名）
+    原子写入器
+    
+    - 每次写入使用唯一的临时文件（同目录），并发写同一个文件也不会冲突
+    - fsync_policy 控制持久性：
+        'none'：只保证原子替换，不调用fsync（最快，断电可能丢数据）
+        'file'：替换前fsync临时文件，保证内容落盘
+        'dir' ：在'file'基础上再fsync目录，保证重命名本身也落盘
+    - 组提交：在 batch() 中暂存多个小文件，一次性写入、重命名，同一目录只fsync一次；
+      每个文件的内容仍然要各自fsync，所以组提交只节省目录的fsync（'dir'策略），
+      'file'策略下fsync次数不变；batch() 不可嵌套，同一个写入器也不能在多个线程中共用
+    - mkstemp 创建的临时文件权限是0600，替换前复制原文件的权限，
+      新文件则按umask使用普通文件的默认权限
     """
-    temp_filename = f"{filename}.tmp"
-    try:
-        # 写入临时文件
-        with open(temp_filename, 'w', encoding=encoding) as f:
-            f.write(content)
+    
+    FSYNC_POLICIES = ('none', 'file', 'dir')
+    
+    def __init__(self, fsync_policy='file'):
+        if fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy 必须是 {self.FSYNC_POLICIES} 之一")
+        self.fsync_policy = fsync_policy
+        self._pending = None
+        self.files_written = 0
+        self.fsync_calls = 0
+        self._new_file_mode = 0o666 & ~_UMASK
+    
+    def write(self, filename, content, encoding='utf-8'):
+        """原子写入一个文件；在 batch() 中调用时只暂存，提交时统一写入"""
+        data = content.encode(encoding) if isinstance(content, str) else content
+        if self._pending is not None:
+            self._pending.append((filename, data))
+            return
+        self._commit([(filename, data)])
+    
+    @contextmanager
+    def batch(self):
+        """组提交：with writer.batch(): 中的所有写入在退出时一起提交"""
+        self._pending = []
+        try:
+            yield self
+            pending = self._pending
+            self._pending = None
+            self._commit(pending)
+        finally:
+            self._pending = None
+    
+    def _commit(self, items):
+        """写入临时文件 -> (fsync) -> 重命名 -> (fsync目录)"""
+        temp_files = []
+        try:
+            for filename, data in items:
+                directory = os.path.dirname(filename) or '.'
+                fd, temp_name = tempfile.mkstemp(
+                    dir=directory, prefix=f".{os.path.basename(filename)}.", suffix='.tmp')
+                temp_files.append(temp_name)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                    if self.fsync_policy != 'none':
+                        f.flush()
+                        os.fsync(f.fileno())
+                        self.fsync_calls += 1
+                if os.path.exists(filename):
+                    shutil.copymode(filename, temp_name)
+                else:
+                    os.chmod(temp_name, self._new_file_mode)
+            
+            for (filename, _), temp_name in zip(items, temp_files):
+                os.replace(temp_name, filename)
+            temp_files = []
+        finally:
+            # 出错时清理尚未重命名的临时文件
+            for temp_name in temp_files:
+                if os.path.exists(temp_name):
+                    os.remove(temp_name)
         
-        # 原子性重命名
-        os.rename(temp_filename, filename)
+        if self.fsync_policy == 'dir':
+            for directory in {os.path.dirname(filename) or '.' for filename, _ in items}:
+                self._fsync_directory(directory)
+        self.files_written += len(items)
+    
+    def _fsync_directory(self, directory):
+        """fsync目录，让重命名操作落盘（Windows不支持打开目录，直接跳过）"""
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+            self.fsync_calls += 1
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def atomic_write_file(filename, content, encoding='utf-8', fsync_policy='file'):
+    """
+    原子性写入文件（先写唯一的临时文件并fsync，再重命名）
+    """
+    try:
+        AtomicWriter(fsync_policy).write(filename, content, encoding)
         print(f"原子性写入成功：{filename}")
         return True
         
     except Exception as e:
-        # 清理临时文件
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
         print(f"原子性写入失败：{e}")
         return False
 
+def benchmark_atomic_writes(directory, count=200, size=256):
+    """
+    比较不同持久性策略下小文件的写入速度（逐个写入 vs 组提交）
+    
+    组提交只合并目录的fsync：'file'策略两种方式的fsync次数相同，
+    只有'dir'策略的fsync次数从每个文件两次降到每个文件一次加一次目录fsync
+    """
+    content = b"x" * size
+    print(f"{'策略':<8} {'方式':<8} {'文件/秒':>10} {'fsync次数':>10}")
+    for policy in AtomicWriter.FSYNC_POLICIES:
+        for mode in ('逐个写入', '组提交'):
+            writer = AtomicWriter(policy)
+            start_time = time.perf_counter()
+            if mode == '组提交':
+                with writer.batch():
+                    for i in range(count):
+                        writer.write(os.path.join(directory, f"bench_{i:04d}.dat"), content)
+            else:
+                for i in range(count):
+                    writer.write(os.path.join(directory, f"bench_{i:04d}.dat"), content)
+            elapsed = time.perf_counter() - start_time
+            rate = count / elapsed if elapsed > 0 else 0.0
+            print(f"{policy:<8} {mode:<8} {rate:>12.0f} {writer.fsync_calls:>10}")
+    print("说明：每个文件的内容都要单独fsync，组提交只把'dir'策略的目录fsync合并为一次")
+
 print("\n--- 安全写入演示 ---")
 
 # 创建测试文件
@@ -397,6 +525,21 @@ safe_write_file(f"{output_dir}/test_safe.txt", new_content)
 atomic_content = "这是原子性写入的内容\n保证数据完整性\n"
 atomic_write_file(f"{output_dir}/atomic_test.txt", atomic_content)
 
+# 组提交：多个小文件共用一次提交周期
+print("\n--- 原子写入器（组提交） ---")
+writer = AtomicWriter(fsync_policy='dir')
+with writer.batch():
+    for i in range(3):
+        writer.write(f"{output_dir}/atomic_batch_{i+1}.txt", f"组提交写入的第{i+1}个文件\n")
+print(f"组提交完成：{writer.files_written} 个文件，fsync {writer.fsync_calls} 次")
+
+print("\n--- 不同持久性策略的写入速度 ---")
+bench_dir = tempfile.mkdtemp(prefix='atomic_bench_')
+benchmark_atomic_writes(bench_dir, count=200)
+for name in os.listdir(bench_dir):
+    os.remove(os.path.join(bench_dir, name))
+os.rmdir(bench_dir)
+
 # ============================================================================
 # 8. 批量文件操作
 # ============================================================================
@@ -512,33 +655,158 @@ def generate_report(data, filename):
         
         f.write("\n报告生成完成\n")
 
-def export_to_multiple_formats(data, base_filename):
+class JSONLinesSink:
+    """每行一条JSON记录"""
+    
+    extension = 'jsonl'
+    
+    def __init__(self, f):
+        self.f = f
+    
+    def write(self, record):
+        self.f.write(json.dumps(record, ensure_ascii=False))
+        self.f.write('\n')
+    
+    def close(self):
+        pass
+
+
+class JSONArraySink:
+    """标准JSON数组，逐条写出元素，不需要先构造整个列表"""
+    
+    extension = 'json'
+    
+    def __init__(self, f):
+        self.f = f
+        self.first = True
+        f.write('[')
+    
+    def write(self, record):
+        self.f.write('\n  ' if self.first else ',\n  ')
+        self.f.write(json.dumps(record, ensure_ascii=False))
+        self.first = False
+    
+    def close(self):
+        self.f.write('\n]\n' if not self.first else ']\n')
+
+
+class CSVSink:
+    """CSV，表头取自第一条记录的键"""
+    
+    extension = 'csv'
+    
+    def __init__(self, f):
+        self.f = f
+        self.writer = None
+    
+    def write(self, record):
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.f, fieldnames=list(record.keys()))
+            self.writer.writeheader()
+        self.writer.writerow(record)
+    
+    def close(self):
+        pass
+
+
+class TextSink:
+    """每个字段一行，记录之间用分隔线隔开"""
+    
+    extension = 'txt'
+    
+    def __init__(self, f):
+        self.f = f
+    
+    def write(self, record):
+        self.f.write(''.join(f"{key}: {value}\n" for key, value in record.items()))
+        self.f.write("-" * 30 + "\n")
+    
+    def close(self):
+        pass
+
+
+class StreamingExporter:
+    """
+    流式多格式导出器
+    
+    只遍历一次输入的迭代器，每条记录同时分发给所有格式的写入器，
+    任何时刻内存中只有当前这一条记录，内存占用与记录数无关。
+    - 每个输出文件使用较大的写缓冲区，减少系统调用
+    - compress=True 时输出 .gz 文件
+    """
+    
+    SINKS = {
+        'jsonl': JSONLinesSink,
+        'json': JSONArraySink,
+        'csv': CSVSink,
+        'txt': TextSink,
+    }
+    
+    def __init__(self, formats=('json', 'csv', 'txt'), compress=False,
+                 buffer_size=1024 * 1024, encoding='utf-8'):
+        unknown = [fmt for fmt in formats if fmt not in self.SINKS]
+        if unknown:
+            raise ValueError(f"不支持的格式：{unknown}，可选：{list(self.SINKS)}")
+        self.formats = formats
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.encoding = encoding
+        self.records_written = 0
+    
+    def _open(self, filename):
+        # newline='' 让csv模块自己控制换行符
+        if self.compress:
+            # 在gzip外面再套一层缓冲，避免每条小记录都触发一次压缩调用
+            raw = gzip.GzipFile(filename, 'wb', compresslevel=6)
+            return io.TextIOWrapper(io.BufferedWriter(raw, self.buffer_size),
+                                    encoding=self.encoding, newline='')
+        return open(filename, 'w', encoding=self.encoding, newline='', buffering=self.buffer_size)
+    
+    def export(self, records, base_filename):
+        """导出所有记录，返回生成的文件列表"""
+        filenames = []
+        files = []
+        sinks = []
+        try:
+            for fmt in self.formats:
+                filename = f"{base_filename}.{self.SINKS[fmt].extension}"
+                if self.compress:
+                    filename += '.gz'
+                f = self._open(filename)
+                files.append(f)
+                sinks.append(self.SINKS[fmt](f))
+                filenames.append(filename)
+            
+            self.records_written = 0
+            for record in records:
+                for sink in sinks:
+                    sink.write(record)
+                self.records_written += 1
+            
+            for sink in sinks:
+                sink.close()
+        finally:
+            for f in files:
+                f.close()
+        
+        return filenames
+
+
+def export_to_multiple_formats(data, base_filename, compress=False):
     """
     导出数据到多种格式
+    
+    data 可以是列表，也可以是生成器：只遍历一次
     """
-    # 导出为JSON
-    json_file = f"{base_filename}.json"
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    
-    # 导出为CSV
-    csv_file = f"{base_filename}.csv"
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        if data:
-            fieldnames = data[0].keys()
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
-    
-    # 导出为文本
-    txt_file = f"{base_filename}.txt"
-    with open(txt_file, 'w', encoding='utf-8') as f:
-        for item in data:
-            for key, value in item.items():
-                f.write(f"{key}: {value}\n")
-            f.write("-" * 30 + "\n")
-    
-    return [json_file, csv_file, txt_file]
+    exporter = StreamingExporter(formats=('json', 'csv', 'txt'), compress=compress)
+    return exporter.export(data, base_filename)
+
+def generate_sample_records(count):
+    """按需生成示例记录"""
+    for i in range(count):
+        math_score, english, science = 60 + i % 41, 60 + (i * 7) % 41, 60 + (i * 13) % 41
+        yield {'姓名': f'学生{i}', '数学': math_score, '英语': english,
+               '科学': science, '总分': math_score + english + science}
 
 print("\n--- 应用示例演示 ---")
 
@@ -559,6 +827,24 @@ print(f"已生成报告：{report_file}")
 exported_files = export_to_multiple_formats(student_data, f"{output_dir}/student_data")
 print(f"已导出多种格式：{', '.join(os.path.basename(f) for f in exported_files)}")
 
+# 流式导出：生成器数据只遍历一次，内存峰值与记录数无关
+print("\n--- 流式多格式导出 ---")
+for count in (10000, 50000):
+    exporter = StreamingExporter(formats=('jsonl', 'csv'), compress=True)
+    start_time = time.perf_counter()
+    exported_files = exporter.export(generate_sample_records(count), f"{output_dir}/stream_{count}")
+    elapsed = time.perf_counter() - start_time
+    
+    # tracemalloc 本身很慢，单独运行一次只用来测内存峰值
+    tracemalloc.start()
+    exporter.export(generate_sample_records(count), f"{output_dir}/stream_{count}")
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    sizes = ', '.join(f"{os.path.basename(f)} {os.path.getsize(f):,} 字节" for f in exported_files)
+    print(f"{exporter.records_written:,} 条记录：{elapsed:.3f} 秒，内存峰值 {peak / 1024:.0f} KB（{sizes}）")
+    for f in exported_files:
+        os.remove(f)
+
 # ============================================================================
 # 10. 练习题
 # ============================================================================
@@ -637,6 +637,8 @@ class LogProcessor:
             'warning_count': 0,
             'info_count': 0
         }
+        # 跟踪模式下每个文件的句柄和读取位置：{文件名: {'file', 'offset', 'inode', 'dev', 'pending'}}
+        self.follow_positions = {}
     
     def process_log_file(self, filename):
         """
@@ -651,17 +653,91 @@ class LogProcessor:
         print(f"处理日志文件：{filename}")
         
         with open(filepath, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                self.stats['total_lines'] += 1
-                
-                # 分析日志级别
-                line_lower = line.lower()
-                if 'error' in line_lower:
-                    self.stats['error_count'] += 1
-                elif 'warning' in line_lower or 'warn' in line_lower:
-                    self.stats['warning_count'] += 1
-                elif 'info' in line_lower:
-                    self.stats['info_count'] += 1
+            for line in f:
+                self._count_line(line)
+    
+    def _count_line(self, line):
+        """
+        统计一行日志
+        """
+        self.stats['total_lines'] += 1
+        
+        # 分析日志级别
+        line_lower = line.lower()
+        if 'error' in line_lower:
+            self.stats['error_count'] += 1
+        elif 'warning' in line_lower or 'warn' in line_lower:
+            self.stats['warning_count'] += 1
+        elif 'info' in line_lower:
+            self.stats['info_count'] += 1
+    
+    def follow_log_file(self, filename):
+        """
+        增量处理日志文件（跟踪模式）
+        
+        每个文件保持一个打开的句柄，记住字节偏移量和inode，只读取追加的字节并更新stats；
+        inode变化视为日志轮转：先读完旧句柄中剩余的内容（包括最后的半行），再从头读取新文件；
+        文件变小视为截断，从头读取。返回本次处理的行数
+        """
+        filepath = os.path.join(self.log_dir, filename)
+        position = self.follow_positions.get(filename)
+        
+        try:
+            st = os.stat(filepath)
+        except FileNotFoundError:
+            if position is not None:
+                # 轮转的间隙新文件还没创建，旧文件可能仍在写入
+                return self._read_appended(position)
+            print(f"文件不存在：{filepath}")
+            return 0
+        
+        processed = 0
+        if position is not None and (st.st_ino, st.st_dev) != (position['inode'], position['dev']):
+            processed += self._read_appended(position, flush_pending=True)
+            position['file'].close()
+            position = None
+            print(f"检测到日志轮转：{filename}")
+        
+        if position is None:
+            # inode 取自已打开的句柄，避免 stat 和 open 之间文件被替换
+            f = open(filepath, 'rb')
+            opened = os.fstat(f.fileno())
+            position = {'file': f, 'offset': 0, 'inode': opened.st_ino, 'dev': opened.st_dev, 'pending': b''}
+            self.follow_positions[filename] = position
+        elif os.fstat(position['file'].fileno()).st_size < position['offset']:
+            print(f"检测到日志截断：{filename}")
+            position['offset'] = 0
+            position['pending'] = b''
+        
+        processed += self._read_appended(position)
+        return processed
+    
+    def _read_appended(self, position, flush_pending=False):
+        """从上次的偏移量读取新增字节，返回处理的完整行数"""
+        f = position['file']
+        # 二进制模式读取，偏移量按字节计算，不受编码影响
+        f.seek(position['offset'])
+        data = f.read()
+        position['offset'] += len(data)
+        
+        lines = (position['pending'] + data).split(b'\n')
+        # 最后一段没有换行符，说明还没写完，留到下次；文件已轮转时它就是最后一行
+        tail = lines.pop()
+        position['pending'] = b''
+        if not flush_pending:
+            position['pending'] = tail
+        elif tail:
+            lines.append(tail)
+        
+        for line in lines:
+            self._count_line(line.decode('utf-8', errors='replace'))
+        return len(lines)
+    
+    def stop_following(self):
+        """关闭跟踪模式打开的所有文件"""
+        for position in self.follow_positions.values():
+            position['file'].close()
+        self.follow_positions.clear()
     
     def generate_report(self, output_file):
         """
@@ -718,6 +794,27 @@ with open(report_file, 'r', encoding='utf-8') as f:
     print("\n生成的报告：")
     print(f.read())
 
+# 跟踪模式：定时调用时只读取新追加的日志
+print("\n--- 日志跟踪模式（增量统计） ---")
+follower = LogProcessor(temp_dir)
+print(f"首次读取：{follower.follow_log_file('application.log')} 行")
+
+with open(log_file, 'a', encoding='utf-8') as f:
+    f.write("2024-01-01 10:00:10 ERROR 请求超时\n")
+    f.write("2024-01-01 10:00:11 INFO 请求重试成功\n")
+print(f"追加后读取：{follower.follow_log_file('application.log')} 行")
+print(f"无新内容时读取：{follower.follow_log_file('application.log')} 行")
+
+# 模拟日志轮转：改名后写入进程还往旧文件追加了一行，跟踪时会先读完旧文件
+os.replace(log_file, log_file + '.1')
+with open(log_file + '.1', 'a', encoding='utf-8') as f:
+    f.write("2024-01-01 10:00:59 ERROR 轮转前的最后一行")
+with open(log_file, 'w', encoding='utf-8') as f:
+    f.write("2024-01-01 10:01:00 WARNING 日志已轮转\n")
+print(f"轮转后读取：{follower.follow_log_file('application.log')} 行")
+print(f"累计统计：{follower.stats}")
+follower.stop_following()
+
 # ============================================================================
 # 11. 练习题
 # ============================================================================
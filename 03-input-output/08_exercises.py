@@ -20,6 +20,15 @@ import csv
 import time
 import datetime
 import random
+import re
+import codecs
+import copy
+import hashlib
+import shutil
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # ============================================================================
@@ -34,35 +43,162 @@ class StudentManager:
     """
     学生成绩管理系统
     功能：添加学生、录入成绩、查询统计、导出数据
+    
+    存储方式：追加写入的 JSON Lines 日志（journal），每次修改只追加一行，
+    日志过长时再压缩（compaction）成每个学生一行的快照。
     """
     
-    def __init__(self):
+    def __init__(self, fsync_every=10, compact_ratio=2.0):
         self.students = []
-        self.data_file = "students_data.json"
+        # 按姓名建立的内存索引（姓名在系统中唯一）
+        self.index = {}
+        self.data_file = "students_data.json"      # 旧版整体JSON文件，仅用于迁移
+        self.journal_file = "students_data.jsonl"  # 追加写入的日志文件
+        self.fsync_every = fsync_every             # 每累计多少条记录执行一次fsync
+        self.compact_ratio = compact_ratio         # 日志行数超过学生数的多少倍时压缩
+        self._journal = None
+        self._journal_records = 0
+        self._unsynced = 0
         self.load_data()
     
     def load_data(self):
-        """从文件加载数据"""
+        """从文件加载数据（回放日志，兼容旧版JSON文件）"""
         try:
-            if os.path.exists(self.data_file):
+            if os.path.exists(self.journal_file):
+                self._replay_journal()
+                print(f"已加载 {len(self.students)} 名学生的数据")
+            elif os.path.exists(self.data_file):
                 with open(self.data_file, 'r', encoding='utf-8') as f:
                     self.students = json.load(f)
+                # 迁移到日志格式
+                self.save_data()
                 print(f"已加载 {len(self.students)} 名学生的数据")
             else:
                 print("数据文件不存在，将创建新的数据文件")
         except Exception as e:
             print(f"加载数据失败：{e}")
             self.students = []
+        
+        self.index = {student['name']: student for student in self.students}
+    
+    def _replay_journal(self):
+        """
+        逐行回放日志，重建学生列表
+        
+        - 最后一行没有换行符且无法解析：崩溃时写了一半的记录，截掉
+        - 中间的损坏行或无法应用的记录：跳过并报告，之后的有效记录照常加载
+        """
+        self.students = []
+        self.index = {}
+        self._journal_records = 0
+        # 姓名 -> 在 self.students 中的位置，'put' 替换已有学生时不必线性查找
+        positions = {}
+        offset = 0
+        torn_tail_at = None
+        ends_with_newline = True
+        skipped = []
+        
+        with open(self.journal_file, 'rb') as f:
+            for line_number, raw_line in enumerate(f, 1):
+                ends_with_newline = raw_line.endswith(b"\n")
+                try:
+                    record = json.loads(raw_line)
+                    self._apply_record(record, positions)
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    if not ends_with_newline:
+                        torn_tail_at = offset
+                    else:
+                        skipped.append((line_number, f"无法解析: {e}"))
+                except (KeyError, TypeError) as e:
+                    skipped.append((line_number, f"无法应用: {e!r}"))
+                else:
+                    self._journal_records += 1
+                offset += len(raw_line)
+        
+        for line_number, reason in skipped:
+            print(f"日志第 {line_number} 行已跳过（{reason}）")
+        
+        if torn_tail_at is not None:
+            # 截掉不完整的尾部，保证之后追加的记录从新行开始
+            print("日志末尾存在不完整的记录，已忽略")
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(torn_tail_at)
+        elif not ends_with_newline:
+            # 最后一条记录完整但缺少换行符，补上，避免下一条记录接在同一行
+            with open(self.journal_file, 'ab') as f:
+                f.write(b"\n")
+    
+    def _apply_record(self, record, positions):
+        """把一条日志记录应用到内存数据上"""
+        if record['op'] == 'put':
+            student = record['student']
+            name = student['name']
+            if name in positions:
+                self.students[positions[name]] = student
+            else:
+                positions[name] = len(self.students)
+                self.students.append(student)
+            self.index[name] = student
+        elif record['op'] == 'score':
+            self.index[record['name']]['scores'][record['subject']] = record['score']
+        else:
+            raise KeyError(record['op'])
+    
+    def _append_record(self, record):
+        """追加一条日志记录，按批次执行fsync"""
+        try:
+            if self._journal is None:
+                self._journal = open(self.journal_file, 'a', encoding='utf-8')
+            self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._journal_records += 1
+            self._unsynced += 1
+            
+            if self._unsynced >= self.fsync_every:
+                self.flush()
+            
+            if self._journal_records > max(100, len(self.students) * self.compact_ratio):
+                self.save_data()
+        except Exception as e:
+            print(f"写入日志失败：{e}")
+    
+    def flush(self):
+        """把已追加的记录刷到磁盘"""
+        if self._journal is not None and self._unsynced:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._unsynced = 0
+    
+    def close(self):
+        """刷新并关闭日志文件"""
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
     
     def save_data(self):
-        """保存数据到文件"""
+        """保存数据到文件（把当前全部数据压缩成新的日志快照）"""
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(self.students, f, ensure_ascii=False, indent=2)
+            self.close()
+            self.index = {student['name']: student for student in self.students}
+            
+            temp_file = self.journal_file + ".tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                for student in self.students:
+                    f.write(json.dumps({'op': 'put', 'student': student}, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            # 原子替换：崩溃时要么是旧日志，要么是新快照
+            os.replace(temp_file, self.journal_file)
+            self._journal_records = len(self.students)
             print("数据保存成功")
         except Exception as e:
             print(f"保存数据失败：{e}")
     
+    def record_score(self, name, subject, score):
+        """记录一门成绩：更新内存数据并追加一条日志"""
+        self.index[name]['scores'][subject] = score
+        self._append_record({'op': 'score', 'name': name, 'subject': subject, 'score': score})
+    
     def add_student(self):
         """添加学生"""
         print("\n--- 添加学生 ---")
@@ -76,10 +212,9 @@ class StudentManager:
             print("姓名不能为空，请重新输入")
         
         # 检查是否已存在
-        for student in self.students:
-            if student['name'] == name:
-                print(f"学生 '{name}' 已存在")
-                return
+        if name in self.index:
+            print(f"学生 '{name}' 已存在")
+            return
         
         # 输入年龄
         while True:
@@ -105,8 +240,9 @@ class StudentManager:
         }
         
         self.students.append(student)
+        self.index[name] = student
         print(f"学生 '{name}' 添加成功")
-        self.save_data()
+        self._append_record({'op': 'put', 'student': student})
     
     def add_score(self):
         """录入成绩"""
@@ -153,9 +289,8 @@ class StudentManager:
                 print("请输入有效的数字")
         
         # 保存成绩
-        selected_student['scores'][subject] = score
+        self.record_score(selected_student['name'], subject, score)
         print(f"成绩录入成功：{selected_student['name']} - {subject}: {score}")
-        self.save_data()
     
     def query_student(self):
         """查询学生信息"""
@@ -361,12 +496,14 @@ class StudentManager:
                 elif choice == '5':
                     self.export_data()
                 elif choice == '0':
+                    self.close()
                     print("感谢使用，再见！")
                     break
                 else:
                     print("无效选择，请重新输入")
             
             except KeyboardInterrupt:
+                self.close()
                 print("\n\n程序被用户中断")
                 break
             except Exception as e:
@@ -396,6 +533,18 @@ if not manager.students:
 # 显示统计信息
 manager.statistics()
 
+# 追加日志：录入一门成绩只追加一行，而不是重写全部学生数据
+print("\n--- 追加日志存储演示 ---")
+for name, subject, score in [('张三', '化学', 88), ('李四', '化学', 91), ('王五', '化学', 79)]:
+    manager.record_score(name, subject, score)
+manager.close()
+print(f"日志文件：{manager.journal_file}，共 {manager._journal_records} 条记录")
+
+# 重新加载：回放日志恢复数据
+reloaded = StudentManager()
+print(f"回放后张三的成绩：{reloaded.index['张三']['scores']}")
+reloaded.close()
+
 # ============================================================================
 # 练习2：文件批处理工具
 # ============================================================================
@@ -404,28 +553,180 @@ print("\n" + "=" * 60)
 print("练习2：文件批处理工具")
 print("=" * 60)
 
+class ByteBudget:
+    """
+    在途字节预算
+    限制同时处理中的数据总量：预算用完时，提交任务的线程会等待已有任务完成
+    """
+    
+    # 每个文件至少占用的预算，避免大量空文件把任务队列撑满
+    MIN_RESERVE = 4096
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self._condition = threading.Condition()
+    
+    def acquire(self, size):
+        """申请预算，返回实际占用的字节数（释放时原样归还）"""
+        # 超过预算的大文件单独占满整个预算
+        reserved = min(max(size, self.MIN_RESERVE), self.max_bytes)
+        with self._condition:
+            while self.in_flight > 0 and self.in_flight + reserved > self.max_bytes:
+                self._condition.wait()
+            self.in_flight += reserved
+        return reserved
+    
+    def release(self, reserved):
+        """归还预算"""
+        with self._condition:
+            self.in_flight -= reserved
+            self._condition.notify_all()
+
+
 class FileBatchProcessor:
     """
     文件批处理工具
     功能：批量重命名、格式转换、内容处理
     """
     
-    def __init__(self):
+    # 流式处理时每次读取的块大小
+    CHUNK_SIZE = 64 * 1024
+    
+    def __init__(self, max_workers=4, max_inflight_bytes=64 * 1024 * 1024):
         self.processed_files = []
         self.log_file = "batch_process.log"
+        self.max_workers = max_workers
+        self.max_inflight_bytes = max_inflight_bytes
+        self.last_metrics = None
+        # 多个工作线程会同时写日志
+        self._log_lock = threading.Lock()
     
     def log_operation(self, message):
         """记录操作日志"""
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[{timestamp}] {message}\n"
         
+        with self._log_lock:
+            try:
+                with open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.write(log_entry)
+            except Exception as e:
+                print(f"写入日志失败：{e}")
+            
+            print(message)
+    
+    def plan_batch(self, directory, suffix='.txt'):
+        """
+        计划阶段：扫描目录，列出待处理的文件（不修改任何文件）
+        返回 [(文件名, 路径, 大小), ...]
+        """
+        plan = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(suffix):
+                    plan.append((entry.name, entry.path, entry.stat().st_size))
+        return plan
+    
+    def print_plan(self, plan, action):
+        """打印计划（dry-run 模式）"""
+        total_size = sum(size for _, _, size in plan)
+        print(f"[计划] {action}：共 {len(plan)} 个文件，{total_size:,} 字节")
+        for name, _, size in plan[:10]:
+            print(f"  {name:<30} {size:>8} 字节")
+        if len(plan) > 10:
+            print(f"  ... 还有 {len(plan) - 10} 个文件")
+    
+    def run_pipeline(self, plan, task):
+        """
+        执行阶段：用线程池并发处理 plan 中的文件
+        task(name, path, size) 返回 'ok'、'skipped' 或 'failed'
+        返回吞吐量指标（文件/秒、MB/秒）
+        """
+        budget = ByteBudget(self.max_inflight_bytes)
+        counts = {'ok': 0, 'skipped': 0, 'failed': 0}
+        counts_lock = threading.Lock()
+        
+        def run_one(name, path, size, reserved):
+            try:
+                status = task(name, path, size)
+            except Exception as e:
+                self.log_operation(f"处理文件失败 {name}：{e}")
+                status = 'failed'
+            finally:
+                budget.release(reserved)
+            with counts_lock:
+                counts[status] += 1
+        
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for name, path, size in plan:
+                # 预算不足时在这里等待，在途数据量始终有上限
+                reserved = budget.acquire(size)
+                executor.submit(run_one, name, path, size, reserved)
+        elapsed = time.perf_counter() - start_time
+        
+        total_bytes = sum(size for _, _, size in plan)
+        metrics = dict(counts)
+        metrics.update({
+            'files': len(plan),
+            'bytes': total_bytes,
+            'seconds': elapsed,
+            'files_per_sec': len(plan) / elapsed if elapsed > 0 else 0.0,
+            'mb_per_sec': total_bytes / 1024 / 1024 / elapsed if elapsed > 0 else 0.0
+        })
+        self.last_metrics = metrics
+        return metrics
+    
+    def log_metrics(self, metrics):
+        """记录吞吐量指标"""
+        self.log_operation(
+            f"吞吐量：{metrics['files']} 个文件，用时 {metrics['seconds']:.3f} 秒，"
+            f"{metrics['files_per_sec']:.1f} 文件/秒，{metrics['mb_per_sec']:.2f} MB/秒"
+        )
+    
+    def _replace_via_temp(self, file_path, write_content):
+        """写入同目录下的临时文件，成功后再替换原文件"""
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or '.', suffix='.tmp')
         try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
-        except Exception as e:
-            print(f"写入日志失败：{e}")
-        
-        print(message)
+            with os.fdopen(fd, 'wb') as dst:
+                write_content(dst)
+            shutil.copymode(file_path, temp_path)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    
+    def _transcode_file(self, file_path, from_encoding, to_encoding):
+        """用增量编解码器流式转换编码，内存占用只与块大小有关"""
+        decoder = codecs.getincrementaldecoder(from_encoding)()
+        encoder = codecs.getincrementalencoder(to_encoding)()
+        
+        def write_content(dst):
+            with open(file_path, 'rb') as src:
+                while True:
+                    chunk = src.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(encoder.encode(decoder.decode(chunk)))
+                dst.write(encoder.encode(decoder.decode(b'', final=True), final=True))
+        
+        self._replace_via_temp(file_path, write_content)
+    
+    def _is_encoded_with(self, file_path, encoding):
+        """流式检查文件是否能用指定编码解码"""
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(file_path, 'rb') as f:
+                while True:
+                    chunk = f.read(self.CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    decoder.decode(chunk)
+                decoder.decode(b'', final=True)
+            return True
+        except UnicodeDecodeError:
+            return False
     
     def create_test_files(self, count=5):
         """创建测试文件"""
@@ -473,7 +774,7 @@ class FileBatchProcessor:
         
         self.log_operation(f"批量重命名完成，共处理 {renamed_count} 个文件")
     
-    def batch_convert_encoding(self, directory, from_encoding='gbk', to_encoding='utf-8'):
+    def batch_convert_encoding(self, directory, from_encoding='gbk', to_encoding='utf-8', dry_run=False):
         """批量转换文件编码"""
         print(f"\n--- 批量转换编码：{from_encoding} -> {to_encoding} ---")
         
@@ -481,39 +782,31 @@ class FileBatchProcessor:
             self.log_operation(f"目录不存在：{directory}")
             return
         
-        converted_count = 0
+        plan = self.plan_batch(directory)
+        if dry_run:
+            self.print_plan(plan, f"转换编码 {from_encoding} -> {to_encoding}")
+            return plan
         
-        for filename in os.listdir(directory):
-            if filename.endswith('.txt'):
-                file_path = os.path.join(directory, filename)
-                
-                try:
-                    # 读取原文件
-                    with open(file_path, 'r', encoding=from_encoding) as f:
-                        content = f.read()
-                    
-                    # 写入新编码
-                    with open(file_path, 'w', encoding=to_encoding) as f:
-                        f.write(content)
-                    
-                    self.log_operation(f"转换编码：{filename}")
-                    converted_count += 1
-                    
-                except UnicodeDecodeError:
-                    # 如果不是指定编码，尝试其他编码
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        self.log_operation(f"文件 {filename} 已是UTF-8编码")
-                    except Exception as e:
-                        self.log_operation(f"编码转换失败 {filename}：{e}")
-                
-                except Exception as e:
-                    self.log_operation(f"处理文件失败 {filename}：{e}")
+        def convert(filename, file_path, size):
+            try:
+                self._transcode_file(file_path, from_encoding, to_encoding)
+            except UnicodeDecodeError:
+                # 如果不是指定编码，检查是否已是UTF-8
+                if self._is_encoded_with(file_path, 'utf-8'):
+                    self.log_operation(f"文件 {filename} 已是UTF-8编码")
+                    return 'skipped'
+                self.log_operation(f"编码转换失败 {filename}：无法用 {from_encoding} 解码")
+                return 'failed'
+            
+            self.log_operation(f"转换编码：{filename}")
+            return 'ok'
         
-        self.log_operation(f"编码转换完成，共处理 {converted_count} 个文件")
+        metrics = self.run_pipeline(plan, convert)
+        self.log_operation(f"编码转换完成，共处理 {metrics['ok']} 个文件")
+        self.log_metrics(metrics)
+        return metrics
     
-    def batch_add_header(self, directory, header_text):
+    def batch_add_header(self, directory, header_text, dry_run=False):
         """批量添加文件头"""
         print(f"\n--- 批量添加文件头 ---")
         
@@ -521,34 +814,37 @@ class FileBatchProcessor:
             self.log_operation(f"目录不存在：{directory}")
             return
         
-        processed_count = 0
+        plan = self.plan_batch(directory)
+        if dry_run:
+            self.print_plan(plan, "添加文件头")
+            return plan
         
-        for filename in os.listdir(directory):
-            if filename.endswith('.txt'):
-                file_path = os.path.join(directory, filename)
-                
-                try:
-                    # 读取原内容
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        original_content = f.read()
-                    
-                    # 检查是否已有头部
-                    if not original_content.startswith(header_text):
-                        # 添加头部
-                        new_content = header_text + "\n" + "=" * 40 + "\n" + original_content
-                        
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            f.write(new_content)
-                        
-                        self.log_operation(f"添加文件头：{filename}")
-                        processed_count += 1
-                    else:
-                        self.log_operation(f"文件头已存在：{filename}")
-                
-                except Exception as e:
-                    self.log_operation(f"处理文件失败 {filename}：{e}")
+        header_bytes = header_text.encode('utf-8')
+        new_header = (header_text + "\n" + "=" * 40 + "\n").encode('utf-8')
         
-        self.log_operation(f"添加文件头完成，共处理 {processed_count} 个文件")
+        def add_header(filename, file_path, size):
+            # 只读取开头几个字节检查是否已有头部
+            with open(file_path, 'rb') as f:
+                has_header = f.read(len(header_bytes)) == header_bytes
+            
+            if has_header:
+                self.log_operation(f"文件头已存在：{filename}")
+                return 'skipped'
+            
+            # 先写头部，再把原内容分块复制过去
+            def write_content(dst):
+                dst.write(new_header)
+                with open(file_path, 'rb') as src:
+                    shutil.copyfileobj(src, dst, self.CHUNK_SIZE)
+            
+            self._replace_via_temp(file_path, write_content)
+            self.log_operation(f"添加文件头：{filename}")
+            return 'ok'
+        
+        metrics = self.run_pipeline(plan, add_header)
+        self.log_operation(f"添加文件头完成，共处理 {metrics['ok']} 个文件")
+        self.log_metrics(metrics)
+        return metrics
     
     def generate_file_report(self, directory):
         """生成文件报告"""
@@ -560,34 +856,45 @@ class FileBatchProcessor:
         
         report_file = f"file_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
         
+        start_time = time.perf_counter()
+        with os.scandir(directory) as it:
+            entries = list(it)
+        files = [entry for entry in entries if entry.is_file()]
+        
+        # 并发获取文件信息，每个文件只调用一次 stat
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            stats = list(executor.map(lambda entry: entry.stat(), files))
+        details = sorted(zip((entry.name for entry in files), stats))
+        
         with open(report_file, 'w', encoding='utf-8') as f:
             f.write("文件处理报告\n")
             f.write("=" * 50 + "\n")
             f.write(f"生成时间：{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write(f"目标目录：{directory}\n\n")
             
-            files = os.listdir(directory)
-            f.write(f"文件总数：{len(files)}\n\n")
+            f.write(f"文件总数：{len(entries)}\n\n")
             
             f.write("文件详情：\n")
             f.write("-" * 50 + "\n")
             
             total_size = 0
-            for filename in sorted(files):
-                file_path = os.path.join(directory, filename)
-                if os.path.isfile(file_path):
-                    size = os.path.getsize(file_path)
-                    total_size += size
-                    
-                    # 获取修改时间
-                    mtime = os.path.getmtime(file_path)
-                    mtime_str = datetime.datetime.fromtimestamp(mtime).strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    f.write(f"{filename:<30} {size:>8} 字节  {mtime_str}\n")
+            for filename, st in details:
+                total_size += st.st_size
+                mtime_str = datetime.datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                f.write(f"{filename:<30} {st.st_size:>8} 字节  {mtime_str}\n")
             
             f.write("-" * 50 + "\n")
             f.write(f"总大小：{total_size:,} 字节\n")
         
+        elapsed = time.perf_counter() - start_time
+        self.last_metrics = {
+            'files': len(files),
+            'bytes': total_size,
+            'seconds': elapsed,
+            'files_per_sec': len(files) / elapsed if elapsed > 0 else 0.0,
+            'mb_per_sec': total_size / 1024 / 1024 / elapsed if elapsed > 0 else 0.0
+        }
+        
         self.log_operation(f"文件报告生成完成：{report_file}")
         return report_file
 
@@ -614,6 +921,30 @@ if os.path.exists(report_file):
     with open(report_file, 'r', encoding='utf-8') as f:
         print(f.read())
 
+# 编码转换：先 dry-run 查看计划，再并发执行
+gbk_file = os.path.join(test_dir, "gbk_file.txt")
+with open(gbk_file, 'w', encoding='gbk') as f:
+    f.write("这是GBK编码的文件\n")
+processor.batch_convert_encoding(test_dir, 'gbk', 'utf-8', dry_run=True)
+processor.batch_convert_encoding(test_dir, 'gbk', 'utf-8')
+
+# 吞吐量对比：单线程 vs 线程池（目录中有10万个文件时可把 file_count 调大）
+print("\n--- 批处理吞吐量对比 ---")
+bench_dir = tempfile.mkdtemp(prefix='batch_bench_')
+file_count = 300
+for i in range(file_count):
+    with open(os.path.join(bench_dir, f"bench_{i:06d}.txt"), 'w', encoding='utf-8') as f:
+        f.write(f"基准测试文件 {i}\n" * 200)
+
+for workers in (1, 4):
+    bench_processor = FileBatchProcessor(max_workers=workers)
+    # 基准测试时不逐个打印文件日志
+    bench_processor.log_operation = lambda message: None
+    metrics = bench_processor.batch_add_header(bench_dir, f"# 基准测试 workers={workers}")
+    print(f"workers={workers}: {metrics['files_per_sec']:.0f} 文件/秒, "
+          f"{metrics['mb_per_sec']:.2f} MB/秒")
+shutil.rmtree(bench_dir)
+
 # ============================================================================
 # 练习3：日志分析器
 # ============================================================================
@@ -626,10 +957,27 @@ class LogAnalyzer:
     """
     日志分析器
     功能：解析日志文件、统计分析、生成报告
+    
+    统计信息覆盖全部日志；log_entries 只保留最近 MAX_LOG_ENTRIES 行，
+    供报告和搜索使用，跟踪模式长期运行时内存不会无限增长
     """
     
+    MAX_LOG_ENTRIES = 10000
+    
+    # 预编译正则表达式，避免每一行都重新编译
+    IP_PATTERN = re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
+    STATUS_PATTERN = re.compile(r'状态码: (\d{3})')
+    TIME_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}):\d{2}:\d{2}')
+    
     def __init__(self):
-        self.log_entries = []
+        self.log_entries = deque(maxlen=self.MAX_LOG_ENTRIES)
+        self.stats = {}
+        self.reset_stats()
+        # 跟踪模式的状态：文件对象、读取偏移量、inode 等
+        self._follow_state = None
+    
+    def reset_stats(self):
+        """重置统计信息"""
         self.stats = {
             'total_lines': 0,
             'error_count': 0,
@@ -712,61 +1060,13 @@ class LogAnalyzer:
             print(f"文件不存在：{filename}")
             return
         
-        self.log_entries = []
-        self.stats = {
-            'total_lines': 0,
-            'error_count': 0,
-            'warning_count': 0,
-            'info_count': 0,
-            'debug_count': 0,
-            'ip_addresses': {},
-            'status_codes': {},
-            'hourly_stats': {}
-        }
+        self.log_entries = deque(maxlen=self.MAX_LOG_ENTRIES)
+        self.reset_stats()
         
         try:
             with open(filename, 'r', encoding='utf-8') as f:
                 for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    self.stats['total_lines'] += 1
-                    
-                    # 解析日志级别
-                    if '[ERROR]' in line:
-                        self.stats['error_count'] += 1
-                    elif '[WARNING]' in line:
-                        self.stats['warning_count'] += 1
-                    elif '[INFO]' in line:
-                        self.stats['info_count'] += 1
-                    elif '[DEBUG]' in line:
-                        self.stats['debug_count'] += 1
-                    
-                    # 提取IP地址
-                    import re
-                    ip_pattern = r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b'
-                    ip_matches = re.findall(ip_pattern, line)
-                    for ip in ip_matches:
-                        self.stats['ip_addresses'][ip] = self.stats['ip_addresses'].get(ip, 0) + 1
-                    
-                    # 提取状态码
-                    status_pattern = r'状态码: (\d{3})'
-                    status_matches = re.findall(status_pattern, line)
-                    for status in status_matches:
-                        self.stats['status_codes'][status] = self.stats['status_codes'].get(status, 0) + 1
-                    
-                    # 提取时间信息（按小时统计）
-                    time_pattern = r'(\d{4}-\d{2}-\d{2} \d{2}):\d{2}:\d{2}'
-                    time_matches = re.findall(time_pattern, line)
-                    for time_hour in time_matches:
-                        self.stats['hourly_stats'][time_hour] = self.stats['hourly_stats'].get(time_hour, 0) + 1
-                    
-                    # 保存日志条目
-                    self.log_entries.append({
-                        'line_number': line_num,
-                        'content': line
-                    })
+                    self._analyze_line(line, line_num)
         
         except Exception as e:
             print(f"解析日志文件失败：{e}")
@@ -774,6 +1074,126 @@ class LogAnalyzer:
         
         print(f"日志解析完成，共处理 {self.stats['total_lines']} 行")
     
+    def _analyze_line(self, line, line_num):
+        """分析单行日志并累加到统计信息中"""
+        line = line.strip()
+        if not line:
+            return
+        
+        self.stats['total_lines'] += 1
+        
+        # 解析日志级别
+        if '[ERROR]' in line:
+            self.stats['error_count'] += 1
+        elif '[WARNING]' in line:
+            self.stats['warning_count'] += 1
+        elif '[INFO]' in line:
+            self.stats['info_count'] += 1
+        elif '[DEBUG]' in line:
+            self.stats['debug_count'] += 1
+        
+        # 提取IP地址
+        for ip in self.IP_PATTERN.findall(line):
+            self.stats['ip_addresses'][ip] = self.stats['ip_addresses'].get(ip, 0) + 1
+        
+        # 提取状态码
+        for status in self.STATUS_PATTERN.findall(line):
+            self.stats['status_codes'][status] = self.stats['status_codes'].get(status, 0) + 1
+        
+        # 提取时间信息（按小时统计）
+        for time_hour in self.TIME_PATTERN.findall(line):
+            self.stats['hourly_stats'][time_hour] = self.stats['hourly_stats'].get(time_hour, 0) + 1
+        
+        # 保存日志条目（超过上限时自动丢弃最早的条目）
+        self.log_entries.append({
+            'line_number': line_num,
+            'content': line
+        })
+    
+    def follow_log_file(self, filename, from_end=False):
+        """
+        跟踪模式（类似 tail -F）：只读取上次之后追加的字节，增量更新 stats
+        
+        - 记住读取偏移量和文件的 inode，每次调用只处理新增的完整行
+        - 文件被轮转（inode 变化）时，先读完旧文件剩余内容，再从新文件开头读取
+        - 文件被截断（大小小于偏移量）时，从头开始读取
+        - from_end=True 时首次调用跳过已有内容，只统计之后追加的日志
+        
+        返回本次新处理的行数
+        """
+        try:
+            st = os.stat(filename)
+        except FileNotFoundError:
+            # 轮转的间隙新文件可能还没创建，下次再试
+            print(f"文件不存在：{filename}")
+            return 0
+        
+        state = self._follow_state
+        if state is None or state['path'] != filename:
+            self.stop_follow()
+            state = self._open_follow(filename)
+            if from_end:
+                state['offset'] = os.fstat(state['file'].fileno()).st_size
+            return self._read_appended()
+        
+        processed = 0
+        if (st.st_ino, st.st_dev) != (state['inode'], state['dev']):
+            # 文件已被轮转：旧文件可能还有未读完的内容
+            processed += self._read_appended(flush_pending=True)
+            self.stop_follow()
+            self._open_follow(filename)
+            print(f"检测到日志轮转：{filename}")
+        elif st.st_size < state['offset']:
+            # 文件被截断：从头重新读取
+            state['offset'] = 0
+            state['pending'] = b''
+            state['line_number'] = 0
+            print(f"检测到日志截断：{filename}")
+        
+        processed += self._read_appended()
+        return processed
+    
+    def _open_follow(self, filename):
+        """打开要跟踪的文件并初始化跟踪状态（inode 取自已打开的句柄）"""
+        f = open(filename, 'rb')
+        st = os.fstat(f.fileno())
+        self._follow_state = {
+            'path': filename,
+            'file': f,
+            'inode': st.st_ino,
+            'dev': st.st_dev,
+            'offset': 0,
+            'pending': b'',  # 末尾尚未写完的半行
+            'line_number': 0
+        }
+        return self._follow_state
+    
+    def _read_appended(self, flush_pending=False):
+        """从上次的偏移量读取新增字节，只处理完整的行"""
+        state = self._follow_state
+        f = state['file']
+        f.seek(state['offset'])
+        data = f.read()
+        state['offset'] += len(data)
+        
+        lines = (state['pending'] + data).split(b'\n')
+        # 最后一段可能是写了一半的行，留到下次再处理
+        state['pending'] = b'' if flush_pending else lines.pop()
+        
+        processed = 0
+        for raw_line in lines:
+            state['line_number'] += 1
+            if raw_line.strip():
+                processed += 1
+            self._analyze_line(raw_line.decode('utf-8', errors='replace'), state['line_number'])
+        return processed
+    
+    def stop_follow(self):
+        """结束跟踪模式，关闭文件"""
+        if self._follow_state is not None:
+            self._follow_state['file'].close()
+            self._follow_state = None
+    
     def generate_analysis_report(self, output_file="log_analysis_report.txt"):
         """生成分析报告"""
         print(f"\n--- 生成分析报告 ---")
@@ -875,6 +1295,29 @@ if os.path.exists(report_file):
 # 搜索示例
 analyzer.search_logs("ERROR")
 
+# 跟踪模式：只处理新追加的日志，适合近实时监控
+print("\n--- 跟踪模式（增量统计）演示 ---")
+follower = LogAnalyzer()
+follow_file = follower.create_sample_log("follow_demo.log", 20)
+print(f"首次读取：{follower.follow_log_file(follow_file)} 行")
+
+with open(follow_file, 'a', encoding='utf-8') as f:
+    f.write(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} [ERROR] HTTP错误 500\n")
+    f.write(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} [INFO] 页面访问 - 状态码: 200\n")
+    f.write(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} [INFO] 写了一半的行")
+print(f"追加后读取：{follower.follow_log_file(follow_file)} 行（半行暂不处理）")
+
+# 模拟日志轮转：旧文件改名，新建同名文件
+with open(follow_file, 'a', encoding='utf-8') as f:
+    f.write("\n")
+os.replace(follow_file, follow_file + ".1")
+with open(follow_file, 'w', encoding='utf-8') as f:
+    f.write(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} [WARNING] 内存使用率较高\n")
+print(f"轮转后读取：{follower.follow_log_file(follow_file)} 行")
+print(f"累计统计：总行数 {follower.stats['total_lines']}，"
+      f"错误 {follower.stats['error_count']}，警告 {follower.stats['warning_count']}")
+follower.stop_follow()
+
 # ============================================================================
 # 练习4：配置文件管理器
 # ============================================================================
@@ -887,11 +1330,28 @@ class ConfigManager:
     """
     配置文件管理器
     功能：读取、写入、验证各种格式的配置文件
+    
+    性能设计：
+    - 解析缓存：按文件内容的SHA-256缓存解析结果，内容不变的文件不再重复解析
+    - 写时复制：set_config 沿路径复制字典，缓存中的解析结果永远不会被修改，
+      可以被多个实例安全共享
+    - 点号路径的拆分结果和查询结果都会缓存，配置修改或重新加载时清空查询缓存；
+      get_config 返回字典或列表时给出深拷贝，调用方修改返回值不会影响共享的缓存
+    - 验证规则预编译为检查函数列表，每条规则遇到第一个错误就停止
     """
     
+    PARSE_CACHE_SIZE = 32
+    PATH_CACHE_SIZE = 1024
+    _parse_cache = {}  # (格式, 内容哈希) -> 解析结果，所有实例共享
+    _path_cache = {}   # 点号路径 -> 键元组，最多 PATH_CACHE_SIZE 条
+    _MISSING = object()   # 查询缓存中表示"路径不存在"
+    _UNCACHED = object()  # 表示"路径尚未查询过"
+    
     def __init__(self):
         self.config_data = {}
         self.config_file = None
+        self._lookup_cache = {}
+        self.parse_cache_hits = 0
     
     def create_sample_config(self):
         """创建示例配置文件"""
@@ -965,9 +1425,7 @@ max_connections = 100
         print(f"\n--- 加载JSON配置：{filename} ---")
         
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                self.config_data = json.load(f)
-            
+            self._set_data(self._load_cached(filename, 'json', lambda text: json.loads(text)))
             self.config_file = filename
             print(f"配置加载成功，包含 {len(self.config_data)} 个主要配置项")
             return True
@@ -987,40 +1445,7 @@ max_connections = 100
         print(f"\n--- 加载INI配置：{filename} ---")
         
         try:
-            config_data = {}
-            current_section = None
-            
-            with open(filename, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    
-                    # 跳过空行和注释
-                    if not line or line.startswith('#') or line.startswith(';'):
-                        continue
-                    
-                    # 处理节（section）
-                    if line.startswith('[') and line.endswith(']'):
-                        current_section = line[1:-1]
-                        config_data[current_section] = {}
-                        continue
-                    
-                    # 处理键值对
-                    if '=' in line and current_section:
-                        key, value = line.split('=', 1)
-                        key = key.strip()
-                        value = value.strip()
-                        
-                        # 类型转换
-                        if value.lower() in ['true', 'false']:
-                            value = value.lower() == 'true'
-                        elif value.isdigit():
-                            value = int(value)
-                        elif value.replace('.', '').isdigit():
-                            value = float(value)
-                        
-                        config_data[current_section][key] = value
-            
-            self.config_data = config_data
+            self._set_data(self._load_cached(filename, 'ini', self._parse_ini))
             self.config_file = filename
             print(f"INI配置加载成功，包含 {len(self.config_data)} 个配置节")
             return True
@@ -1029,89 +1454,222 @@ max_connections = 100
             print(f"加载INI配置失败：{e}")
             return False
     
+    @staticmethod
+    def _parse_ini(text):
+        """解析INI格式文本"""
+        config_data = {}
+        current_section = None
+        
+        for line in text.splitlines():
+            line = line.strip()
+            
+            # 跳过空行和注释
+            if not line or line.startswith('#') or line.startswith(';'):
+                continue
+            
+            # 处理节（section）
+            if line.startswith('[') and line.endswith(']'):
+                current_section = line[1:-1]
+                config_data[current_section] = {}
+                continue
+            
+            # 处理键值对
+            if '=' in line and current_section:
+                key, value = line.split('=', 1)
+                key = key.strip()
+                value = value.strip()
+                
+                # 类型转换
+                if value.lower() in ['true', 'false']:
+                    value = value.lower() == 'true'
+                elif value.isdigit():
+                    value = int(value)
+                elif value.count('.') == 1 and value.replace('.', '').isdigit():
+                    value = float(value)
+                
+                config_data[current_section][key] = value
+        
+        return config_data
+    
+    def _load_cached(self, filename, kind, parse):
+        """读取文件，按内容哈希查解析缓存，未命中时才解析"""
+        with open(filename, 'rb') as f:
+            raw = f.read()
+        
+        key = (kind, hashlib.sha256(raw).hexdigest())
+        cache = ConfigManager._parse_cache
+        if key in cache:
+            self.parse_cache_hits += 1
+            return cache[key]
+        
+        data = parse(raw.decode('utf-8'))
+        if len(cache) >= self.PARSE_CACHE_SIZE:
+            cache.pop(next(iter(cache)))  # 淘汰最早加入的条目
+        cache[key] = data
+        return data
+    
+    def _set_data(self, data):
+        self.config_data = data
+        self._lookup_cache.clear()
+    
+    @classmethod
+    def _split_path(cls, path):
+        cache = cls._path_cache
+        keys = cache.get(path)
+        if keys is None:
+            keys = tuple(path.split('.'))
+            if len(cache) >= cls.PATH_CACHE_SIZE:
+                cache.pop(next(iter(cache)))  # 淘汰最早加入的条目
+            cache[path] = keys
+        return keys
+    
     def get_config(self, path, default=None):
         """获取配置值（支持点号路径）"""
-        keys = path.split('.')
-        value = self.config_data
+        value = self._lookup_cache.get(path, self._UNCACHED)
+        if value is self._UNCACHED:
+            value = self.config_data
+            try:
+                for key in self._split_path(path):
+                    value = value[key]
+            except (KeyError, TypeError):
+                value = self._MISSING
+            self._lookup_cache[path] = value
         
-        try:
-            for key in keys:
-                value = value[key]
-            return value
-        except (KeyError, TypeError):
+        if value is self._MISSING:
             return default
+        if isinstance(value, (dict, list)):
+            return copy.deepcopy(value)
+        return value
     
     def set_config(self, path, value):
         """设置配置值（支持点号路径）"""
-        keys = path.split('.')
-        config = self.config_data
+        keys = self._split_path(path)
         
-        # 创建嵌套字典结构
+        # 写时复制：沿路径复制字典（不存在的层级新建），不修改缓存中共享的解析结果
+        root = dict(self.config_data)
+        config = root
         for key in keys[:-1]:
-            if key not in config:
-                config[key] = {}
+            config[key] = dict(config[key]) if key in config else {}
             config = config[key]
         
         # 设置最终值
         config[keys[-1]] = value
+        self._set_data(root)
         print(f"配置已更新：{path} = {value}")
     
-    def validate_config(self, rules):
-        """验证配置"""
-        print("\n--- 配置验证 ---")
+    @staticmethod
+    def compile_rules(rules):
+        """
+        把规则字典预编译为 (路径, 必需, 检查函数列表, 警告函数) 列表
+        
+        检查函数返回错误信息或None；重复验证时直接复用编译结果
+        """
+        compiled = []
+        for rule in rules:
+            path = rule['path']
+            checks = []
+            
+            # 类型检查
+            if 'type' in rule:
+                expected_type = rule['type']
+                checks.append(lambda value, path=path, t=expected_type:
+                              None if isinstance(value, t) else
+                              f"配置项 {path} 类型错误，期望 {t.__name__}，实际 {type(value).__name__}")
+            
+            # 范围检查
+            if 'min' in rule:
+                low = rule['min']
+                checks.append(lambda value, path=path, low=low:
+                              f"配置项 {path} 值 {value} 小于最小值 {low}"
+                              if isinstance(value, (int, float)) and value < low else None)
+            
+            if 'max' in rule:
+                high = rule['max']
+                checks.append(lambda value, path=path, high=high:
+                              f"配置项 {path} 值 {value} 大于最大值 {high}"
+                              if isinstance(value, (int, float)) and value > high else None)
+            
+            # 选项检查（可哈希时用集合查找，值或选项不可哈希时退回列表查找）
+            if 'choices' in rule:
+                choices = rule['choices']
+                try:
+                    lookup = frozenset(choices)
+                except TypeError:
+                    lookup = choices
+                
+                def check_choice(value, path=path, lookup=lookup, choices=choices):
+                    try:
+                        allowed = value in lookup
+                    except TypeError:
+                        allowed = value in choices
+                    return None if allowed else f"配置项 {path} 值 {value} 不在允许的选项中：{choices}"
+                checks.append(check_choice)
+            
+            warn_if = rule.get('warn_if')
+            if not callable(warn_if):
+                warn_if = None
+            
+            compiled.append((path, rule.get('required', False), checks, warn_if))
+        
+        return compiled
+    
+    def validate_config(self, rules, fail_fast=False, verbose=True):
+        """
+        验证配置
+        
+        Args:
+            rules: 规则字典列表，或 compile_rules() 的编译结果
+            fail_fast: 遇到第一个错误就停止
+            verbose: 是否打印验证结果
+        """
+        if verbose:
+            print("\n--- 配置验证 ---")
+        
+        if rules and isinstance(rules[0], dict):
+            rules = self.compile_rules(rules)
         
         errors = []
         warnings = []
         
-        for rule in rules:
-            path = rule['path']
+        for path, required, checks, warn_if in rules:
             value = self.get_config(path)
             
-            # 检查必需项
-            if rule.get('required', False) and value is None:
-                errors.append(f"缺少必需配置项：{path}")
+            if value is None:
+                # 检查必需项
+                if required:
+                    errors.append(f"缺少必需配置项：{path}")
+                    if fail_fast:
+                        break
                 continue
             
-            if value is not None:
-                # 类型检查
-                if 'type' in rule:
-                    expected_type = rule['type']
-                    if not isinstance(value, expected_type):
-                        errors.append(f"配置项 {path} 类型错误，期望 {expected_type.__name__}，实际 {type(value).__name__}")
-                
-                # 范围检查
-                if 'min' in rule and isinstance(value, (int, float)):
-                    if value < rule['min']:
-                        errors.append(f"配置项 {path} 值 {value} 小于最小值 {rule['min']}")
-                
-                if 'max' in rule and isinstance(value, (int, float)):
-                    if value > rule['max']:
-                        errors.append(f"配置项 {path} 值 {value} 大于最大值 {rule['max']}")
-                
-                # 选项检查
-                if 'choices' in rule:
-                    if value not in rule['choices']:
-                        errors.append(f"配置项 {path} 值 {value} 不在允许的选项中：{rule['choices']}")
-                
-                # 警告检查
-                if 'warn_if' in rule:
-                    warn_condition = rule['warn_if']
-                    if callable(warn_condition) and warn_condition(value):
-                        warnings.append(f"配置项 {path} 值 {value} 可能存在问题")
+            # 每条规则遇到第一个错误即停止后续检查
+            for check in checks:
+                error = check(value)
+                if error:
+                    errors.append(error)
+                    break
+            
+            if errors and fail_fast:
+                break
+            
+            # 警告检查
+            if warn_if is not None and warn_if(value):
+                warnings.append(f"配置项 {path} 值 {value} 可能存在问题")
         
         # 输出验证结果
-        if errors:
-            print(f"发现 {len(errors)} 个错误：")
-            for error in errors:
-                print(f"  ❌ {error}")
-        
-        if warnings:
-            print(f"发现 {len(warnings)} 个警告：")
-            for warning in warnings:
-                print(f"  ⚠️  {warning}")
-        
-        if not errors and not warnings:
-            print("✅ 配置验证通过")
+        if verbose:
+            if errors:
+                print(f"发现 {len(errors)} 个错误：")
+                for error in errors:
+                    print(f"  ❌ {error}")
+            
+            if warnings:
+                print(f"发现 {len(warnings)} 个警告：")
+                for warning in warnings:
+                    print(f"  ⚠️  {warning}")
+            
+            if not errors and not warnings:
+                print("✅ 配置验证通过")
         
         return len(errors) == 0
     
@@ -1194,6 +1752,71 @@ config_manager.validate_config(validation_rules)
 # 保存配置
 config_manager.save_config("updated_config.json")
 
+def benchmark_config_validation(key_count=10000, repeats=5):
+    """
+    大配置的加载和验证基准测试
+    
+    比较：首次解析 vs 命中解析缓存；逐次编译规则 vs 预编译规则；
+    全量验证 vs fail_fast 在第一个错误处停止
+    """
+    sections = 100
+    per_section = key_count // sections
+    config = {f"section{s}": {f"key{k}": k for k in range(per_section)} for s in range(sections)}
+    filename = "bench_config.json"
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    
+    rules = [{'path': f"section{s}.key{k}", 'required': True, 'type': int, 'min': 0, 'max': per_section}
+             for s in range(sections) for k in range(per_section)]
+    
+    def timed(func):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+    
+    manager = ConfigManager()
+    ConfigManager._parse_cache.clear()
+    
+    def parse_uncached():
+        ConfigManager._parse_cache.clear()
+        manager._set_data(manager._load_cached(filename, 'json', json.loads))
+    
+    results = {
+        '解析（无缓存）': timed(parse_uncached),
+        '解析（命中缓存）': timed(lambda: manager._set_data(manager._load_cached(filename, 'json', json.loads))),
+    }
+    
+    results['验证（每次编译规则）'] = timed(lambda: manager.validate_config(rules, verbose=False))
+    compiled = ConfigManager.compile_rules(rules)
+    results['验证（预编译规则，冷查询）'] = timed(
+        lambda: (manager._lookup_cache.clear(), manager.validate_config(compiled, verbose=False)))
+    results['验证（预编译规则，热查询）'] = timed(lambda: manager.validate_config(compiled, verbose=False))
+    
+    # 第一个配置项就不合法：fail_fast 立即返回
+    bad_rules = ConfigManager.compile_rules([{'path': 'section0.key0', 'type': str}] + rules)
+    results['验证（有错误，全量）'] = timed(lambda: manager.validate_config(bad_rules, verbose=False))
+    results['验证（有错误，fail_fast）'] = timed(
+        lambda: manager.validate_config(bad_rules, fail_fast=True, verbose=False))
+    
+    os.remove(filename)
+    
+    print(f"\n{key_count:,} 个配置项（{repeats} 次取最快）：")
+    for name, elapsed in results.items():
+        print(f"  {name:<22} {elapsed * 1000:8.2f} 毫秒")
+    return results
+
+# 解析缓存：内容不变的配置文件再次加载时不重新解析
+print("\n--- 配置解析缓存 ---")
+another_manager = ConfigManager()
+another_manager.load_json_config(json_file)
+print(f"解析缓存命中次数：{another_manager.parse_cache_hits}")
+print(f"缓存中的配置未被 set_config 修改：database.port = {another_manager.get_config('database.port')}")
+
+benchmark_config_validation(10000)
+
 # ============================================================================
 # 综合练习总结
 # ============================================================================
@@ -1255,10 +1878,11 @@ print("=" * 60)
 
 print("""
 本次练习创建了以下文件和目录：
-- students_data.json (学生数据)
+- students_data.jsonl (学生数据日志)
 - test_files/ (测试文件目录)
 - batch_process.log (批处理日志)
 - demo.log (示例日志)
+- follow_demo.log, follow_demo.log.1 (跟踪模式示例日志)
 - log_analysis_report.txt (日志分析报告)
 - config.json, config.ini (配置文件)
 - 各种导出和报告文件
@@ -17,10 +17,389 @@ Python文件操作 - 二进制文件处理
 """
 
 import os
+import mmap
+import json
+import random
 import struct
 import time
 import pickle
-from typing import List, Tuple, Any
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Any, Dict, Iterable, Iterator, Optional
+
+
+class RecordFile:
+    """
+    定长记录文件
+    
+    文件结构：文件头（魔数、版本、记录长度、格式串） + N 条定长记录。
+    记录长度固定，第 i 条记录的偏移量就是 HEADER.size + i * record_size，
+    所以随机访问不需要扫描文件。
+    
+    - 写入：预编译的 struct.Struct 批量 pack_into 到同一个缓冲区
+    - 顺序读：按块读取后用 iter_unpack 一次解出整块记录
+    - 随机读：通过 mmap 映射文件，unpack_from 直接从映射内存解包，
+      view() 返回记录的 memoryview，不复制数据
+    """
+    
+    MAGIC = b'REC1'
+    VERSION = 1
+    MAX_FORMAT_LENGTH = 24
+    HEADER = struct.Struct(f'<4sHH{MAX_FORMAT_LENGTH}s')
+    BATCH_RECORDS = 4096
+    
+    def __init__(self, filename: str, fmt: Optional[str] = None):
+        """
+        打开记录文件
+        
+        Args:
+            filename: 文件路径
+            fmt: 记录格式（不含字节序前缀，统一使用小端），最长 MAX_FORMAT_LENGTH 个字符。
+                 文件不存在时必须提供；文件已存在时从文件头读取并校验
+        """
+        self.filename = filename
+        
+        if os.path.exists(filename) and os.path.getsize(filename) >= self.HEADER.size:
+            with open(filename, 'rb') as f:
+                magic, version, record_size, stored_fmt = self.HEADER.unpack(f.read(self.HEADER.size))
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError(f"不是有效的记录文件：{filename}")
+            stored_fmt = stored_fmt.rstrip(b'\0').decode('ascii')
+            if fmt is not None and fmt != stored_fmt:
+                raise ValueError(f"记录格式不匹配：文件为 {stored_fmt}，期望 {fmt}")
+            fmt = stored_fmt
+        else:
+            if fmt is None:
+                raise ValueError("新建记录文件时必须指定记录格式")
+            fmt_bytes = fmt.encode('ascii')
+            if len(fmt_bytes) > self.MAX_FORMAT_LENGTH:
+                # 文件头中的格式串字段定长，超长部分会被 pack 静默截断
+                raise ValueError(f"记录格式过长（{len(fmt_bytes)} 字符，最多 {self.MAX_FORMAT_LENGTH}）：{fmt}")
+            record_size = struct.calcsize('<' + fmt)
+            with open(filename, 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.VERSION, record_size, fmt_bytes))
+        
+        self.fmt = fmt
+        self.record = struct.Struct('<' + fmt)
+        self._file = None
+        self._mm: Optional[mmap.mmap] = None
+        self._mapped_count = 0
+    
+    def __len__(self) -> int:
+        return (os.path.getsize(self.filename) - self.HEADER.size) // self.record.size
+    
+    def offset(self, index: int) -> int:
+        """第 index 条记录在文件中的偏移量"""
+        return self.HEADER.size + index * self.record.size
+    
+    def append(self, records: Iterable[tuple]) -> int:
+        """批量追加记录，返回写入的条数"""
+        record = self.record
+        buffer = bytearray(record.size * self.BATCH_RECORDS)
+        written = 0
+        
+        with open(self.filename, 'ab') as f:
+            pos = 0
+            for values in records:
+                record.pack_into(buffer, pos, *values)
+                pos += record.size
+                written += 1
+                if pos == len(buffer):
+                    f.write(buffer)
+                    pos = 0
+            if pos:
+                f.write(memoryview(buffer)[:pos])
+        
+        return written
+    
+    def iter_records(self) -> Iterator[tuple]:
+        """顺序读取全部记录，每次读取一整块再用 iter_unpack 解包"""
+        chunk_size = self.record.size * self.BATCH_RECORDS
+        with open(self.filename, 'rb') as f:
+            f.seek(self.HEADER.size)
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                usable = len(chunk) - len(chunk) % self.record.size
+                yield from self.record.iter_unpack(memoryview(chunk)[:usable])
+    
+    def build_index(self, field: int = 0) -> Dict[Any, int]:
+        """按指定字段建立 键 -> 记录号 的索引，用于按键随机访问"""
+        return {values[field]: i for i, values in enumerate(self.iter_records())}
+    
+    # 基于mmap的随机访问
+    def open_map(self) -> 'RecordFile':
+        """映射文件用于随机访问；可以作为上下文管理器使用"""
+        if self._mm is None:
+            self._file = open(self.filename, 'rb')
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_count = (len(self._mm) - self.HEADER.size) // self.record.size
+        return self
+    
+    def get(self, index: int) -> tuple:
+        """直接从映射内存解包第 index 条记录"""
+        if not 0 <= index < self._mapped_count:
+            raise IndexError(f"记录号越界：{index}")
+        return self.record.unpack_from(self._mm, self.offset(index))
+    
+    def view(self, index: int) -> memoryview:
+        """
+        返回第 index 条记录的零拷贝视图
+        
+        注意：关闭映射前必须释放所有视图，否则 mmap.close() 会抛出 BufferError
+        """
+        if not 0 <= index < self._mapped_count:
+            raise IndexError(f"记录号越界：{index}")
+        start = self.offset(index)
+        return memoryview(self._mm)[start:start + self.record.size]
+    
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+            self._file = None
+    
+    def __enter__(self) -> 'RecordFile':
+        return self.open_map()
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+# 学生记录：名字(16字节UTF-8) + 年龄 + 成绩数量 + 最多4门成绩
+STUDENT_NAME_BYTES = 16
+STUDENT_RECORD_FORMAT = f'{STUDENT_NAME_BYTES}sHB4f'
+
+
+def generate_student_records(count: int, seed: int = 42) -> Iterator[tuple]:
+    """生成基准测试用的学生记录"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield (f'student{i}'.encode('ascii'), 18 + i % 10, 4,
+               rng.uniform(60, 100), rng.uniform(60, 100),
+               rng.uniform(60, 100), rng.uniform(60, 100))
+
+
+def benchmark_record_formats(count: int = 200000, lookups: int = 1000) -> Dict[str, Dict[str, float]]:
+    """
+    比较定长记录文件、pickle 和 JSON 的写入、全量读取、随机访问和文件大小
+    
+    count 取 10**7 即可得到千万级记录的结果（需要数GB内存给 pickle/JSON 使用）。
+    pickle 和 JSON 必须整体加载才能访问单条记录，所以随机访问时间包含加载时间。
+    """
+    results = {}
+    rng = random.Random(0)
+    indexes = [rng.randrange(count) for _ in range(lookups)]
+    # 预先生成数据，计时只包含序列化和文件I/O
+    raw_records = list(generate_student_records(count))
+    
+    # 定长记录文件
+    filename = 'bench_records.rec'
+    if os.path.exists(filename):
+        os.remove(filename)
+    start = time.perf_counter()
+    store = RecordFile(filename, STUDENT_RECORD_FORMAT)
+    store.append(raw_records)
+    write_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    total = sum(1 for _ in store.iter_records())
+    read_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    with store:
+        for i in indexes:
+            store.get(i)
+    lookup_time = time.perf_counter() - start
+    results['record'] = {'write': write_time, 'read': read_time,
+                         'lookup': lookup_time, 'size': os.path.getsize(filename)}
+    assert total == count
+    os.remove(filename)
+    
+    # pickle 和 JSON 使用等价的 Python 对象
+    records = [(name.decode('ascii'), age, n, list(scores))
+               for name, age, n, *scores in raw_records]
+    del raw_records
+    
+    for fmt_name, dump, load, mode in [
+        ('pickle', lambda obj, f: pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL), pickle.load, 'b'),
+        ('json', lambda obj, f: json.dump(obj, f, separators=(',', ':')), json.load, ''),
+    ]:
+        filename = f'bench_records.{fmt_name}'
+        start = time.perf_counter()
+        with open(filename, 'w' + mode) as f:
+            dump(records, f)
+        write_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        with open(filename, 'r' + mode) as f:
+            loaded = load(f)
+        read_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        with open(filename, 'r' + mode) as f:
+            loaded = load(f)
+        for i in indexes:
+            loaded[i]
+        lookup_time = time.perf_counter() - start
+        
+        results[fmt_name] = {'write': write_time, 'read': read_time,
+                             'lookup': lookup_time, 'size': os.path.getsize(filename)}
+        del loaded
+        os.remove(filename)
+    
+    print(f"\n{count:,} 条记录，{lookups} 次随机访问：")
+    print(f"{'格式':<8} {'写入(秒)':>10} {'全量读取(秒)':>14} {'随机访问(秒)':>14} {'文件大小':>14}")
+    for fmt_name, r in results.items():
+        print(f"{fmt_name:<8} {r['write']:>10.3f} {r['read']:>14.3f} {r['lookup']:>14.4f} {r['size']:>14,}")
+    
+    return results
+
+
+class BMPImage:
+    """
+    基于 mmap 的24位BMP读写
+    
+    像素数据不会整体读入内存：row(y) 返回映射内存上的 memoryview，
+    对它赋值就是直接修改文件内容。BMP 每行按4字节对齐，行跨度（stride）
+    可能大于 width * 3，行号按文件存储顺序（自下而上）。
+    """
+    
+    FILE_HEADER = struct.Struct('<2sIHHI')
+    INFO_HEADER = struct.Struct('<IIiHHIIIIII')
+    HEADER_SIZE = FILE_HEADER.size + INFO_HEADER.size
+    
+    # 灰度转换系数（ITU-R BT.601，按256缩放）
+    GRAY_WEIGHTS = (29, 150, 77)  # B, G, R
+    
+    def __init__(self, filename: str, writable: bool = False):
+        self.filename = filename
+        self._file = open(filename, 'r+b' if writable else 'rb')
+        self._mm = None
+        try:
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=access)
+            
+            file_type, self.file_size, _, _, self.data_offset = self.FILE_HEADER.unpack_from(self._mm, 0)
+            if file_type != b'BM':
+                raise ValueError(f"不是BMP文件：{filename}")
+            (_, self.width, self.height, _, self.bits_per_pixel,
+             self.compression, self.image_size, *_) = self.INFO_HEADER.unpack_from(self._mm, self.FILE_HEADER.size)
+            if self.bits_per_pixel != 24 or self.compression != 0:
+                raise ValueError("只支持未压缩的24位BMP")
+            
+            self.height = abs(self.height)
+            self.row_bytes = self.width * 3
+            self.stride = self.row_stride(self.width)
+            self._pixels = memoryview(self._mm)[self.data_offset:self.data_offset + self.stride * self.height]
+        except BaseException:
+            # 空文件、截断的文件头（struct.error）或格式不符时，关闭映射和文件后再抛出
+            if self._mm is not None:
+                self._mm.close()
+                self._mm = None
+            self._file.close()
+            raise
+    
+    @staticmethod
+    def row_stride(width: int) -> int:
+        """每行占用的字节数（4字节对齐）"""
+        return (width * 3 + 3) & ~3
+    
+    @classmethod
+    def create(cls, filename: str, width: int, height: int) -> 'BMPImage':
+        """创建全黑图像并以可写方式映射"""
+        stride = cls.row_stride(width)
+        image_size = stride * height
+        with open(filename, 'wb') as f:
+            f.write(cls.FILE_HEADER.pack(b'BM', cls.HEADER_SIZE + image_size, 0, 0, cls.HEADER_SIZE))
+            f.write(cls.INFO_HEADER.pack(40, width, height, 1, 24, 0, image_size, 0, 0, 0, 0))
+            f.truncate(cls.HEADER_SIZE + image_size)
+        return cls(filename, writable=True)
+    
+    def row(self, y: int) -> memoryview:
+        """第 y 行像素（BGR），不含行尾填充"""
+        start = y * self.stride
+        return self._pixels[start:start + self.row_bytes]
+    
+    def iter_rows(self) -> Iterator[Tuple[int, memoryview]]:
+        """
+        按行跨度依次产生 (行号, 行视图)
+        
+        处理下一行前会释放上一行的视图，因此循环结束后可以直接关闭映射
+        """
+        for y in range(self.height):
+            view = self.row(y)
+            try:
+                yield y, view
+            finally:
+                view.release()
+    
+    # 原地变换
+    def invert(self):
+        """反色：每行用查表转换后写回原位置"""
+        table = bytes(255 - i for i in range(256))
+        for _, row in self.iter_rows():
+            row[:] = row.tobytes().translate(table)
+    
+    def grayscale(self):
+        """灰度化：通过步长为3的视图分别访问B、G、R通道"""
+        wb, wg, wr = self.GRAY_WEIGHTS
+        for _, row in self.iter_rows():
+            gray = bytes((b * wb + g * wg + r * wr) >> 8
+                         for b, g, r in zip(row[0::3], row[1::3], row[2::3]))
+            row[0::3] = gray
+            row[1::3] = gray
+            row[2::3] = gray
+    
+    def flush(self):
+        self._mm.flush()
+    
+    def close(self):
+        """关闭映射；调用方持有的行视图必须先释放"""
+        if getattr(self, '_pixels', None) is not None:
+            self._pixels.release()
+            self._pixels = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+            self._file.close()
+    
+    def __enter__(self) -> 'BMPImage':
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+BMP_TRANSFORMS = ('invert', 'grayscale')
+
+
+def _convert_bmp(task: Tuple[str, str, str]) -> str:
+    """进程池工作函数：复制源文件后在副本上做原地变换"""
+    src, dst, transform = task
+    shutil.copyfile(src, dst)
+    with BMPImage(dst, writable=True) as image:
+        getattr(image, transform)()
+        image.flush()
+    return dst
+
+
+def convert_bmp_files(tasks: List[Tuple[str, str]], transform: str, workers: int = 4) -> List[str]:
+    """
+    用进程池批量转换BMP图像
+    
+    逐像素变换是CPU密集型操作，受GIL限制，线程池无法加速，所以使用进程池；
+    每个进程自己映射文件，进程间只传递文件名。
+    """
+    if transform not in BMP_TRANSFORMS:
+        raise ValueError(f"不支持的变换：{transform}")
+    jobs = [(src, dst, transform) for src, dst in tasks]
+    if workers <= 1:
+        return [_convert_bmp(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_convert_bmp, jobs))
 
 
 def demonstrate_binary_basics():
@@ -148,51 +527,21 @@ def demonstrate_image_processing():
     """演示简单的图像文件处理"""
     print("\n=== 简单图像文件处理 ===")
     
-    # 创建一个简单的BMP文件头（简化版）
     def create_simple_bmp(width: int, height: int, filename: str):
         """创建一个简单的24位BMP图像"""
-        # BMP文件头（14字节）
-        file_header = struct.pack('<2sIHHI',
-            b'BM',  # 文件类型
-            54 + width * height * 3,  # 文件大小
-            0,  # 保留字段
-            0,  # 保留字段
-            54  # 数据偏移
-        )
-        
-        # BMP信息头（40字节）
-        info_header = struct.pack('<IIIHHIIIIII',
-            40,  # 信息头大小
-            width,  # 图像宽度
-            height,  # 图像高度
-            1,  # 颜色平面数
-            24,  # 每像素位数
-            0,  # 压缩方式
-            width * height * 3,  # 图像数据大小
-            0,  # 水平分辨率
-            0,  # 垂直分辨率
-            0,  # 颜色数
-            0   # 重要颜色数
-        )
-        
-        # 创建简单的渐变图像数据（BGR格式）
-        image_data = bytearray()
-        for y in range(height):
-            for x in range(width):
-                # 创建简单的渐变效果
-                blue = (x * 255) // width
+        # 文件头和信息头由 BMPImage.create 写入，像素直接写进映射内存
+        with BMPImage.create(filename, width, height) as image:
+            for y, row in image.iter_rows():
                 green = (y * 255) // height
-                red = ((x + y) * 255) // (width + height)
-                image_data.extend([blue, green, red])
-        
-        # 写入BMP文件
-        with open(filename, 'wb') as f:
-            f.write(file_header)
-            f.write(info_header)
-            f.write(image_data)
+                row[:] = bytes(value for x in range(width) for value in (
+                    (x * 255) // width,                      # 蓝
+                    green,                                   # 绿
+                    ((x + y) * 255) // (width + height),     # 红
+                ))
+            file_size = image.file_size
         
         print(f"创建了 {width}x{height} 的BMP图像：{filename}")
-        return len(file_header) + len(info_header) + len(image_data)
+        return file_size
     
     # 创建示例图像
     file_size = create_simple_bmp(100, 100, 'test_image.bmp')
@@ -201,32 +550,52 @@ def demonstrate_image_processing():
     # 读取和分析BMP文件
     def analyze_bmp(filename: str):
         """分析BMP文件的基本信息"""
-        with open(filename, 'rb') as f:
-            # 读取文件头
-            file_header = f.read(14)
-            if len(file_header) < 14:
-                print("文件头不完整")
-                return
-            
-            file_type, file_size, _, _, data_offset = struct.unpack('<2sIHHI', file_header)
-            print(f"\n文件类型：{file_type}")
-            print(f"文件大小：{file_size} 字节")
-            print(f"数据偏移：{data_offset} 字节")
-            
-            # 读取信息头
-            info_header = f.read(40)
-            if len(info_header) < 40:
-                print("信息头不完整")
-                return
-            
-            (header_size, width, height, planes, bits_per_pixel,
-             compression, image_size, x_res, y_res, colors, important_colors) = struct.unpack('<IIIHHIIIIII', info_header)
-            
-            print(f"图像尺寸：{width} x {height}")
-            print(f"每像素位数：{bits_per_pixel}")
-            print(f"图像数据大小：{image_size} 字节")
+        try:
+            image = BMPImage(filename)
+        except (ValueError, struct.error) as e:
+            print(f"无法解析BMP文件：{e}")
+            return
+        
+        with image:
+            print(f"\n文件大小：{image.file_size} 字节")
+            print(f"数据偏移：{image.data_offset} 字节")
+            print(f"图像尺寸：{image.width} x {image.height}")
+            print(f"每像素位数：{image.bits_per_pixel}")
+            print(f"行跨度：{image.stride} 字节")
+            print(f"图像数据大小：{image.image_size} 字节")
+            row = image.row(image.height // 2)
+            print(f"中间行前两个像素（BGR）：{tuple(row[:6])}")
+            row.release()
     
     analyze_bmp('test_image.bmp')
+    
+    # 原地变换：直接修改映射内存，不读出整个像素数组
+    print("\n原地变换：")
+    shutil.copyfile('test_image.bmp', 'test_image_gray.bmp')
+    with BMPImage('test_image_gray.bmp', writable=True) as image:
+        image.grayscale()
+        row = image.row(image.height // 2)
+        print(f"灰度化后中间行前两个像素：{tuple(row[:6])}")
+        row.release()
+    
+    # 批量转换：单进程 vs 进程池
+    print("\n批量转换：")
+    os.makedirs('bmp_batch', exist_ok=True)
+    pattern = os.path.join('bmp_batch', 'pattern.bmp')
+    create_simple_bmp(400, 300, pattern)
+    tasks = []
+    for i in range(8):
+        src = os.path.join('bmp_batch', f'src_{i}.bmp')
+        shutil.copyfile(pattern, src)
+        tasks.append((src, os.path.join('bmp_batch', f'gray_{i}.bmp')))
+    
+    for workers in (1, 4):
+        start_time = time.perf_counter()
+        convert_bmp_files(tasks, 'grayscale', workers=workers)
+        elapsed = time.perf_counter() - start_time
+        print(f"{workers} 个进程：{len(tasks)} 张图像用时 {elapsed:.3f} 秒")
+    
+    shutil.rmtree('bmp_batch')
 
 
 def demonstrate_file_operations():
@@ -351,45 +720,42 @@ def demonstrate_serialization():
         def to_binary(self) -> bytes:
             """转换为二进制格式"""
             # 格式：名字长度(1字节) + 名字 + 年龄(2字节) + 成绩数量(1字节) + 成绩列表
+            # 用一个格式串一次打包，避免多次 pack 和 bytes 拼接
             name_bytes = self.name.encode('utf-8')
-            data = struct.pack('B', len(name_bytes))  # 名字长度
-            data += name_bytes  # 名字
-            data += struct.pack('H', self.age)  # 年龄
-            data += struct.pack('B', len(self.scores))  # 成绩数量
-            for score in self.scores:
-                data += struct.pack('f', score)  # 每个成绩
-            return data
+            fmt = f'<B{len(name_bytes)}sHB{len(self.scores)}f'
+            return struct.pack(fmt, len(name_bytes), name_bytes, self.age,
+                               len(self.scores), *self.scores)
         
         @classmethod
         def from_binary(cls, data: bytes):
             """从二进制格式创建对象"""
-            offset = 0
-            
             # 读取名字长度
-            name_len = struct.unpack_from('B', data, offset)[0]
-            offset += 1
+            name_len = data[0]
+            offset = 1 + name_len
+            name = data[1:offset].decode('utf-8')
             
-            # 读取名字
-            name = data[offset:offset + name_len].decode('utf-8')
-            offset += name_len
+            # 年龄和成绩数量
+            age, score_count = struct.unpack_from('<HB', data, offset)
+            offset += 3
             
-            # 读取年龄
-            age = struct.unpack_from('H', data, offset)[0]
-            offset += 2
-            
-            # 读取成绩数量
-            score_count = struct.unpack_from('B', data, offset)[0]
-            offset += 1
-            
-            # 读取成绩列表
-            scores = []
-            for _ in range(score_count):
-                score = struct.unpack_from('f', data, offset)[0]
-                scores.append(score)
-                offset += 4
+            # 一次解出全部成绩
+            scores = list(struct.unpack_from(f'<{score_count}f', data, offset))
             
             return cls(name, age, scores)
         
+        def to_record(self) -> tuple:
+            """转换为定长记录（最多4门成绩，不足补0；名字超长时按完整字符截断）"""
+            scores = (self.scores + [0.0] * 4)[:4]
+            # 直接截断字节可能把多字节字符切成两半，解码时会出错
+            name = self.name.encode('utf-8')[:STUDENT_NAME_BYTES].decode('utf-8', errors='ignore')
+            return (name.encode('utf-8'), self.age, min(len(self.scores), 4), *scores)
+        
+        @classmethod
+        def from_record(cls, values: tuple):
+            """从定长记录创建对象"""
+            name, age, score_count, *scores = values
+            return cls(name.rstrip(b'\0').decode('utf-8'), age, scores[:score_count])
+        
         def __str__(self):
             return f"Student(name='{self.name}', age={self.age}, scores={self.scores})"
     
@@ -405,6 +771,38 @@ def demonstrate_serialization():
     # 反序列化
     loaded_student = Student.from_binary(binary_data)
     print(f"加载的学生对象：{loaded_student}")
+    
+    # 3. 定长记录文件
+    print("\n3. 定长记录文件：")
+    
+    if os.path.exists('students.rec'):
+        os.remove('students.rec')
+    store = RecordFile('students.rec', STUDENT_RECORD_FORMAT)
+    students = [
+        Student("张三", 20, [85.5, 92.0, 78.5, 96.0]),
+        Student("李四", 21, [88.0, 79.5, 91.0]),
+        Student("王五", 19, [72.0, 85.0]),
+        Student("欧阳司马小明", 22, [90.0]),  # UTF-8编码18字节，超过16字节的名字字段
+    ]
+    store.append(student.to_record() for student in students)
+    print(f"记录长度：{store.record.size} 字节，共 {len(store)} 条记录")
+    
+    # 顺序读取
+    for values in store.iter_records():
+        print(f"  {Student.from_record(values)}")
+    
+    # 按名字建立索引，通过mmap随机访问
+    index = store.build_index(field=0)
+    with store:
+        key = "李四".encode('utf-8').ljust(STUDENT_NAME_BYTES, b'\0')
+        print(f"按索引读取李四：{Student.from_record(store.get(index[key]))}")
+        view = store.view(2)
+        print(f"第3条记录的零拷贝视图：{view[:8].hex()}...（{view.nbytes} 字节）")
+        view.release()
+    
+    # 4. 与pickle、JSON的性能对比
+    print("\n4. 定长记录 vs pickle vs JSON：")
+    benchmark_record_formats(count=200000)
 
 
 def demonstrate_performance():
@@ -467,7 +865,7 @@ def cleanup_files():
     """清理演示过程中创建的文件"""
     files_to_remove = [
         'binary_test.bin', 'header_test.bin', 'test_image.bmp', 
-        'test_image_copy.bmp', 'data.pickle'
+        'test_image_copy.bmp', 'test_image_gray.bmp', 'data.pickle', 'students.rec'
     ]
     
     for filename in files_to_remove:
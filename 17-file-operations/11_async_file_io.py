@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Python文件操作 - 异步文件I/O
+
+本模块演示如何在asyncio程序中进行文件操作：
+1. 为什么普通文件操作会阻塞事件循环
+2. 用有界线程池承载阻塞的文件操作
+3. 并发数限制和任务取消
+4. 排队等待时间与实际I/O时间的统计
+5. 大量小文件并发读取的性能测试
+
+作者：Python学习助手
+日期：2024年
+"""
+
+import os
+import time
+import shutil
+import asyncio
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, AsyncIterator, Optional
+
+
+def _current_umask() -> int:
+    """读取进程的umask（os.umask只能先设置再恢复）"""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# 模块加载时读取一次，避免在工作线程中临时修改umask
+_UMASK = _current_umask()
+
+
+def _set_final_mode(temp_name: str, path: str) -> None:
+    """
+    mkstemp创建的文件权限是0600；替换前改成与直接open(path, 'w')一致的权限：
+    目标已存在时沿用原权限，否则使用umask下的默认权限
+    """
+    if os.path.exists(path):
+        shutil.copymode(path, temp_name)
+    else:
+        os.chmod(temp_name, 0o666 & ~_UMASK)
+
+
+class IOStats:
+    """
+    异步文件操作统计
+
+    - 排队等待时间：从调用到线程池真正开始执行的时间（包括等待并发名额）
+    - I/O时间：在工作线程中实际执行文件操作的时间
+    排队时间远大于I/O时间时，说明并发数或线程数成为瓶颈。
+    """
+
+    def __init__(self):
+        self.operations = 0
+        self.cancelled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.io_total = 0.0
+        self.io_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait: float, io_time: float):
+        with self._lock:
+            self.operations += 1
+            self.wait_total += wait
+            self.io_total += io_time
+            self.wait_max = max(self.wait_max, wait)
+            self.io_max = max(self.io_max, io_time)
+
+    def summary(self) -> Dict[str, float]:
+        count = self.operations or 1
+        return {
+            'operations': self.operations,
+            'cancelled': self.cancelled,
+            'avg_wait_ms': self.wait_total / count * 1000,
+            'max_wait_ms': self.wait_max * 1000,
+            'avg_io_ms': self.io_total / count * 1000,
+            'max_io_ms': self.io_max * 1000,
+        }
+
+
+class OperationCancelled(Exception):
+    """工作线程发现操作已被取消"""
+
+
+class AsyncFileIO:
+    """
+    异步文件操作接口
+
+    所有阻塞的文件操作都交给有界线程池执行，事件循环只负责等待结果：
+    - max_workers：线程池大小，决定同时进行的系统调用数量
+    - max_concurrency：同时排队和执行的操作数上限，防止瞬间提交过多任务
+    - 任务被取消时：尚未开始的操作直接丢弃；正在进行的分块操作（复制、哈希）
+      在下一个分块前停止，复制操作会删除不完整的目标文件；并发名额在工作线程
+      真正结束后才归还
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, max_workers: int = 16, max_concurrency: int = 256):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='aio-file')
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats = IOStats()
+
+    async def _run(self, func: Callable, *args) -> Any:
+        """在线程池中执行 func(cancel_event, *args)，并统计排队和I/O时间"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        cancel_event = threading.Event()
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            result = func(cancel_event, *args)
+            return result, started, time.perf_counter()
+
+        await self._semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._executor.submit(job)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        # 名额要等工作线程真正结束才归还：任务被取消时线程可能还在执行，
+        # 在 await 处提前归还会让同时运行的操作超过 max_concurrency
+        future.add_done_callback(lambda _: self._release_from_thread(loop))
+        try:
+            result, started, finished = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # 通知正在运行的分块操作尽快停止
+            cancel_event.set()
+            self.stats.cancelled += 1
+            raise
+
+        self.stats.record(started - submitted, finished - started)
+        return result
+
+    def _release_from_thread(self, loop: asyncio.AbstractEventLoop):
+        """线程池的回调在工作线程中执行，交给事件循环线程归还并发名额"""
+        try:
+            loop.call_soon_threadsafe(self._semaphore.release)
+        except RuntimeError:
+            pass  # 事件循环已经关闭，信号量也不会再被使用
+
+    # 阻塞实现（在工作线程中执行）
+    @staticmethod
+    def _read_bytes(cancel_event: threading.Event, path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    @staticmethod
+    def _read_batch(cancel_event: threading.Event, paths: List[str]) -> List[bytes]:
+        results = []
+        for path in paths:
+            if cancel_event.is_set():
+                raise OperationCancelled(path)
+            with open(path, 'rb') as f:
+                results.append(f.read())
+        return results
+
+    @staticmethod
+    def _write_bytes(cancel_event: threading.Event, path: str, data: bytes) -> int:
+        # 先写临时文件再替换，取消或失败时不会留下写了一半的文件
+        directory = os.path.dirname(path) or '.'
+        fd, temp_name = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            _set_final_mode(temp_name, path)
+            os.replace(temp_name, path)
+        except BaseException:
+            os.unlink(temp_name)
+            raise
+        return len(data)
+
+    @classmethod
+    def _copy(cls, cancel_event: threading.Event, src: str, dst: str) -> int:
+        copied = 0
+        # 先打开源文件：源文件不存在时直接报错，不会碰到目标文件
+        with open(src, 'rb') as fsrc:
+            # 写入目标旁边的临时文件，成功后再替换；失败时只删除本次创建的临时文件
+            directory = os.path.dirname(dst) or '.'
+            fd, temp_name = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(dst)}.", suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as fdst:
+                    buffer = bytearray(cls.CHUNK_SIZE)
+                    view = memoryview(buffer)
+                    while True:
+                        if cancel_event.is_set():
+                            raise OperationCancelled(src)
+                        n = fsrc.readinto(buffer)
+                        if not n:
+                            break
+                        fdst.write(view[:n])
+                        copied += n
+                _set_final_mode(temp_name, dst)
+                os.replace(temp_name, dst)
+            except BaseException:
+                os.unlink(temp_name)
+                raise
+        return copied
+
+    @classmethod
+    def _hash(cls, cancel_event: threading.Event, path: str, algorithm: str) -> str:
+        hasher = hashlib.new(algorithm)
+        with open(path, 'rb') as f:
+            buffer = bytearray(cls.CHUNK_SIZE)
+            view = memoryview(buffer)
+            while True:
+                if cancel_event.is_set():
+                    raise OperationCancelled(path)
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                hasher.update(view[:n])
+        return hasher.hexdigest()
+
+    @staticmethod
+    def _list_dir(cancel_event: threading.Event, directory: str) -> List[Dict[str, Any]]:
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    size = 0 if is_dir else entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+                entries.append({'path': entry.path, 'name': entry.name, 'is_dir': is_dir, 'size': size})
+        return entries
+
+    # 异步接口
+    async def read_bytes(self, path: str) -> bytes:
+        return await self._run(self._read_bytes, path)
+
+    async def read_text(self, path: str, encoding: str = 'utf-8') -> str:
+        data = await self._run(self._read_bytes, path)
+        return data.decode(encoding)
+
+    async def read_many(self, paths: List[str], batch_size: int = 64) -> List[bytes]:
+        """
+        批量读取多个文件，按输入顺序返回内容
+
+        小文件的读取只需要几微秒，单独提交到线程池的开销反而更大；
+        每 batch_size 个文件合并成一次提交，统计信息也按批次记录
+        """
+        batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+        results = await asyncio.gather(*(self._run(self._read_batch, batch) for batch in batches))
+        return [data for batch in results for data in batch]
+
+    async def write_bytes(self, path: str, data: bytes) -> int:
+        return await self._run(self._write_bytes, path, data)
+
+    async def write_text(self, path: str, text: str, encoding: str = 'utf-8') -> int:
+        return await self._run(self._write_bytes, path, text.encode(encoding))
+
+    async def copy(self, src: str, dst: str) -> int:
+        return await self._run(self._copy, src, dst)
+
+    async def hash(self, path: str, algorithm: str = 'sha256') -> str:
+        return await self._run(self._hash, path, algorithm)
+
+    async def scan(self, root: str, max_depth: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """逐个目录在线程池中列出内容，以异步迭代器返回条目"""
+        pending = [(root, 0)]
+        while pending:
+            directory, depth = pending.pop()
+            try:
+                entries = await self._run(self._list_dir, directory)
+            except OSError:
+                continue
+            for entry in entries:
+                entry['depth'] = depth
+                yield entry
+                if entry['is_dir'] and (max_depth is None or depth < max_depth):
+                    pending.append((entry['path'], depth + 1))
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def __aenter__(self) -> 'AsyncFileIO':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """定时唤醒并记录最大延迟，用来观察事件循环是否被阻塞"""
+    max_lag = 0.0
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - expected)
+    return max_lag
+
+
+async def benchmark_concurrent_reads(paths: List[str], worker_counts: List[int],
+                                     batch_size: int = 64) -> List[Dict[str, float]]:
+    """
+    并发读取大量小文件的性能测试
+
+    对比在事件循环中直接读取（阻塞）、每个文件单独提交到线程池、
+    以及按批提交（read_many），同时记录事件循环的最大延迟
+    """
+    results = []
+
+    # 在协程里直接调用阻塞的open/read
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    total = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            total += len(f.read())
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lag = await lag_task
+    results.append({'mode': '阻塞读取', 'workers': 0, 'seconds': elapsed,
+                    'files_per_sec': len(paths) / elapsed, 'loop_lag_ms': lag * 1000,
+                    'avg_wait_ms': 0.0, 'avg_io_ms': elapsed / len(paths) * 1000})
+
+    async def read_each(aio: AsyncFileIO) -> List[bytes]:
+        return await asyncio.gather(*(aio.read_bytes(path) for path in paths))
+
+    async def read_batched(aio: AsyncFileIO) -> List[bytes]:
+        return await aio.read_many(paths, batch_size=batch_size)
+
+    for mode, reader in (('逐个提交', read_each), ('批量提交', read_batched)):
+        for workers in worker_counts:
+            async with AsyncFileIO(max_workers=workers, max_concurrency=max(workers * 4, 64)) as aio:
+                stop = asyncio.Event()
+                lag_task = asyncio.create_task(measure_loop_lag(stop))
+                start = time.perf_counter()
+                data = await reader(aio)
+                elapsed = time.perf_counter() - start
+                stop.set()
+                lag = await lag_task
+                assert sum(len(d) for d in data) == total
+                summary = aio.stats.summary()
+
+            results.append({'mode': mode, 'workers': workers, 'seconds': elapsed,
+                            'files_per_sec': len(paths) / elapsed, 'loop_lag_ms': lag * 1000,
+                            'avg_wait_ms': summary['avg_wait_ms'], 'avg_io_ms': summary['avg_io_ms']})
+
+    print(f"\n并发读取 {len(paths):,} 个小文件（批量提交每批 {batch_size} 个，排队和I/O时间按提交单位统计）：")
+    print(f"{'方式':<8} {'线程':>4} {'耗时(秒)':>10} {'文件/秒':>10} {'循环延迟(ms)':>14} {'平均排队(ms)':>14} {'平均I/O(ms)':>12}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['workers']:>4} {r['seconds']:>10.3f} {r['files_per_sec']:>10.0f} "
+              f"{r['loop_lag_ms']:>14.1f} {r['avg_wait_ms']:>14.2f} {r['avg_io_ms']:>12.3f}")
+
+    return results
+
+
+def demonstrate_basic_operations(work_dir: str):
+    """演示基本的异步文件操作"""
+    print("\n=== 基本异步文件操作 ===")
+
+    async def run():
+        async with AsyncFileIO(max_workers=4) as aio:
+            path = os.path.join(work_dir, 'hello.txt')
+            written = await aio.write_text(path, "你好，异步文件I/O\n" * 100)
+            print(f"写入 {written} 字节")
+
+            text = await aio.read_text(path)
+            print(f"读取 {len(text)} 个字符，第一行：{text.splitlines()[0]}")
+
+            copy_path = os.path.join(work_dir, 'hello_copy.txt')
+            await aio.copy(path, copy_path)
+
+            # 多个操作并发执行
+            digest1, digest2 = await asyncio.gather(aio.hash(path), aio.hash(copy_path))
+            print(f"原文件与副本哈希相同：{digest1 == digest2}")
+
+            os.makedirs(os.path.join(work_dir, 'sub', 'deep'), exist_ok=True)
+            await aio.write_text(os.path.join(work_dir, 'sub', 'deep', 'note.txt'), 'note')
+            print("扫描结果：")
+            async for entry in aio.scan(work_dir):
+                kind = '目录' if entry['is_dir'] else f"{entry['size']} 字节"
+                print(f"  {'  ' * entry['depth']}{entry['name']} ({kind})")
+
+            summary = aio.stats.summary()
+            print(f"共 {summary['operations']} 次操作，平均排队 {summary['avg_wait_ms']:.2f} 毫秒，"
+                  f"平均I/O {summary['avg_io_ms']:.2f} 毫秒")
+
+    asyncio.run(run())
+
+
+def demonstrate_cancellation(work_dir: str):
+    """演示超时取消和并发数限制"""
+    print("\n=== 取消与并发限制 ===")
+
+    big_file = os.path.join(work_dir, 'big.bin')
+    with open(big_file, 'wb') as f:
+        for _ in range(64):
+            f.write(os.urandom(1024 * 1024))
+
+    async def run():
+        async with AsyncFileIO(max_workers=2, max_concurrency=2) as aio:
+            # 超时取消：复制在下一个分块前停止，并删除不完整的目标文件
+            dst = os.path.join(work_dir, 'big_copy.bin')
+            try:
+                await asyncio.wait_for(aio.copy(big_file, dst), timeout=0.005)
+                print("复制在超时前完成")
+            except asyncio.TimeoutError:
+                await asyncio.sleep(0.1)  # 给工作线程时间处理取消
+                print(f"复制超时被取消，不完整的目标文件已删除：{not os.path.exists(dst)}")
+
+            # 并发限制：同时最多2个操作，其余在信号量上排队
+            start = time.perf_counter()
+            await asyncio.gather(*(aio.hash(big_file) for _ in range(4)))
+            elapsed = time.perf_counter() - start
+            summary = aio.stats.summary()
+            print(f"4 次哈希（并发上限2）：{elapsed:.3f} 秒，"
+                  f"最大排队 {summary['max_wait_ms']:.1f} 毫秒，最长I/O {summary['max_io_ms']:.1f} 毫秒")
+            print(f"已取消的操作数：{summary['cancelled']}")
+
+    asyncio.run(run())
+
+
+def demonstrate_benchmark(work_dir: str, file_count: int = 10000):
+    """创建大量小文件并进行并发读取测试"""
+    print("\n=== 并发读取性能测试 ===")
+
+    small_dir = os.path.join(work_dir, 'small_files')
+    os.makedirs(small_dir, exist_ok=True)
+    payload = b'x' * 1024
+    paths = []
+    for i in range(file_count):
+        path = os.path.join(small_dir, f'file_{i:05d}.dat')
+        with open(path, 'wb') as f:
+            f.write(payload)
+        paths.append(path)
+
+    asyncio.run(benchmark_concurrent_reads(paths, worker_counts=[4, 16, 64]))
+
+
+def main():
+    """主函数"""
+    print("Python文件操作 - 异步文件I/O")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        try:
+            demonstrate_basic_operations(work_dir)
+            demonstrate_cancellation(work_dir)
+            demonstrate_benchmark(work_dir)
+        except Exception as e:
+            print(f"\n演示过程中出现错误：{e}")
+            import traceback
+            traceback.print_exc()
+
+    # 学习总结
+    print("\n" + "=" * 50)
+    print("=== 学习总结 ===")
+    print("""
+异步文件I/O核心概念：
+1. 普通文件的open/read/write都是阻塞调用，会卡住整个事件循环
+2. 阻塞操作提交到线程池（executor.submit），协程用 asyncio.wrap_future 等待结果
+3. 线程池大小决定同时进行的系统调用数量
+4. 信号量限制同时排队的操作数，避免一次提交成千上万个任务
+
+取消和超时：
+- 尚未开始执行的操作被取消后直接丢弃
+- 已经开始的线程无法强行中断，需要分块执行并检查取消标志
+- 取消后要清理不完整的输出文件
+- 并发名额要等工作线程结束才归还，否则取消会让实际并发数超过上限
+
+性能观察：
+- 排队时间 >> I/O时间：线程数或并发上限不足
+- 事件循环延迟：衡量其他协程（如网络请求）受影响的程度
+- 小文件读取只需几微秒，逐个提交到线程池的调度开销比读取本身还大，
+  应该按批提交（read_many）
+- 线程数过多反而增加切换开销
+""")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@
 本文件演示Python数据序列化和处理的各种功能：
 1. JSON数据处理
 2. CSV文件读写
-3. Pickle对象序列化
+3. Pickle对象序列化（协议5带外缓冲区）
 4. XML数据处理
 5. 配置文件处理
 6. 实际应用示例
@@ -29,6 +29,10 @@ from pathlib import Path
 from datetime import datetime, date
 from decimal import Decimal
 import io
+import array
+import operator
+import struct
+import time
 
 def json_operations_demo():
     """JSON操作演示"""
@@ -99,6 +103,10 @@ def json_operations_demo():
     
     print(f"\n从文件加载的数据: {loaded_data['name']}")
     
+    # 紧凑格式：去掉缩进和分隔符后的空格，适合传输和存储
+    compact_json = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    print(f"紧凑JSON长度: {len(compact_json)} 字符（缩进格式 {len(json_string)} 字符）")
+    
     # 清理临时文件
     Path(json_file_path).unlink()
     
@@ -230,6 +238,290 @@ class Student:
     def __repr__(self):
         return self.__str__()
 
+# 序列化层：按数据形状自动选择编解码方式（prefer='portable'，默认）
+# - 含大块二进制数据：pickle协议5，二进制缓冲区以 PickleBuffer 带外传输，不复制进pickle流
+# - 扁平的记录列表（字段相同、值为标量）：CSV，表头记录每列类型，解码时还原
+# - 其他JSON兼容数据：紧凑分隔符的JSON
+# - 其余Python对象：pickle协议5（带外缓冲区）
+# prefer='speed' 总是使用pickle（只能在Python之间使用）：记录列表用普通的协议5（'pickle'），
+#   省去查找二进制数据的遍历；其他数据用带外缓冲区的 'pickle5'；
+# prefer='size' 扁平记录用CSV，其余同 'speed'
+
+LARGE_BUFFER_SIZE = 64 * 1024
+BUFFER_TYPES = (bytes, bytearray, memoryview, array.array)
+CSV_TYPES = {int: 'int', float: 'float', str: 'str', bool: 'bool'}
+CSV_CONVERTERS = {'int': int, 'float': float, 'str': str, 'bool': lambda value: value == 'True'}
+
+class SerializedPayload:
+    """序列化结果：编解码方式、主体数据和（pickle协议5的）带外缓冲区"""
+    
+    def __init__(self, codec, data, buffers=()):
+        self.codec = codec
+        self.data = data
+        self.buffers = list(buffers)
+    
+    @property
+    def size(self):
+        return len(self.data) + sum(memoryview(buf).nbytes for buf in self.buffers)
+
+def _is_large_buffer(value):
+    return (isinstance(value, BUFFER_TYPES) and
+            memoryview(value).nbytes >= LARGE_BUFFER_SIZE)
+
+SCALAR_TYPES = {str, int, float, bool, type(None)}
+
+class _OutOfBand:
+    """
+    标记需要带外传输的大块二进制数据
+    
+    pickle 对 bytes 走内部快速路径，不会调用 reducer_override，
+    所以由 _expose_buffers 先包一层，交给 _BufferPickler 按原类型归约
+    """
+    __slots__ = ('value',)
+    
+    def __init__(self, value):
+        self.value = value
+
+def _expose_buffers(obj, memo=None):
+    """
+    递归把各层容器（dict/list/tuple）中的大块 bytes、bytearray、array 包成 _OutOfBand
+    
+    没有需要替换的内容时原样返回，不复制容器；memo 记录已处理的容器，支持循环引用。
+    memoryview 不需要包装，_BufferPickler 直接处理
+    """
+    kind = type(obj)
+    if kind in SCALAR_TYPES:
+        return obj
+    if kind in (bytes, bytearray, array.array):
+        return _OutOfBand(obj) if _is_large_buffer(obj) else obj
+    if kind is not dict and kind is not list and kind is not tuple:
+        return obj
+    # 只含标量的容器（最常见的记录）在C层面一次判断完，不逐项递归
+    if SCALAR_TYPES.issuperset(map(type, obj.values() if kind is dict else obj)):
+        return obj
+    
+    if memo is None:
+        memo = {}
+    if id(obj) in memo:
+        return memo[id(obj)]
+    memo[id(obj)] = obj
+    
+    replaced = None
+    items = obj.items() if kind is dict else enumerate(obj)
+    for key, value in items:
+        if type(value) in SCALAR_TYPES:
+            continue
+        new_value = _expose_buffers(value, memo)
+        if new_value is not value:
+            if replaced is None:
+                replaced = dict(obj) if kind is dict else list(obj)
+            replaced[key] = new_value
+    
+    if replaced is not None:
+        obj = tuple(replaced) if kind is tuple else replaced
+        memo[id(obj)] = obj
+    return obj
+
+def _rebuild_bytearray(buf):
+    """带外缓冲区本身就是 bytearray 时（load_serialized 读出的缓冲区）直接使用，不复制"""
+    with memoryview(buf) as view:
+        if type(view.obj) is bytearray and view.nbytes == len(view.obj):
+            return view.obj
+        return bytearray(view)
+
+def _rebuild_array(typecode, buf):
+    result = array.array(typecode)
+    result.frombytes(buf)
+    return result
+
+class _BufferPickler(pickle.Pickler):
+    """
+    大块二进制数据以 PickleBuffer 带外传输，还原时保持原类型
+    
+    bytes 还原成 bytes，bytearray 还原成 bytearray，array 还原成同类型码的 array；
+    需要零拷贝时传入 memoryview，还原结果是指向带外缓冲区的 memoryview
+    """
+    
+    def reducer_override(self, obj):
+        kind = type(obj)
+        if kind is _OutOfBand:
+            obj = obj.value
+            kind = type(obj)
+        elif kind is not memoryview or not _is_large_buffer(obj):
+            return NotImplemented
+        if kind is bytes:
+            return bytes, (pickle.PickleBuffer(obj),)
+        if kind is bytearray:
+            return _rebuild_bytearray, (pickle.PickleBuffer(obj),)
+        if kind is array.array:
+            return _rebuild_array, (obj.typecode, pickle.PickleBuffer(obj))
+        return memoryview, (pickle.PickleBuffer(obj),)
+
+def _flat_row_columns(obj):
+    """扁平记录列表返回 [(字段名, 类型名)]，否则返回None"""
+    if not isinstance(obj, list) or not obj or type(obj[0]) is not dict or not obj[0]:
+        return None
+    keys = list(obj[0])
+    if not all(type(row) is dict and len(row) == len(keys) for row in obj):
+        return None
+    try:
+        columns = []
+        for key in keys:
+            types = set(map(type, map(operator.itemgetter(key), obj)))
+            if len(types) != 1 or not isinstance(key, str):
+                return None
+            type_name = CSV_TYPES.get(types.pop())
+            if type_name is None:
+                return None
+            columns.append((key, type_name))
+    except KeyError:
+        return None
+    return columns
+
+def _preferred_codec(obj, prefer):
+    if prefer not in ('portable', 'speed', 'size'):
+        raise ValueError(f"未知的选择策略: {prefer}")
+    if prefer == 'size' and _flat_row_columns(obj) is not None:
+        return 'csv'
+    if prefer != 'portable':
+        return 'pickle' if _looks_like_records(obj) else 'pickle5'
+    if _flat_row_columns(obj) is not None:
+        return 'csv'
+    return 'json'
+
+def _looks_like_records(obj):
+    """元素是字典/列表的列表视为记录列表：通常不含大块二进制数据"""
+    return isinstance(obj, list) and bool(obj) and type(obj[0]) in (dict, list, tuple)
+
+def choose_codec(obj, prefer='portable'):
+    """
+    根据数据形状选择编解码方式
+    
+    含二进制数据的对象无法编码成JSON，因此在 portable 策略下也会落到 pickle5
+    """
+    codec = _preferred_codec(obj, prefer)
+    if codec == 'json':
+        try:
+            json.dumps(obj, separators=(',', ':'))
+        except (TypeError, ValueError):
+            return 'pickle5'
+    return codec
+
+def _encode_json(obj):
+    return SerializedPayload('json', json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+def _decode_json(payload):
+    return json.loads(payload.data)
+
+def _encode_csv(obj):
+    columns = _flat_row_columns(obj)
+    if columns is None:
+        raise ValueError("CSV只能序列化字段相同、值为标量的记录列表")
+    keys = [key for key, _ in columns]
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow([f"{key}:{type_name}" for key, type_name in columns])
+    writer.writerows(map(operator.itemgetter(*keys), obj) if len(keys) > 1 else ([row[keys[0]]] for row in obj))
+    return SerializedPayload('csv', output.getvalue().encode('utf-8'))
+
+def _decode_csv(payload):
+    reader = csv.reader(io.StringIO(payload.data.decode('utf-8')))
+    header = next(reader)
+    keys, converters = [], []
+    for field in header:
+        key, _, type_name = field.rpartition(':')
+        keys.append(key)
+        converters.append(CSV_CONVERTERS[type_name])
+    if all(conv is str for conv in converters):
+        return [dict(zip(keys, row)) for row in reader]
+    return [dict(zip(keys, [conv(value) for conv, value in zip(converters, row)])) for row in reader]
+
+def _encode_pickle5(obj):
+    buffers = []
+    output = io.BytesIO()
+    _BufferPickler(output, protocol=5, buffer_callback=buffers.append).dump(_expose_buffers(obj))
+    # raw() 得到一维字节视图，不复制数据
+    return SerializedPayload('pickle5', output.getvalue(), [buf.raw() for buf in buffers])
+
+def _decode_pickle5(payload):
+    # 带外缓冲区按原样交给pickle；memoryview 和 bytearray 直接引用这些缓冲区，bytes 和 array 各复制一次
+    return pickle.loads(payload.data, buffers=payload.buffers)
+
+def _encode_pickle(obj):
+    return SerializedPayload('pickle', pickle.dumps(obj, protocol=5))
+
+def _decode_pickle(payload):
+    return pickle.loads(payload.data)
+
+CODECS = {
+    'json': (_encode_json, _decode_json),
+    'csv': (_encode_csv, _decode_csv),
+    'pickle': (_encode_pickle, _decode_pickle),
+    'pickle5': (_encode_pickle5, _decode_pickle5),
+}
+
+def serialize(obj, codec=None, prefer='portable'):
+    """序列化对象；codec 为 None 时按 prefer 策略自动选择"""
+    if codec is None:
+        codec = _preferred_codec(obj, prefer)
+        if codec == 'json':
+            # 直接尝试JSON编码，不兼容时退回pickle，避免先试编码一遍
+            try:
+                return _encode_json(obj)
+            except (TypeError, ValueError):
+                codec = 'pickle5'
+    return CODECS[codec][0](obj)
+
+def deserialize(payload):
+    """反序列化 SerializedPayload"""
+    return CODECS[payload.codec][1](payload)
+
+def save_serialized(path, payload):
+    """
+    写入文件：魔数、编解码名、缓冲区长度表，然后是主体和各个缓冲区
+    
+    缓冲区用 writelines 直接写出，不先拼接成一个大字节串
+    """
+    codec = payload.codec.encode('ascii')
+    lengths = [len(payload.data)] + [memoryview(buf).nbytes for buf in payload.buffers]
+    header = struct.pack(f'<4sB{len(codec)}sI{len(lengths)}Q', b'SER1', len(codec), codec,
+                         len(lengths), *lengths)
+    with open(path, 'wb') as f:
+        f.writelines([header, payload.data, *payload.buffers])
+
+def _read_exact(f, size, path):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError(f"序列化文件被截断: {path}")
+    return data
+
+def load_serialized(path):
+    """
+    读取 save_serialized 写入的文件，缓冲区用 readinto 直接读入预分配的 bytearray
+    
+    每次读取都检查长度，文件被截断时抛出 ValueError
+    """
+    with open(path, 'rb') as f:
+        magic, codec_len = struct.unpack('<4sB', _read_exact(f, 5, path))
+        if magic != b'SER1':
+            raise ValueError(f"不是序列化文件: {path}")
+        codec = _read_exact(f, codec_len, path).decode('ascii')
+        count, = struct.unpack('<I', _read_exact(f, 4, path))
+        lengths = struct.unpack(f'<{count}Q', _read_exact(f, 8 * count, path))
+        parts = []
+        for length in lengths:
+            buf = bytearray(length)
+            view = memoryview(buf)
+            filled = 0
+            while filled < length:
+                n = f.readinto(view[filled:])
+                if not n:
+                    raise ValueError(f"序列化文件被截断: {path}")
+                filled += n
+            view.release()
+            parts.append(buf)
+    return SerializedPayload(codec, parts[0], parts[1:])
+
 def pickle_operations_demo():
     """Pickle序列化演示"""
     print("=" * 50)
@@ -294,6 +586,19 @@ def pickle_operations_demo():
         data_bytes = pickle.dumps(complex_data, protocol=protocol)
         print(f"  协议 {protocol}: {len(data_bytes)} 字节")
     
+    # 协议5的带外缓冲区：大块二进制数据不复制进pickle流
+    print("\n协议5带外缓冲区:")
+    image_data = {"name": "image.raw", "pixels": bytearray(4 * 1024 * 1024)}
+    in_band = pickle.dumps(image_data, protocol=5)
+    buffers = []
+    out_of_band = pickle.dumps({"name": image_data["name"], "pixels": pickle.PickleBuffer(image_data["pixels"])},
+                               protocol=5, buffer_callback=buffers.append)
+    print(f"  普通序列化: {len(in_band):,} 字节")
+    print(f"  带外序列化: pickle流 {len(out_of_band)} 字节 + {len(buffers)} 个缓冲区 "
+          f"({buffers[0].raw().nbytes:,} 字节，未复制)")
+    restored = pickle.loads(out_of_band, buffers=buffers)
+    print(f"  还原后像素数据与原对象共享内存: {memoryview(restored['pixels']).obj is image_data['pixels']}")
+    
     # 安全性注意事项
     print("\n安全性演示:")
     safe_data = {"message": "这是安全的数据", "numbers": [1, 2, 3, 4, 5]}
@@ -553,6 +858,64 @@ def data_conversion_demo():
     
     print()
 
+def serialization_benchmark_demo():
+    """序列化性能矩阵：不同数据形状、规模和编解码方式的编码/解码时间与大小"""
+    print("=" * 50)
+    print("序列化性能对比")
+    print("=" * 50)
+    
+    def flat_rows(n):
+        return [{'id': i, 'name': f'用户{i}', 'score': i * 0.5, 'active': i % 2 == 0} for i in range(n)]
+    
+    def nested(n):
+        return [{'id': i, 'tags': ['a', 'b', str(i)], 'profile': {'age': 20 + i % 30, 'city': '北京'}}
+                for i in range(n)]
+    
+    def binary(n):
+        return {'name': 'frames', 'count': n, 'frames': [bytearray(64 * 1024) for _ in range(n)]}
+    
+    codecs_to_test = {
+        'json(indent)': (lambda obj: json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8'),
+                         json.loads),
+        'json(compact)': (lambda obj: serialize(obj, 'json'), deserialize),
+        'csv': (lambda obj: serialize(obj, 'csv'), deserialize),
+        'pickle(默认)': (pickle.dumps, pickle.loads),
+        'pickle(协议5)': (lambda obj: serialize(obj, 'pickle'), deserialize),
+        'pickle5(带外)': (lambda obj: serialize(obj, 'pickle5'), deserialize),
+    }
+    
+    def measure(func, arg, repeat=3):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func(arg)
+            best = min(best, time.perf_counter() - start)
+        return best, result
+    
+    shapes = [
+        ('扁平记录', flat_rows, [1_000, 100_000]),
+        ('嵌套结构', nested, [1_000, 100_000]),
+        ('二进制块', binary, [4, 256]),
+    ]
+    
+    print(f"{'规模':>8}{'编码(ms)':>10}{'解码(ms)':>10}{'大小(KB)':>11}  编解码")
+    for shape_name, make, sizes in shapes:
+        for n in sizes:
+            obj = make(n)
+            chosen = ', '.join(f"{prefer}={choose_codec(obj, prefer)}" for prefer in ('portable', 'speed', 'size'))
+            print(f"\n{shape_name} x {n:,}（自动选择: {chosen}）")
+            for name, (encode, decode) in codecs_to_test.items():
+                try:
+                    encode_time, encoded = measure(encode, obj)
+                except (TypeError, ValueError):
+                    continue  # 该编解码方式不支持这种数据
+                decode_time, _ = measure(decode, encoded)
+                size = encoded.size if isinstance(encoded, SerializedPayload) else len(encoded)
+                print(f"{n:>10,}{encode_time * 1000:>10.2f}{decode_time * 1000:>10.2f}"
+                      f"{size / 1024:>11.1f}  {name}")
+    
+    print()
+
 def practical_applications():
     """实际应用示例"""
     print("=" * 50)
@@ -586,6 +949,21 @@ def practical_applications():
         backup_pickle = pickle.dumps(app_data)
         print(f"  Pickle备份大小: {len(backup_pickle)} 字节")
         
+        # 使用序列化层：自动选择编解码方式并写入文件
+        with tempfile.TemporaryDirectory() as tmp:
+            backups = {
+                'app_data': app_data,
+                'users': app_data['users'],
+                'attachments': {'name': 'logs.tar', 'content': bytes(1024 * 1024)},
+            }
+            for name, obj in backups.items():
+                path = Path(tmp) / f"{name}.bin"
+                save_serialized(path, serialize(obj))
+                payload = load_serialized(path)
+                restored = deserialize(payload)
+                print(f"  {name}: 使用 {payload.codec}，{path.stat().st_size:,} 字节，"
+                      f"恢复{'成功' if restored == obj else '失败'}")
+        
         # 恢复数据
         restored_data = json.loads(backup_json)
         print(f"  恢复用户数: {len(restored_data['users'])}")
@@ -661,6 +1039,7 @@ def main():
     xml_operations_demo()
     config_file_demo()
     data_conversion_demo()
+    serialization_benchmark_demo()
     practical_applications()
     
     print("=" * 50)
@@ -674,6 +1053,7 @@ def main():
     print("6. 不同格式有各自的优缺点和适用场景")
     print("7. 数据转换时要注意类型和编码问题")
     print("8. 实际应用中常需要多种格式互相转换")
+    print("9. 按数据形状选择格式：扁平记录用CSV，大块二进制用pickle协议5带外传输")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
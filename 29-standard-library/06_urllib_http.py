@@ -8,7 +8,7 @@
 2. HTTP请求处理
 3. URL解析和构建
 4. 网络异常处理
-5. 简单的HTTP服务器
+5. 简单的HTTP服务器（多线程、HTTP/1.1长连接、响应缓存）
 6. 实际应用示例
 
 学习目标：
@@ -24,11 +24,16 @@ import urllib.parse
 import urllib.error
 from urllib.parse import urlparse, urljoin, parse_qs, urlencode
 import json
+import gzip
+import hashlib
+import math
 import socket
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import http.client
+from http.server import HTTPServer, ThreadingHTTPServer, BaseHTTPRequestHandler
 import threading
 import time
 from datetime import datetime
+from collections import namedtuple
 import ssl
 import base64
 
@@ -363,17 +368,76 @@ def error_handling_demo():
     
     print()
 
-class SimpleHTTPHandler(BaseHTTPRequestHandler):
-    """简单的HTTP请求处理器"""
+CachedResponse = namedtuple('CachedResponse', 'body gzip_body etag expires')
+
+class ResponseCache:
+    """
+    按路由缓存的响应：正文、gzip压缩后的正文和ETag
     
-    def do_GET(self):
-        """处理GET请求"""
-        if self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/html; charset=utf-8')
-            self.end_headers()
+    条目在TTL内直接复用，过期后由第一个请求重新生成；
+    条目数超过 max_entries 时先清理过期条目，仍然超出则淘汰最早的条目。
+    命中计数使用单独的锁，不会被其他线程生成正文时阻塞
+    """
+    
+    GZIP_MIN_SIZE = 1024
+    
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _count_hit(self):
+        with self._stats_lock:
+            self.hits += 1
+    
+    def get(self, key, ttl, build):
+        """返回未过期的缓存条目，否则调用 build() 生成正文并缓存"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires > now:
+            self._count_hit()
+            return entry
+        
+        with self._lock:
+            # 其他线程可能刚刚生成过
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires > now:
+                self._count_hit()
+                return entry
+            
+            body = build()
+            gzip_body = gzip.compress(body, compresslevel=6) if len(body) >= self.GZIP_MIN_SIZE else None
+            etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+            entry = CachedResponse(body, gzip_body, etag, now + ttl)
             
-            html = '''
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            if len(self._entries) > self.max_entries:
+                for stale in [k for k, e in self._entries.items() if e.expires <= now]:
+                    del self._entries[stale]
+                while len(self._entries) > self.max_entries:
+                    del self._entries[next(iter(self._entries))]
+            with self._stats_lock:
+                self.misses += 1
+            return entry
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class SimpleHTTPHandler(BaseHTTPRequestHandler):
+    """
+    简单的HTTP请求处理器
+    
+    静态路由（STATIC_ROUTES 和 404 页面）的完整响应——状态行、头部和正文——
+    第一次请求时生成并缓存，之后每次只需一次 write；动态路由统一带 Content-Length，
+    因此同一个处理器也能用于HTTP/1.1长连接（见 KeepAliveHTTPHandler）
+    """
+    
+    INDEX_TEMPLATE = '''
             <!DOCTYPE html>
             <html>
             <head>
@@ -388,46 +452,214 @@ class SimpleHTTPHandler(BaseHTTPRequestHandler):
                 <ul>
                     <li><a href="/api/time">获取时间API</a></li>
                     <li><a href="/api/info">服务器信息API</a></li>
+                    <li><a href="/about">关于本服务器</a></li>
                 </ul>
             </body>
             </html>
-            '''.format(datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 
-                      self.path, self.client_address[0])
-            
-            self.wfile.write(html.encode('utf-8'))
+            '''
+    
+    STATIC_ROUTES = {
+        '/about': ('text/html; charset=utf-8', '''<!DOCTYPE html>
+<html>
+<head><title>关于</title><meta charset="utf-8"></head>
+<body>
+    <h1>Python HTTP服务器</h1>
+    <p>基于 http.server 的演示服务器，支持多线程和HTTP/1.1长连接。</p>
+</body>
+</html>
+'''),
+        '/health': ('text/plain; charset=utf-8', 'OK'),
+    }
+    
+    # (协议版本, 路径) -> (状态行, 其余头部和正文)；所有404共用路径None，缓存大小有上限
+    _static_responses = {}
+    
+    # 未知路径的POST正文超过这个大小时不再读取，直接关闭连接
+    MAX_DISCARD_BODY = 1024 * 1024
+    
+    # 动态API路由的缓存时间（秒）；服务器 cache_enabled=False 时每次重新生成
+    CACHE_TTL = {
+        '/api/time': 1,
+        '/api/info': 60,
+        '/api/items': 30,
+    }
+    response_cache = ResponseCache()
+    
+    @classmethod
+    def build_static_response(cls, status, content_type, body):
+        """
+        预先生成响应：返回 (状态行, 其余头部和正文)
+        
+        Date 头部每次发送时插在两者之间，其他部分不再重复生成
+        """
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        status_line = f"{cls.protocol_version} {status} {cls.responses[status][0]}\r\n"
+        rest = (f"Server: {cls.server_version} {cls.sys_version}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        return status_line.encode('latin-1'), rest.encode('latin-1') + body
+    
+    def send_static(self, path):
+        """发送预先生成的静态响应；不在 STATIC_ROUTES 中的路径一律返回404"""
+        if path not in self.STATIC_ROUTES:
+            path = None
+        key = (self.protocol_version, path)
+        response = self._static_responses.get(key)
+        if response is None:
+            if path is not None:
+                status, (content_type, body) = 200, self.STATIC_ROUTES[path]
+            else:
+                status, content_type, body = 404, 'text/plain', b'404 Not Found'
+            response = self._static_responses[key] = self.build_static_response(status, content_type, body)
+        self.log_request(200 if path is not None else 404)
+        status_line, rest = response
+        self.wfile.write(b''.join((status_line, f"Date: {self.date_time_string()}\r\n".encode('latin-1'), rest)))
+    
+    def send_not_found(self):
+        self.send_static(None)
+    
+    def discard_body(self):
+        """
+        读掉未处理的请求正文，否则长连接上它会被当成下一个请求解析；
+        正文过大或无法确定长度时改为响应后关闭连接
+        """
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            self.close_connection = True
+            return
+        try:
+            remaining = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            self.close_connection = True
+            return
+        if remaining > self.MAX_DISCARD_BODY:
+            self.close_connection = True
+            return
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 65536))
+            if not chunk:
+                self.close_connection = True
+                return
+            remaining -= len(chunk)
+    
+    def send_body(self, status, content_type, body):
+        """发送动态响应，总是带 Content-Length 以便保持连接"""
+        self.send_response(status)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def accepts_gzip(self):
+        """按 Accept-Encoding 的 q 值判断客户端是否接受gzip（q=0 表示明确拒绝）"""
+        wildcard = None
+        for coding in self.headers.get('Accept-Encoding', '').split(','):
+            name, *params = [part.strip() for part in coding.split(';')]
+            quality = 1.0
+            for param in params:
+                key, _, value = param.partition('=')
+                if key.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            name = name.lower()
+            if name in ('gzip', 'x-gzip'):
+                return quality > 0
+            if name == '*':
+                wildcard = quality > 0
+        return bool(wildcard)
+    
+    def send_cached(self, route, content_type, build, vary=()):
+        """
+        发送可缓存的响应
+        
+        - ETag 与 If-None-Match 匹配时返回 304，不发送正文
+        - 客户端接受gzip且正文较大时发送预先压缩好的版本
+        - vary 中的值参与缓存键（按客户端区分的响应标记为 private）
+        """
+        if not getattr(self.server, 'cache_enabled', True):
+            self.send_body(200, content_type, build())
+            return
+        
+        ttl = self.CACHE_TTL[route]
+        entry = self.response_cache.get((route, *vary), ttl, build)
+        use_gzip = entry.gzip_body is not None and self.accepts_gzip()
+        # 压缩版本是不同的表示，使用不同的ETag
+        etag = entry.etag[:-1] + '-gzip"' if use_gzip else entry.etag
+        cache_control = f"{'private, ' if vary else ''}max-age={ttl}"
+        
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            if etag in tags or '*' in tags:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', cache_control)
+                if entry.gzip_body is not None:
+                    # 304 要带上与200响应相同的 Vary，否则缓存可能把压缩版本交给不支持gzip的客户端
+                    self.send_header('Vary', 'Accept-Encoding')
+                self.end_headers()
+                return
+        
+        body = entry.gzip_body if use_gzip else entry.body
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', cache_control)
+        if entry.gzip_body is not None:
+            self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def build_time_json(self):
+        data = {
+            'timestamp': datetime.now().isoformat(),
+            'timezone': 'Asia/Shanghai',
+            'format': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+    
+    def build_info_json(self):
+        data = {
+            'server': 'Python HTTP Server',
+            'version': '1.0',
+            'client_ip': self.client_address[0],
+            'user_agent': self.headers.get('User-Agent', 'Unknown')
+        }
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+    
+    def build_items_json(self):
+        """较大的JSON响应（约27KB），用于演示gzip压缩"""
+        items = [
+            {'id': i, 'name': f'商品{i}', 'category': ['图书', '电子', '服装', '食品'][i % 4],
+             'price': round(9.9 + i * 1.5, 2), 'in_stock': i % 3 != 0}
+            for i in range(300)
+        ]
+        return json.dumps({'count': len(items), 'items': items}, ensure_ascii=False).encode('utf-8')
+    
+    def do_GET(self):
+        """处理GET请求"""
+        if self.path == '/':
+            html = self.INDEX_TEMPLATE.format(datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                                              self.path, self.client_address[0])
+            self.send_body(200, 'text/html; charset=utf-8', html.encode('utf-8'))
             
         elif self.path == '/api/time':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            data = {
-                'timestamp': datetime.now().isoformat(),
-                'timezone': 'Asia/Shanghai',
-                'format': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+            self.send_cached('/api/time', 'application/json', self.build_time_json)
             
         elif self.path == '/api/info':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
+            vary = (self.client_address[0], self.headers.get('User-Agent', 'Unknown'))
+            self.send_cached('/api/info', 'application/json', self.build_info_json, vary)
             
-            data = {
-                'server': 'Python HTTP Server',
-                'version': '1.0',
-                'client_ip': self.client_address[0],
-                'user_agent': self.headers.get('User-Agent', 'Unknown')
-            }
-            
-            self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        elif self.path == '/api/items':
+            self.send_cached('/api/items', 'application/json', self.build_items_json)
             
         else:
-            self.send_response(404)
-            self.send_header('Content-type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b'404 Not Found')
+            self.send_static(self.path)
     
     def do_POST(self):
         """处理POST请求"""
@@ -435,10 +667,6 @@ class SimpleHTTPHandler(BaseHTTPRequestHandler):
             content_length = int(self.headers.get('Content-Length', 0))
             post_data = self.rfile.read(content_length)
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
             try:
                 # 尝试解析JSON数据
                 json_data = json.loads(post_data.decode('utf-8'))
@@ -455,17 +683,117 @@ class SimpleHTTPHandler(BaseHTTPRequestHandler):
                     'content_type': self.headers.get('Content-Type', 'unknown')
                 }
             
-            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8'))
+            self.send_body(200, 'application/json', json.dumps(response, ensure_ascii=False).encode('utf-8'))
         else:
-            self.send_response(404)
-            self.send_header('Content-type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b'404 Not Found')
+            self.discard_body()
+            self.send_not_found()
     
     def log_message(self, format, *args):
-        """自定义日志格式"""
+        """自定义日志格式（服务器设置 quiet=True 时不输出）"""
+        if getattr(self.server, 'quiet', False):
+            return
         print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {format % args}")
 
+class KeepAliveHTTPHandler(SimpleHTTPHandler):
+    """HTTP/1.1长连接处理器：一个连接上可以连续处理多个请求"""
+    
+    protocol_version = 'HTTP/1.1'
+    # 关闭Nagle算法，避免长连接上小响应被延迟确认拖慢
+    disable_nagle_algorithm = True
+
+def create_server(port=8000, threaded=True, keep_alive=True, quiet=False, host='localhost',
+                  cache_enabled=True):
+    """
+    创建HTTP服务器
+    
+    threaded=True 使用 ThreadingHTTPServer（每个连接一个线程），
+    keep_alive=True 使用HTTP/1.1长连接；两者都为False时就是最初的单线程HTTP/1.0服务器；
+    cache_enabled=False 时API路由不使用响应缓存，也不发送ETag
+    """
+    server_class = ThreadingHTTPServer if threaded else HTTPServer
+    handler_class = KeepAliveHTTPHandler if keep_alive else SimpleHTTPHandler
+    server = server_class((host, port), handler_class)
+    server.quiet = quiet
+    server.cache_enabled = cache_enabled
+    return server
+
+def run_load_test(port, path='/', connections=8, requests_per_connection=200,
+                  keep_alive=True, host='localhost', headers=None, revalidate=False):
+    """
+    简单的负载生成器：多个线程并发请求，返回吞吐量、延迟分位数和接收的正文字节数
+    
+    keep_alive=True 时每个线程复用一个连接，否则每个请求新建连接；
+    revalidate=True 时客户端记住ETag并发送 If-None-Match（条件请求）
+    """
+    latencies = []
+    errors = []
+    totals = {'bytes': 0, 'not_modified': 0}
+    lock = threading.Lock()
+    
+    def worker():
+        local = []
+        received = not_modified = 0
+        etag = None
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        try:
+            for _ in range(requests_per_connection):
+                request_headers = dict(headers or {})
+                if revalidate and etag:
+                    request_headers['If-None-Match'] = etag
+                start = time.perf_counter()
+                try:
+                    if keep_alive:
+                        conn.request('GET', path, headers=request_headers)
+                    else:
+                        conn = http.client.HTTPConnection(host, port, timeout=30)
+                        request_headers['Connection'] = 'close'
+                        conn.request('GET', path, headers=request_headers)
+                    response = conn.getresponse()
+                    received += len(response.read())
+                    if response.status == 304:
+                        not_modified += 1
+                    etag = response.getheader('ETag', etag)
+                    if not keep_alive:
+                        conn.close()
+                except (OSError, http.client.HTTPException) as e:
+                    conn.close()
+                    with lock:
+                        errors.append(e)
+                    continue
+                local.append(time.perf_counter() - start)
+        finally:
+            conn.close()
+        with lock:
+            latencies.extend(local)
+            totals['bytes'] += received
+            totals['not_modified'] += not_modified
+    
+    threads = [threading.Thread(target=worker) for _ in range(connections)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[max(0, math.ceil(p / 100 * len(latencies)) - 1)]
+    
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(50) * 1000,
+        'p99_ms': percentile(99) * 1000,
+        'bytes': totals['bytes'],
+        'not_modified': totals['not_modified']
+    }
+
 def http_server_demo():
     """HTTP服务器演示"""
     print("=" * 50)
@@ -478,7 +806,7 @@ def http_server_demo():
     def start_server():
         """启动服务器的函数"""
         try:
-            server = HTTPServer(('localhost', server_port), SimpleHTTPHandler)
+            server = create_server(server_port)
             print(f"HTTP服务器启动在 http://localhost:{server_port}")
             server.serve_forever()
         except Exception as e:
@@ -540,6 +868,76 @@ def http_server_demo():
     
     print()
 
+def http_benchmark_demo():
+    """HTTP服务器模式性能对比（全部在本机完成）"""
+    print("=" * 50)
+    print("HTTP服务器性能对比")
+    print("=" * 50)
+    
+    modes = [
+        ('单线程 HTTP/1.0', False, False),
+        ('多线程 HTTP/1.0', True, False),
+        ('多线程 HTTP/1.1长连接', True, True),
+    ]
+    paths = ['/', '/about']
+    
+    print(f"{'路径':<8}{'请求/秒':>8}{'p50(ms)':>10}{'p99(ms)':>10}{'错误':>5}  模式")
+    for label, threaded, keep_alive in modes:
+        server = create_server(0, threaded=threaded, keep_alive=keep_alive, quiet=True)
+        port = server.server_address[1]
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            for path in paths:
+                result = run_load_test(port, path, connections=8, requests_per_connection=250,
+                                       keep_alive=keep_alive)
+                print(f"{path:<10}{result['rps']:>9.0f}{result['p50_ms']:>10.2f}"
+                      f"{result['p99_ms']:>10.2f}{result['errors']:>6}  {label}")
+        finally:
+            server.shutdown()
+            server.server_close()
+    
+    print()
+
+def response_cache_demo():
+    """响应缓存、条件请求和gzip的效果（重复请求同一资源）"""
+    print("=" * 50)
+    print("响应缓存与条件请求演示")
+    print("=" * 50)
+    
+    scenarios = [
+        ('无缓存', False, {}, False),
+        ('缓存', True, {}, False),
+        ('缓存+gzip', True, {'Accept-Encoding': 'gzip'}, False),
+        ('缓存+gzip+ETag', True, {'Accept-Encoding': 'gzip'}, True),
+    ]
+    
+    for path in ['/api/items', '/api/time']:
+        print(f"\n{path}:")
+        print(f"{'请求/秒':>8}{'p99(ms)':>10}{'字节/请求':>10}{'304':>6}  场景")
+        baseline_rps = None
+        for label, cache_enabled, headers, revalidate in scenarios:
+            SimpleHTTPHandler.response_cache.clear()
+            server = create_server(0, quiet=True, cache_enabled=cache_enabled)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                result = run_load_test(server.server_address[1], path, connections=4,
+                                       requests_per_connection=500, headers=headers,
+                                       revalidate=revalidate)
+            finally:
+                server.shutdown()
+                server.server_close()
+            
+            per_request = result['bytes'] / max(result['requests'], 1)
+            baseline_rps = baseline_rps or result['rps']
+            print(f"{result['rps']:>10.0f}{result['p99_ms']:>10.2f}{per_request:>12.0f}"
+                  f"{result['not_modified']:>7}  {label} ({result['rps'] / baseline_rps:.1f}x)")
+    
+    cache = SimpleHTTPHandler.response_cache
+    print(f"\n缓存命中 {cache.hits} 次，重新生成 {cache.misses} 次")
+    print()
+
 def practical_applications():
     """实际应用示例"""
     print("=" * 50)
@@ -659,6 +1057,8 @@ def main():
     http_headers_demo()
     error_handling_demo()
     http_server_demo()
+    http_benchmark_demo()
+    response_cache_demo()
     practical_applications()
     
     print("=" * 50)
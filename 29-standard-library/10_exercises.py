@@ -7,11 +7,12 @@ Python标准库综合练习
 - 文件系统操作 (os, sys, pathlib, shutil)
 - 时间处理 (datetime)
 - 随机数生成 (random)
-- 数据处理 (json, csv, pickle)
-- 网络编程 (urllib)
+- 数据处理 (json, csv, pickle, sqlite3)
+- 网络编程 (urllib, asyncio, http.server, html.parser)
 - 正则表达式 (re)
 - 数学运算 (math, statistics)
 - 集合数据结构 (collections, heapq, bisect, array, queue, enum)
+- 并发 (threading, concurrent.futures)
 
 练习目标：
 1. 综合运用多个标准库模块
@@ -29,12 +30,27 @@ import re
 import math
 import statistics
 import random
+import time
+import threading
+import hashlib
+import tempfile
+import posixpath
+import sqlite3
+import codecs
+import email.message
+import html.parser
+import asyncio
+import ssl
+import http.server
 import urllib.request
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from collections import Counter, defaultdict, OrderedDict, deque, namedtuple
 import heapq
+import itertools
+import operator
 import bisect
 import array
 from enum import Enum, IntEnum
@@ -283,10 +299,71 @@ def exercise_2_file_organizer():
     print("练习2: 智能文件整理器")
     print("=" * 60)
     
+    class FileIndex:
+        """
+        持久化的扫描索引（SQLite），以路径为键保存 (大小, 修改时间)
+        
+        重新扫描时只需比较 (size, mtime_ns)，未变化的文件不再处理；
+        size 和 mtime 上建有索引，大文件/旧文件的查询不必遍历全部记录
+        """
+        
+        def __init__(self, db_path, root):
+            self.db_path = str(db_path)
+            self.conn = sqlite3.connect(self.db_path)
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    extension TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    ctime REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS files_size ON files(size);
+                CREATE INDEX IF NOT EXISTS files_mtime ON files(mtime_ns);
+            """)
+            
+            # 索引属于另一个目录时清空重建
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+            if row is None or row[0] != str(root):
+                with self.conn:
+                    self.conn.execute("DELETE FROM files")
+                    self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('root', ?)", (str(root),))
+        
+        def load(self):
+            """返回 {路径: (扩展名, 大小, mtime_ns)}"""
+            return {path: (ext, size, mtime_ns) for path, ext, size, mtime_ns in
+                    self.conn.execute("SELECT path, extension, size, mtime_ns FROM files")}
+        
+        def apply(self, upserts, deletes):
+            """在一个事务中写入变化的记录并删除消失的文件"""
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)", upserts)
+                self.conn.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in deletes))
+        
+        def count_larger_than(self, size):
+            return self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files WHERE size > ?", (size,)).fetchone()
+        
+        def count_modified_before(self, timestamp):
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM files WHERE mtime_ns < ?", (int(timestamp * 1e9),)).fetchone()[0]
+        
+        def close(self):
+            self.conn.close()
+    
     class FileOrganizer:
-        def __init__(self, target_dir="."):
+        def __init__(self, target_dir=".", index_path=None, max_workers=8):
             self.target_dir = Path(target_dir)
-            self.file_info = []
+            self.root = self.target_dir.absolute()
+            # 默认把索引放在被扫描的目录里（扫描时跳过），不在当前工作目录留下文件
+            if index_path is None:
+                index_path = self.root / '.file_organizer_index.db'
+            self.index_path = Path(index_path).absolute()
+            self.index = FileIndex(self.index_path, self.root)
+            self.max_workers = max_workers
+            self.entries = self.index.load()
+            self.last_scan = {}
             self.stats = {
                 'total_files': 0,
                 'total_size': 0,
@@ -294,109 +371,174 @@ def exercise_2_file_organizer():
                 'by_size_range': Counter(),
                 'by_date_range': Counter()
             }
+            # 统计信息从已有索引恢复，之后只按变化增量更新
+            for ext, size, _ in self.entries.values():
+                self._update_stats(ext, size, 1)
+            self._update_date_stats()
         
-        def scan_directory(self):
-            """扫描目录"""
-            print(f"扫描目录: {self.target_dir.absolute()}")
-            
-            for file_path in self.target_dir.rglob('*'):
-                if file_path.is_file():
-                    try:
-                        stat = file_path.stat()
-                        file_info = {
-                            'path': file_path,
-                            'name': file_path.name,
-                            'extension': file_path.suffix.lower(),
-                            'size': stat.st_size,
-                            'modified': datetime.fromtimestamp(stat.st_mtime),
-                            'created': datetime.fromtimestamp(stat.st_ctime)
-                        }
-                        
-                        self.file_info.append(file_info)
-                        self._update_stats(file_info)
+        def _walk(self):
+            """用 scandir 遍历目录树，只收集文件路径（不跟随目录符号链接）"""
+            skip = {str(self.index_path), str(self.index_path) + '-journal'}
+            stack = [str(self.root)]
+            while stack:
+                try:
+                    with os.scandir(stack.pop()) as it:
+                        for entry in it:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    stack.append(entry.path)
+                                elif entry.is_file() and entry.path not in skip:
+                                    yield entry.path
+                            except OSError:
+                                continue
+                except OSError:
+                    continue
+        
+        @staticmethod
+        def _stat_batch(paths):
+            results = []
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                results.append((path, stat.st_size, stat.st_mtime_ns, stat.st_ctime))
+            return results
+        
+        def scan_directory(self, verbose=True):
+            """
+            扫描目录
+            
+            stat 调用分批交给线程池并行执行；与索引比较后只处理新增、修改和删除的文件
+            """
+            if verbose:
+                print(f"扫描目录: {self.root}")
+            
+            start = time.perf_counter()
+            paths = list(self._walk())
+            batches = [paths[i:i + 256] for i in range(0, len(paths), 256)]
+            
+            upserts = []
+            seen = set()
+            added = modified = 0
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for batch in executor.map(self._stat_batch, batches):
+                    for path, size, mtime_ns, ctime in batch:
+                        seen.add(path)
+                        old = self.entries.get(path)
+                        if old is not None and old[1] == size and old[2] == mtime_ns:
+                            continue
                         
-                    except (OSError, PermissionError):
-                        continue
+                        ext = os.path.splitext(path)[1].lower()
+                        if old is None:
+                            added += 1
+                        else:
+                            modified += 1
+                            self._update_stats(old[0], old[1], -1)
+                        self._update_stats(ext, size, 1)
+                        self.entries[path] = (ext, size, mtime_ns)
+                        upserts.append((path, ext, size, mtime_ns, ctime))
+            
+            deleted = [path for path in self.entries if path not in seen]
+            for path in deleted:
+                ext, size, _ = self.entries.pop(path)
+                self._update_stats(ext, size, -1)
+            
+            self.index.apply(upserts, deleted)
+            self._update_date_stats()
+            
+            self.last_scan = {
+                'files': len(paths),
+                'added': added,
+                'modified': modified,
+                'deleted': len(deleted),
+                'seconds': time.perf_counter() - start
+            }
+            if verbose:
+                print(f"  {len(paths)} 个文件，新增 {added}，修改 {modified}，删除 {len(deleted)}，"
+                      f"用时 {self.last_scan['seconds'] * 1000:.1f} 毫秒")
         
-        def _update_stats(self, file_info):
-            """更新统计信息"""
-            self.stats['total_files'] += 1
-            self.stats['total_size'] += file_info['size']
-            
-            # 按扩展名统计
-            ext = file_info['extension'] or 'no_extension'
-            self.stats['by_extension'][ext] += 1
-            
-            # 按大小范围统计
-            size = file_info['size']
+        @staticmethod
+        def _size_range(size):
             if size < 1024:  # < 1KB
-                size_range = 'tiny'
+                return 'tiny'
             elif size < 1024 * 1024:  # < 1MB
-                size_range = 'small'
+                return 'small'
             elif size < 10 * 1024 * 1024:  # < 10MB
-                size_range = 'medium'
+                return 'medium'
             elif size < 100 * 1024 * 1024:  # < 100MB
-                size_range = 'large'
-            else:
-                size_range = 'huge'
-            
-            self.stats['by_size_range'][size_range] += 1
-            
-            # 按日期范围统计
-            now = datetime.now()
-            days_old = (now - file_info['modified']).days
+                return 'large'
+            return 'huge'
+        
+        def _update_stats(self, ext, size, sign):
+            """按增量更新统计信息（sign 为 1 表示加入，-1 表示移除）"""
+            self.stats['total_files'] += sign
+            self.stats['total_size'] += sign * size
             
-            if days_old < 7:
-                date_range = 'this_week'
-            elif days_old < 30:
-                date_range = 'this_month'
-            elif days_old < 365:
-                date_range = 'this_year'
-            else:
-                date_range = 'older'
+            # 按扩展名统计
+            ext = ext or 'no_extension'
+            self.stats['by_extension'][ext] += sign
+            if not self.stats['by_extension'][ext]:
+                del self.stats['by_extension'][ext]
             
-            self.stats['by_date_range'][date_range] += 1
+            # 按大小范围统计
+            size_range = self._size_range(size)
+            self.stats['by_size_range'][size_range] += sign
+            if not self.stats['by_size_range'][size_range]:
+                del self.stats['by_size_range'][size_range]
+        
+        def _update_date_stats(self):
+            """按修改时间统计：分界点随当前时间变化，直接用 mtime 索引查询"""
+            now = time.time()
+            counts = [self.index.count_modified_before(now - days * 86400) for days in (7, 30, 365)]
+            week, month, year = counts
+            total = self.stats['total_files']
+            by_date = Counter({
+                'this_week': total - week,
+                'this_month': week - month,
+                'this_year': month - year,
+                'older': year
+            })
+            self.stats['by_date_range'] = +by_date
         
         def generate_organization_suggestions(self):
-            """生成整理建议"""
+            """生成整理建议（基于增量维护的统计和索引查询，不遍历文件列表）"""
             suggestions = []
             
             # 按扩展名分类建议
-            ext_groups = defaultdict(list)
-            for file_info in self.file_info:
-                ext = file_info['extension'] or 'no_extension'
-                ext_groups[ext].append(file_info)
-            
-            for ext, files in ext_groups.items():
-                if len(files) > 5:  # 超过5个同类型文件
+            for ext, count in self.stats['by_extension'].items():
+                if count > 5:  # 超过5个同类型文件
                     suggestions.append({
                         'type': 'group_by_extension',
                         'extension': ext,
-                        'count': len(files),
+                        'count': count,
                         'suggested_folder': f"files_{ext.replace('.', '')}" if ext != 'no_extension' else 'files_no_extension'
                     })
             
             # 大文件建议
-            large_files = [f for f in self.file_info if f['size'] > 50 * 1024 * 1024]  # > 50MB
-            if large_files:
+            large_count, large_size = self.index.count_larger_than(50 * 1024 * 1024)  # > 50MB
+            if large_count:
                 suggestions.append({
                     'type': 'large_files',
-                    'count': len(large_files),
-                    'total_size': sum(f['size'] for f in large_files),
+                    'count': large_count,
+                    'total_size': large_size,
                     'suggested_action': 'review_and_archive'
                 })
             
             # 旧文件建议
-            old_files = [f for f in self.file_info if (datetime.now() - f['modified']).days > 365]
-            if old_files:
+            old_count = self.index.count_modified_before(time.time() - 365 * 86400)
+            if old_count:
                 suggestions.append({
                     'type': 'old_files',
-                    'count': len(old_files),
+                    'count': old_count,
                     'suggested_action': 'archive_or_delete'
                 })
             
             return suggestions
         
+        def close(self):
+            self.index.close()
+        
         def format_size(self, size_bytes):
             """格式化文件大小"""
             for unit in ['B', 'KB', 'MB', 'GB']:
@@ -448,10 +590,49 @@ def exercise_2_file_organizer():
                     elif suggestion['type'] == 'old_files':
                         print(f"  {i}. 处理 {suggestion['count']} 个超过一年的旧文件")
     
-    # 执行文件整理分析
-    organizer = FileOrganizer()
-    organizer.scan_directory()
-    organizer.print_report()
+    # 执行文件整理分析（索引放在临时目录，演示结束后删除）
+    with tempfile.TemporaryDirectory() as tmp:
+        organizer = FileOrganizer(index_path=Path(tmp) / 'index.db')
+        organizer.scan_directory()
+        organizer.print_report()
+        organizer.close()
+    
+    # 增量扫描演示：索引保存在磁盘上，重新扫描只处理变化的文件
+    print("\n--- 持久化索引与增量扫描 ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = Path(tmp) / 'tree'
+        extensions = ['.txt', '.py', '.jpg', '.csv', '.log']
+        for i in range(5000):
+            folder = tree / f"dir_{i % 50}"
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / f"file_{i}{extensions[i % len(extensions)]}").write_bytes(b'x' * (i % 4096))
+        index_path = Path(tmp) / 'index.db'
+        
+        organizer = FileOrganizer(tree, index_path)
+        print("首次扫描:")
+        organizer.scan_directory()
+        print("无变化时重新扫描:")
+        organizer.scan_directory()
+        organizer.close()
+        
+        # 修改、删除、新增少量文件后，用新的实例从磁盘索引继续
+        for i in range(10):
+            path = tree / f"dir_{i % 50}" / f"file_{i}{extensions[i % len(extensions)]}"
+            path.write_bytes(b'changed' * 100)
+        for i in range(10, 15):
+            (tree / f"dir_{i % 50}" / f"file_{i}{extensions[i % len(extensions)]}").unlink()
+        for i in range(5):
+            (tree / 'dir_0' / f"new_{i}.md").write_text('new file')
+        
+        organizer = FileOrganizer(tree, index_path)
+        print(f"重新打开索引: {organizer.stats['total_files']} 个文件，"
+              f"本周修改 {organizer.stats['by_date_range']['this_week']} 个")
+        print("修改10个、删除5个、新增5个文件后扫描:")
+        organizer.scan_directory()
+        print(f"  统计: {organizer.stats['total_files']} 个文件，"
+              f"{organizer.format_size(organizer.stats['total_size'])}，"
+              f".md 文件 {organizer.stats['by_extension']['.md']} 个")
+        organizer.close()
 
 
 def exercise_3_data_processor():
@@ -470,107 +651,298 @@ def exercise_3_data_processor():
     
     # 学生成绩数据结构
     Student = namedtuple('Student', 'id name age grade math english science')
+    SUBJECTS = ('math', 'english', 'science')
+    NAMES = ['Alice', 'Bob', 'Charlie', 'David', 'Eve', 'Frank', 'Grace', 'Henry', 'Ivy', 'Jack']
+    GRADES = ['A', 'B', 'C']
+    
+    class RunningStats:
+        """
+        Welford单遍均值/方差
+        
+        add(value, count) 一次合并 count 个相同的值（Chan的合并公式），
+        因此既可以逐个添加数据，也可以直接消费直方图
+        """
+        
+        def __init__(self):
+            self.count = 0
+            self.mean = 0.0
+            self.m2 = 0.0
+        
+        def add(self, value, count=1):
+            total = self.count + count
+            delta = value - self.mean
+            self.mean += delta * count / total
+            self.m2 += delta * delta * self.count * count / total
+            self.count = total
+        
+        @classmethod
+        def from_histogram(cls, histogram):
+            stats = cls()
+            for value, count in histogram.items():
+                stats.add(value, count)
+            return stats
+        
+        @property
+        def stdev(self):
+            return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0
+    
+    def select_kth(histogram, k):
+        """在直方图上选出第k小的值（k从0开始），只需遍历不同取值"""
+        seen = 0
+        for value in sorted(histogram):
+            seen += histogram[value]
+            if seen > k:
+                return value
+        raise IndexError(k)
+    
+    def histogram_median(histogram, count):
+        middle = count // 2
+        if count % 2:
+            return select_kth(histogram, middle)
+        return (select_kth(histogram, middle - 1) + select_kth(histogram, middle)) / 2
+    
+    class StudentTable:
+        """
+        列式存储学生数据：每个字段一个 array，姓名和年级做字典编码
+        
+        成绩用 'd'（允许 85.5 这样的小数），年龄用有符号的 'h'（清洗前的无效年龄
+        可能为负）。1000万学生约占320MB，而namedtuple列表需要1GB以上；
+        统计时对整列调用C实现的 Counter/map/min/max，避免逐行的Python循环
+        """
+        
+        def __init__(self):
+            self.ids = array.array('i')
+            self.name_codes = array.array('H')
+            self.ages = array.array('h')
+            self.grade_codes = array.array('b')
+            self.scores = {subject: array.array('d') for subject in SUBJECTS}
+            self.names = []
+            self.grades = []
+            self._name_index = {}
+            self._grade_index = {}
+        
+        def __len__(self):
+            return len(self.ids)
+        
+        def __iter__(self):
+            return map(self.row, range(len(self)))
+        
+        def columns(self):
+            return [self.ids, self.name_codes, self.ages, self.grade_codes, *self.scores.values()]
+        
+        @staticmethod
+        def _encode(value, vocabulary, index):
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(vocabulary)
+                vocabulary.append(value)
+            return code
+        
+        def append(self, student):
+            count = len(self.ids)
+            try:
+                self.ids.append(student.id)
+                self.name_codes.append(self._encode(student.name, self.names, self._name_index))
+                self.ages.append(student.age)
+                self.grade_codes.append(self._encode(student.grade, self.grades, self._grade_index))
+                for subject in SUBJECTS:
+                    self.scores[subject].append(getattr(student, subject))
+            except (TypeError, OverflowError) as e:
+                # 撤销已追加的列，保持各列等长
+                for column in self.columns():
+                    del column[count:]
+                raise ValueError(f"学生 {student.id!r} 的数据超出列的取值范围: {e}") from e
+        
+        def row(self, i):
+            return Student(self.ids[i], self.names[self.name_codes[i]], self.ages[i],
+                           self.grades[self.grade_codes[i]], self.scores['math'][i],
+                           self.scores['english'][i], self.scores['science'][i])
+        
+        def totals(self):
+            return array.array('d', map(operator.add,
+                                        map(operator.add, self.scores['math'], self.scores['english']),
+                                        self.scores['science']))
+        
+        def select(self, mask):
+            """按掩码筛选行，返回新表（共享姓名/年级字典）"""
+            table = StudentTable()
+            table.names, table._name_index = self.names, self._name_index
+            table.grades, table._grade_index = self.grades, self._grade_index
+            table.ids = array.array('i', itertools.compress(self.ids, mask))
+            table.name_codes = array.array('H', itertools.compress(self.name_codes, mask))
+            table.ages = array.array('h', itertools.compress(self.ages, mask))
+            table.grade_codes = array.array('b', itertools.compress(self.grade_codes, mask))
+            for subject in SUBJECTS:
+                table.scores[subject] = array.array('d', itertools.compress(self.scores[subject], mask))
+            return table
+        
+        @classmethod
+        def random(cls, count, names, grades):
+            """按列批量生成随机数据，比逐个创建Student快一个数量级"""
+            table = cls()
+            full_names = [name + str(n) for name in names for n in range(1, 100)]
+            for name in full_names:
+                cls._encode(name, table.names, table._name_index)
+            for grade in grades:
+                cls._encode(grade, table.grades, table._grade_index)
+            
+            table.ids = array.array('i', range(1, count + 1))
+            table.name_codes = array.array('H', random.choices(range(len(full_names)), k=count))
+            table.ages = array.array('h', random.choices(range(16, 21), k=count))
+            table.grade_codes = array.array('b', random.choices(range(len(grades)), k=count))
+            for subject in SUBJECTS:
+                table.scores[subject] = array.array('d', random.choices(range(60, 101), k=count))
+            return table
+    
+    def top_rows(totals, histogram, k, largest=True):
+        """
+        按总分取前k名（或后k名）的行号
+        
+        从直方图得到需要的分数段，再用 array.index 在C层面查找行号，
+        排序结果与按总分降序的稳定排序一致
+        """
+        picked = []
+        column = totals if largest else totals[::-1]
+        for value in sorted(histogram, reverse=largest):
+            position = 0
+            for _ in range(min(histogram[value], k - len(picked))):
+                position = column.index(value, position)
+                picked.append((value, position if largest else len(totals) - 1 - position))
+                position += 1
+            if len(picked) >= k:
+                break
+        picked.sort(key=lambda item: (-item[0], item[1]))
+        return picked
+    
+    def row_based_statistics(students):
+        """逐行计算统计信息（namedtuple列表 + statistics模块），作为性能对比基准"""
+        math_scores = [s.math for s in students]
+        english_scores = [s.english for s in students]
+        science_scores = [s.science for s in students]
+        ages = [s.age for s in students]
+        
+        stats = {'total_students': len(students)}
+        for subject, scores in (('math', math_scores), ('english', english_scores),
+                                ('science', science_scores)):
+            stats[subject] = {
+                'mean': statistics.mean(scores),
+                'median': statistics.median(scores),
+                'stdev': statistics.stdev(scores) if len(scores) > 1 else 0,
+                'min': min(scores),
+                'max': max(scores)
+            }
+        stats['age_distribution'] = Counter(ages)
+        stats['grade_distribution'] = Counter(s.grade for s in students)
+        
+        students_with_total = [(s, s.math + s.english + s.science) for s in students]
+        students_with_total.sort(key=lambda x: x[1], reverse=True)
+        stats['top_students'] = students_with_total[:5]
+        stats['bottom_students'] = students_with_total[-5:]
+        
+        grade_stats = defaultdict(list)
+        for student, total in students_with_total:
+            grade_stats[student.grade].append(total)
+        stats['grade_performance'] = {
+            grade: {'count': len(scores), 'average': statistics.mean(scores),
+                    'median': statistics.median(scores)}
+            for grade, scores in grade_stats.items()
+        }
+        return stats
     
     class DataProcessor:
         def __init__(self):
-            self.raw_data = []
-            self.cleaned_data = []
+            self.raw_data = StudentTable()
+            self.cleaned_data = self.raw_data
             self.stats = {}
         
         def generate_sample_data(self, count=50):
             """生成示例学生数据"""
-            names = ['Alice', 'Bob', 'Charlie', 'David', 'Eve', 'Frank', 'Grace', 'Henry', 'Ivy', 'Jack']
-            grades = ['A', 'B', 'C']
-            
             for i in range(count):
                 student = Student(
                     id=i + 1,
-                    name=random.choice(names) + str(random.randint(1, 99)),
+                    name=random.choice(NAMES) + str(random.randint(1, 99)),
                     age=random.randint(16, 20),
-                    grade=random.choice(grades),
+                    grade=random.choice(GRADES),
                     math=random.randint(60, 100),
                     english=random.randint(60, 100),
                     science=random.randint(60, 100)
                 )
                 self.raw_data.append(student)
         
-        def clean_data(self):
+        def clean_data(self, verbose=True):
             """数据清洗"""
-            print("执行数据清洗...")
-            
-            for student in self.raw_data:
-                # 检查数据有效性
-                if (student.math >= 0 and student.english >= 0 and student.science >= 0 and
-                    student.age >= 16 and student.age <= 25):
-                    self.cleaned_data.append(student)
-            
-            print(f"原始数据: {len(self.raw_data)} 条")
-            print(f"清洗后数据: {len(self.cleaned_data)} 条")
-            print(f"清洗掉: {len(self.raw_data) - len(self.cleaned_data)} 条")
+            if verbose:
+                print("执行数据清洗...")
+            
+            table = self.raw_data
+            scores = table.scores.values()
+            # 整列的 min/max 在C层面完成；全部有效时直接复用原表，不做复制
+            if (not len(table) or
+                    (all(min(column) >= 0 for column in scores) and
+                     min(table.ages) >= 16 and max(table.ages) <= 25)):
+                self.cleaned_data = table
+            else:
+                mask = [s.math >= 0 and s.english >= 0 and s.science >= 0 and 16 <= s.age <= 25
+                        for s in table]
+                self.cleaned_data = table.select(mask)
+            
+            if verbose:
+                print(f"原始数据: {len(self.raw_data)} 条")
+                print(f"清洗后数据: {len(self.cleaned_data)} 条")
+                print(f"清洗掉: {len(self.raw_data) - len(self.cleaned_data)} 条")
         
-        def calculate_statistics(self):
-            """计算统计信息"""
-            print("\n计算统计信息...")
-            
-            if not self.cleaned_data:
+        def calculate_statistics(self, verbose=True):
+            """
+            计算统计信息
+            
+            每列只做一次 Counter 计数，均值/方差、中位数、最值都从直方图得到；
+            成绩是小范围整数，直方图只有几十个桶
+            """
+            if verbose:
+                print("\n计算统计信息...")
+            
+            table = self.cleaned_data
+            count = len(table)
+            if not count:
                 return
             
-            # 基本统计
-            math_scores = [s.math for s in self.cleaned_data]
-            english_scores = [s.english for s in self.cleaned_data]
-            science_scores = [s.science for s in self.cleaned_data]
-            ages = [s.age for s in self.cleaned_data]
+            self.stats = {'total_students': count}
+            for subject in SUBJECTS:
+                histogram = Counter(table.scores[subject])
+                running = RunningStats.from_histogram(histogram)
+                self.stats[subject] = {
+                    'mean': running.mean,
+                    'median': histogram_median(histogram, count),
+                    'stdev': running.stdev,
+                    'min': min(histogram),
+                    'max': max(histogram)
+                }
             
-            self.stats = {
-                'total_students': len(self.cleaned_data),
-                'math': {
-                    'mean': statistics.mean(math_scores),
-                    'median': statistics.median(math_scores),
-                    'stdev': statistics.stdev(math_scores) if len(math_scores) > 1 else 0,
-                    'min': min(math_scores),
-                    'max': max(math_scores)
-                },
-                'english': {
-                    'mean': statistics.mean(english_scores),
-                    'median': statistics.median(english_scores),
-                    'stdev': statistics.stdev(english_scores) if len(english_scores) > 1 else 0,
-                    'min': min(english_scores),
-                    'max': max(english_scores)
-                },
-                'science': {
-                    'mean': statistics.mean(science_scores),
-                    'median': statistics.median(science_scores),
-                    'stdev': statistics.stdev(science_scores) if len(science_scores) > 1 else 0,
-                    'min': min(science_scores),
-                    'max': max(science_scores)
-                },
-                'age_distribution': Counter(ages),
-                'grade_distribution': Counter(s.grade for s in self.cleaned_data)
-            }
+            self.stats['age_distribution'] = Counter(table.ages)
+            self.stats['grade_distribution'] = Counter({
+                table.grades[code]: n for code, n in Counter(table.grade_codes).items()
+            })
             
             # 计算总分和排名
-            students_with_total = []
-            for student in self.cleaned_data:
-                total_score = student.math + student.english + student.science
-                students_with_total.append((student, total_score))
-            
-            # 按总分排序
-            students_with_total.sort(key=lambda x: x[1], reverse=True)
-            self.stats['top_students'] = students_with_total[:5]
-            self.stats['bottom_students'] = students_with_total[-5:]
-            
-            # 按年级分组统计
-            grade_stats = defaultdict(list)
-            for student in self.cleaned_data:
-                total = student.math + student.english + student.science
-                grade_stats[student.grade].append(total)
+            totals = table.totals()
+            total_histogram = Counter(totals)
+            self.stats['top_students'] = [
+                (table.row(i), total) for total, i in top_rows(totals, total_histogram, 5)]
+            self.stats['bottom_students'] = [
+                (table.row(i), total) for total, i in top_rows(totals, total_histogram, 5, largest=False)]
+            
+            # 按年级分组统计：(年级, 总分) 联合计数后拆成每个年级的直方图
+            grade_histograms = defaultdict(Counter)
+            for (code, total), n in Counter(zip(table.grade_codes, totals)).items():
+                grade_histograms[table.grades[code]][total] = n
             
             self.stats['grade_performance'] = {}
-            for grade, scores in grade_stats.items():
+            for grade, histogram in grade_histograms.items():
+                running = RunningStats.from_histogram(histogram)
                 self.stats['grade_performance'][grade] = {
-                    'count': len(scores),
-                    'average': statistics.mean(scores),
-                    'median': statistics.median(scores)
+                    'count': running.count,
+                    'average': running.mean,
+                    'median': histogram_median(histogram, running.count)
                 }
         
         def generate_report(self):
@@ -591,8 +963,8 @@ def exercise_3_data_processor():
                 print(f"  平均分: {stats['mean']:.2f}")
                 print(f"  中位数: {stats['median']:.2f}")
                 print(f"  标准差: {stats['stdev']:.2f}")
-                print(f"  最高分: {stats['max']}")
-                print(f"  最低分: {stats['min']}")
+                print(f"  最高分: {stats['max']:g}")
+                print(f"  最低分: {stats['min']:g}")
             
             # 年龄分布
             print("\n年龄分布:")
@@ -612,7 +984,7 @@ def exercise_3_data_processor():
             # 优秀学生
             print("\n前5名学生:")
             for i, (student, total) in enumerate(self.stats['top_students'], 1):
-                print(f"  {i}. {student.name} (总分: {total})")
+                print(f"  {i}. {student.name} (总分: {total:g})")
         
         def save_results(self):
             """保存结果"""
@@ -650,6 +1022,48 @@ def exercise_3_data_processor():
             print("  - cleaned_student_data.csv")
             print("  - student_statistics.json")
     
+    def benchmark_statistics(count=10_000_000):
+        """对比列式统计与逐行统计的耗时和内存"""
+        print(f"\n--- 统计性能对比（{count:,} 名学生） ---")
+        
+        processor = DataProcessor()
+        start = time.perf_counter()
+        processor.raw_data = StudentTable.random(count, NAMES, GRADES)
+        print(f"按列生成数据: {time.perf_counter() - start:.2f} 秒")
+        
+        start = time.perf_counter()
+        processor.clean_data(verbose=False)
+        processor.calculate_statistics(verbose=False)
+        columnar_time = time.perf_counter() - start
+        
+        table = processor.cleaned_data
+        columnar_bytes = sum(column.buffer_info()[1] * column.itemsize for column in table.columns())
+        
+        rows = list(table)
+        rows_bytes = sys.getsizeof(rows) + len(rows) * sys.getsizeof(rows[0]) if rows else 0
+        start = time.perf_counter()
+        baseline = row_based_statistics(rows)
+        row_time = time.perf_counter() - start
+        del rows
+        
+        print(f"列式统计: {columnar_time:.2f} 秒，数据占用 {columnar_bytes / 1024 / 1024:.0f} MB")
+        print(f"逐行统计: {row_time:.2f} 秒，数据占用约 {rows_bytes / 1024 / 1024:.0f} MB")
+        print(f"加速比: {row_time / columnar_time:.1f}x")
+        
+        # 两种方法结果应一致（均值/标准差允许浮点误差）
+        for subject in SUBJECTS:
+            ours, theirs = processor.stats[subject], baseline[subject]
+            assert ours['median'] == theirs['median'] and ours['min'] == theirs['min']
+            assert math.isclose(ours['mean'], theirs['mean'], rel_tol=1e-9)
+            assert math.isclose(ours['stdev'], theirs['stdev'], rel_tol=1e-9)
+        assert ([(s.id, t) for s, t in processor.stats['top_students']] ==
+                [(s.id, t) for s, t in baseline['top_students']])
+        assert ([(s.id, t) for s, t in processor.stats['bottom_students']] ==
+                [(s.id, t) for s, t in baseline['bottom_students']])
+        for grade, perf in baseline['grade_performance'].items():
+            assert processor.stats['grade_performance'][grade]['median'] == perf['median']
+        print("两种方法的统计结果一致")
+    
     # 执行数据处理
     processor = DataProcessor()
     processor.generate_sample_data()
@@ -657,6 +1071,17 @@ def exercise_3_data_processor():
     processor.calculate_statistics()
     processor.generate_report()
     processor.save_results()
+    
+    # 小数成绩和超过127的年龄都能存入；超出列类型范围时给出明确的错误，各列保持等长
+    edge = StudentTable()
+    edge.append(Student(1, 'Alice1', 130, 'A', 85.5, 90, 77.5))
+    print(f"\n边界数据: {edge.row(0)}")
+    try:
+        edge.append(Student(2, 'Bob2', 40000, 'B', 80, 80, 80))
+    except ValueError as e:
+        print(f"无法存入: {e}（表中仍有 {len(edge)} 条记录）")
+    
+    benchmark_statistics(1_000_000)
 
 
 def exercise_4_task_scheduler():
@@ -665,7 +1090,7 @@ def exercise_4_task_scheduler():
     
     功能：
     1. 任务优先级管理
-    2. 任务执行调度
+    2. 任务执行调度（顺序执行或多线程工作池）
     3. 性能监控
     4. 结果统计
     """
@@ -685,6 +1110,7 @@ def exercise_4_task_scheduler():
         RUNNING = "running"
         COMPLETED = "completed"
         FAILED = "failed"
+        CANCELLED = "cancelled"
     
     class Task:
         def __init__(self, task_id, name, priority, estimated_duration, func=None):
@@ -700,23 +1126,29 @@ def exercise_4_task_scheduler():
             self.actual_duration = None
             self.result = None
             self.error = None
+            # 调度用的单调时钟时间和排序键（由调度器在入队时设置）
+            self.enqueue_time = time.monotonic()
+            self.started_at = None
+            self.sort_key = (-self.priority, self.enqueue_time)
+            self.cancel_event = threading.Event()
         
         def _default_task(self):
             """默认任务函数"""
-            import time
-            # 模拟任务执行
+            # 模拟任务执行；用事件等待代替sleep，取消时可以立即结束
             duration = random.uniform(0.1, self.estimated_duration)
-            time.sleep(duration)
+            if self.cancel_event.wait(duration):
+                return None
             return f"Task {self.name} completed in {duration:.2f}s"
         
         def execute(self):
             """执行任务"""
             self.status = TaskStatus.RUNNING
             self.start_time = datetime.now()
+            self.started_at = time.monotonic()
             
             try:
                 self.result = self.func()
-                self.status = TaskStatus.COMPLETED
+                self.status = TaskStatus.CANCELLED if self.cancel_event.is_set() else TaskStatus.COMPLETED
             except Exception as e:
                 self.error = str(e)
                 self.status = TaskStatus.FAILED
@@ -724,70 +1156,413 @@ def exercise_4_task_scheduler():
                 self.end_time = datetime.now()
                 self.actual_duration = (self.end_time - self.start_time).total_seconds()
         
+        @property
+        def queue_latency(self):
+            """从入队到开始执行的等待时间（秒）"""
+            if self.started_at is None:
+                return None
+            return self.started_at - self.enqueue_time
+        
         def __lt__(self, other):
-            # 优先级高的任务排在前面（堆是最小堆，所以用负数）
-            if self.priority != other.priority:
-                return self.priority > other.priority
-            # 相同优先级按创建时间排序
-            return self.created_time < other.created_time
+            # 排序键越小越先执行：默认按优先级，其次按入队时间
+            return self.sort_key < other.sort_key
         
         def __repr__(self):
             return f"Task({self.task_id}, {self.name}, {self.priority.name})"
     
+    class Timer:
+        """时间轮中的一个定时器"""
+        __slots__ = ('timer_id', 'first_deadline', 'deadline', 'expires_tick',
+                     'interval', 'runs', 'callback', 'slot', 'cancelled')
+        
+        def __init__(self, timer_id, deadline, interval, callback):
+            self.timer_id = timer_id
+            self.first_deadline = deadline
+            self.deadline = deadline
+            self.expires_tick = 0
+            self.interval = interval
+            self.runs = 0
+            self.callback = callback
+            self.slot = None
+            self.cancelled = False
+    
+    class TimingWheel:
+        """
+        分层时间轮
+        
+        - 第0层每格 tick 秒，共 slots 格；第L层每格是第L-1层转一圈的时间
+        - 添加定时器：计算放在哪一层哪一格，O(1)
+        - 取消定时器：每格是字典，直接按ID删除，O(1)
+        - 推进时钟：每个tick只处理一个格子；某层转完一圈时，把上一层对应格子里的
+          定时器重新分配到下层（级联），开销与等待中的定时器总数无关
+        - 超出最高层范围的定时器放在 overflow 中，最高层转完一圈时重新分配
+        - 周期定时器的第n次触发时间是 first_deadline + n * interval，
+          只由首次时间和周期决定，不会因为执行延迟而累积漂移
+        """
+        
+        def __init__(self, tick=0.01, slots=64, levels=4):
+            self.tick = tick
+            self.slots = slots
+            self.levels = levels
+            self.wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+            self.overflow = {}
+            self.origin = time.monotonic()
+            self.current_tick = 0
+            self.timers = {}  # 定时器ID -> 定时器，取消时用来找到所在的格子
+            self.next_id = 1
+            self.lock = threading.Lock()
+            self.spans = [slots ** level for level in range(levels + 1)]
+        
+        def _place(self, timer):
+            """把定时器放进合适的格子（调用时须持有锁）"""
+            expires = timer.expires_tick
+            for level in range(self.levels):
+                span = self.spans[level]
+                if expires // span - self.current_tick // span < self.slots:
+                    slot = self.wheels[level][(expires // span) % self.slots]
+                    break
+            else:
+                slot = self.overflow
+            slot[timer.timer_id] = timer
+            timer.slot = slot
+        
+        def _arm(self, timer):
+            ticks = math.ceil((timer.deadline - self.origin) / self.tick)
+            # 已经到期的定时器在下一个tick触发
+            timer.expires_tick = max(ticks, self.current_tick + 1)
+            self._place(timer)
+        
+        def add(self, delay, callback, interval=None):
+            """delay秒后触发callback；指定interval则之后每interval秒触发一次。返回定时器ID"""
+            with self.lock:
+                timer = Timer(self.next_id, time.monotonic() + delay, interval, callback)
+                self.next_id += 1
+                self._arm(timer)
+                self.timers[timer.timer_id] = timer
+                return timer.timer_id
+        
+        def cancel(self, timer_id):
+            """按ID取消定时器，返回是否找到"""
+            with self.lock:
+                timer = self.timers.pop(timer_id, None)
+                if timer is None:
+                    return False
+                del timer.slot[timer_id]
+                timer.cancelled = True
+                return True
+        
+        @property
+        def count(self):
+            return len(self.timers)
+        
+        def advance(self, now=None):
+            """推进到当前时间，返回到期的定时器列表（周期定时器会自动重新排期）"""
+            if now is None:
+                now = time.monotonic()
+            target = int((now - self.origin) / self.tick)
+            fired = []
+            
+            with self.lock:
+                if not self.timers:
+                    self.current_tick = max(self.current_tick, target)
+                    return fired
+                
+                while self.current_tick < target:
+                    self.current_tick += 1
+                    tick = self.current_tick
+                    
+                    # 从高层到低层级联
+                    if tick % self.spans[self.levels] == 0 and self.overflow:
+                        pending, self.overflow = self.overflow, {}
+                        for timer in pending.values():
+                            self._place(timer)
+                    for level in range(self.levels - 1, 0, -1):
+                        span = self.spans[level]
+                        if tick % span == 0:
+                            index = (tick // span) % self.slots
+                            pending = self.wheels[level][index]
+                            if pending:
+                                self.wheels[level][index] = {}
+                                for timer in pending.values():
+                                    self._place(timer)
+                    
+                    index = tick % self.slots
+                    due = self.wheels[0][index]
+                    if due:
+                        self.wheels[0][index] = {}
+                        for timer in due.values():
+                            fired.append(timer)
+                            if timer.interval:
+                                # 跳过已错过的周期，下一次时间仍对齐到初始时间线
+                                timer.runs += 1
+                                timer.deadline = timer.first_deadline + timer.runs * timer.interval
+                                while timer.deadline <= now:
+                                    timer.runs += 1
+                                    timer.deadline = timer.first_deadline + timer.runs * timer.interval
+                                self._arm(timer)
+                            else:
+                                timer.slot = None
+                                del self.timers[timer.timer_id]
+            
+            return fired
+    
     class TaskScheduler:
-        def __init__(self):
+        """
+        任务调度器
+        
+        - 顺序模式：execute_all_tasks() 在当前线程逐个执行
+        - 工作池模式：execute_all_tasks(workers=N) 由N个线程同时从堆中取任务
+        - 老化：aging_interval 秒的等待时间相当于提升一个优先级。
+          排序键为 入队时间 - 优先级 * aging_interval，是入队时就确定的常量，
+          堆不需要重排，低优先级任务等待足够久后一定会排到新来的高优先级任务前面
+        - priority_caps：每个优先级同时运行的任务数上限（至少为1）
+        - cancel_task()：等待中的任务直接标记取消（出堆时跳过），
+          运行中的任务通过事件通知其尽快结束
+        - 定时任务：schedule_at() / schedule_every() 把任务挂到时间轮上，
+          到期时才放入任务堆；run_scheduled() 同时驱动时间轮和工作池
+        """
+        
+        def __init__(self, aging_interval=5.0, priority_caps=None, timer_tick=0.01):
             self.task_queue = []  # 使用堆队列
             self.completed_tasks = []
             self.failed_tasks = []
+            self.cancelled_tasks = []
+            self.tasks = {}
+            self.aging_interval = aging_interval
+            self.priority_caps = dict(priority_caps or {})
+            # 上限为0的优先级永远不会被取出，工作线程会一直等待
+            for priority, cap in self.priority_caps.items():
+                if cap < 1:
+                    raise ValueError(f"优先级 {getattr(priority, 'name', priority)} 的并发上限必须至少为1，实际为 {cap}")
+            self.running_by_priority = Counter()
+            self.running_count = 0
+            self.condition = threading.Condition()
+            self.timers = TimingWheel(tick=timer_tick)
+            self.accepting = False  # 时间轮运行期间工作线程不因队列暂时为空而退出
             self.stats = {
                 'total_tasks': 0,
                 'completed_tasks': 0,
                 'failed_tasks': 0,
+                'cancelled_tasks': 0,
                 'total_execution_time': 0,
+                'wall_time': 0,
+                'workers': 1,
                 'by_priority': Counter(),
                 'by_status': Counter()
             }
         
-        def add_task(self, task):
+        def add_task(self, task, verbose=True):
             """添加任务"""
-            heapq.heappush(self.task_queue, task)
-            self.stats['total_tasks'] += 1
-            self.stats['by_priority'][task.priority.name] += 1
-            print(f"添加任务: {task}")
+            with self.condition:
+                task.enqueue_time = time.monotonic()
+                task.sort_key = (task.enqueue_time - task.priority * self.aging_interval, task.task_id)
+                heapq.heappush(self.task_queue, task)
+                self.tasks[task.task_id] = task
+                self.stats['total_tasks'] += 1
+                self.stats['by_priority'][task.priority.name] += 1
+                self.condition.notify()
+            if verbose:
+                print(f"添加任务: {task}")
         
-        def execute_next_task(self):
-            """执行下一个任务"""
-            if not self.task_queue:
-                return None
-            
-            task = heapq.heappop(self.task_queue)
-            print(f"执行任务: {task.name} (优先级: {task.priority.name})")
-            
-            task.execute()
-            
+        def schedule_at(self, run_at, task):
+            """在指定时间（datetime）把任务加入队列，返回定时器ID"""
+            delay = max(0.0, (run_at - datetime.now()).total_seconds())
+            return self.timers.add(delay, lambda: self.add_task(task))
+        
+        def schedule_every(self, interval, task_factory, first_delay=None):
+            """
+            每 interval 秒调用 task_factory() 创建一个新任务并加入队列，返回定时器ID
+            
+            任务对象只能执行一次，所以周期任务传入的是创建任务的函数
+            """
+            delay = interval if first_delay is None else first_delay
+            return self.timers.add(delay, lambda: self.add_task(task_factory(), verbose=False),
+                                   interval=interval)
+        
+        def cancel_timer(self, timer_id):
+            """取消尚未触发的定时任务或周期任务，O(1)"""
+            return self.timers.cancel(timer_id)
+        
+        def _timer_loop(self, end_time):
+            """定时器线程：每个tick推进一次时间轮，把到期任务放入队列"""
+            wheel = self.timers
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now >= end_time or wheel.count == 0:
+                        break
+                    for timer in wheel.advance(now):
+                        timer.callback()
+                    # 睡到下一个tick边界，而不是固定睡一个tick，避免误差累积
+                    next_tick = wheel.origin + (wheel.current_tick + 1) * wheel.tick
+                    time.sleep(max(0.0, min(next_tick, end_time) - time.monotonic()))
+            finally:
+                with self.condition:
+                    self.accepting = False
+                    self.condition.notify_all()
+        
+        def run_scheduled(self, duration, workers=2):
+            """运行 duration 秒（或直到没有定时器）：驱动时间轮，同时用工作池执行到期的任务"""
+            print(f"\n运行定时任务 {duration} 秒（{workers} 个工作线程）...")
+            self.accepting = True
+            timer_thread = threading.Thread(target=self._timer_loop,
+                                            args=(time.monotonic() + duration,), name="timer")
+            timer_thread.start()
+            start = time.monotonic()
+            self._run_workers(max(1, workers))
+            timer_thread.join()
+            self.stats['wall_time'] += time.monotonic() - start
+        
+        def cancel_task(self, task_id):
+            """取消任务，返回是否成功发出取消"""
+            with self.condition:
+                task = self.tasks.get(task_id)
+                if task is None or task.status not in (TaskStatus.PENDING, TaskStatus.RUNNING):
+                    return False
+                task.cancel_event.set()
+                if task.status == TaskStatus.PENDING:
+                    # 惰性删除：留在堆中，出堆时跳过
+                    task.status = TaskStatus.CANCELLED
+                    self._record_result(task)
+                    self.condition.notify_all()
+            print(f"取消任务: {task}")
+            return True
+        
+        def _take_next_task(self):
+            """取出排序最靠前、且所属优先级未达到并发上限的任务（调用时须持有锁）"""
+            skipped = []
+            task = None
+            while self.task_queue:
+                candidate = heapq.heappop(self.task_queue)
+                if candidate.status == TaskStatus.CANCELLED:
+                    continue
+                cap = self.priority_caps.get(candidate.priority)
+                if cap is not None and self.running_by_priority[candidate.priority] >= cap:
+                    skipped.append(candidate)
+                    continue
+                task = candidate
+                break
+            for candidate in skipped:
+                heapq.heappush(self.task_queue, candidate)
+            return task
+        
+        def _record_result(self, task):
+            """记录任务结果（调用时须持有锁）"""
             if task.status == TaskStatus.COMPLETED:
                 self.completed_tasks.append(task)
                 self.stats['completed_tasks'] += 1
-                print(f"  ✓ 完成: {task.result}")
+            elif task.status == TaskStatus.CANCELLED:
+                self.cancelled_tasks.append(task)
+                self.stats['cancelled_tasks'] += 1
             else:
                 self.failed_tasks.append(task)
                 self.stats['failed_tasks'] += 1
-                print(f"  ✗ 失败: {task.error}")
             
-            self.stats['total_execution_time'] += task.actual_duration
+            if task.actual_duration is not None:
+                self.stats['total_execution_time'] += task.actual_duration
             self.stats['by_status'][task.status.value] += 1
+        
+        def _print_result(self, task):
+            if task.status == TaskStatus.COMPLETED:
+                print(f"  ✓ 完成: {task.result}")
+            elif task.status == TaskStatus.CANCELLED:
+                print(f"  ⊘ 已取消: {task.name}")
+            else:
+                print(f"  ✗ 失败: {task.error}")
+        
+        def execute_next_task(self):
+            """执行下一个任务"""
+            with self.condition:
+                task = self._take_next_task()
+                if task is None:
+                    return None
+                # 在取出任务的同一把锁内标记为运行中：之后的 cancel_task 只会通知任务结束，
+                # 不会再把它当作等待中的任务记录为已取消
+                task.status = TaskStatus.RUNNING
+            
+            print(f"执行任务: {task.name} (优先级: {task.priority.name})")
+            task.execute()
+            
+            with self.condition:
+                self._record_result(task)
+            self._print_result(task)
             
             return task
         
-        def execute_all_tasks(self):
-            """执行所有任务"""
-            print("\n开始执行所有任务...")
-            
-            while self.task_queue:
-                self.execute_next_task()
+        def _worker_loop(self):
+            """工作线程：循环取任务执行，队列为空且没有运行中的任务时退出"""
+            while True:
+                with self.condition:
+                    while True:
+                        task = self._take_next_task()
+                        if task is not None:
+                            break
+                        if not self.task_queue and self.running_count == 0 and not self.accepting:
+                            self.condition.notify_all()
+                            return
+                        # 队列为空（等其他任务结束）或只剩达到上限的优先级
+                        self.condition.wait()
+                    task.status = TaskStatus.RUNNING
+                    self.running_count += 1
+                    self.running_by_priority[task.priority] += 1
+                
+                print(f"[{threading.current_thread().name}] 执行任务: {task.name} (优先级: {task.priority.name})")
+                task.execute()
+                
+                with self.condition:
+                    self.running_count -= 1
+                    self.running_by_priority[task.priority] -= 1
+                    self._record_result(task)
+                    self.condition.notify_all()
+                self._print_result(task)
+        
+        def execute_all_tasks(self, workers=1):
+            """执行所有任务；workers > 1 时使用工作池并发执行"""
+            print(f"\n开始执行所有任务（{workers} 个工作线程）...")
+            self.stats['workers'] = workers
+            start = time.monotonic()
+            
+            if workers <= 1:
+                while self.task_queue:
+                    self.execute_next_task()
+            else:
+                self._run_workers(workers)
             
+            self.stats['wall_time'] += time.monotonic() - start
             print("\n所有任务执行完成!")
         
+        def _run_workers(self, workers):
+            threads = [threading.Thread(target=self._worker_loop, name=f"worker-{i}")
+                       for i in range(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        
+        @staticmethod
+        def percentile(values, pct):
+            """最近秩法计算百分位数"""
+            ordered = sorted(values)
+            rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+            return ordered[rank]
+        
+        def latency_percentiles(self):
+            """按优先级统计排队延迟的 p50/p95/p99（毫秒）"""
+            latencies = defaultdict(list)
+            for task in self.completed_tasks + self.failed_tasks + self.cancelled_tasks:
+                if task.queue_latency is not None:
+                    latencies[task.priority].append(task.queue_latency * 1000)
+            
+            return {
+                priority: {
+                    'count': len(values),
+                    'p50': self.percentile(values, 50),
+                    'p95': self.percentile(values, 95),
+                    'p99': self.percentile(values, 99),
+                }
+                for priority, values in sorted(latencies.items(), reverse=True)
+            }
+        
         def generate_performance_report(self):
             """生成性能报告"""
             print("\n" + "=" * 40)
@@ -797,8 +1572,10 @@ def exercise_4_task_scheduler():
             print(f"\n总任务数: {self.stats['total_tasks']}")
             print(f"完成任务: {self.stats['completed_tasks']}")
             print(f"失败任务: {self.stats['failed_tasks']}")
+            print(f"取消任务: {self.stats['cancelled_tasks']}")
             print(f"成功率: {self.stats['completed_tasks']/self.stats['total_tasks']*100:.1f}%")
             print(f"总执行时间: {self.stats['total_execution_time']:.2f}秒")
+            print(f"实际耗时: {self.stats['wall_time']:.2f}秒（{self.stats['workers']} 个工作线程）")
             
             if self.completed_tasks:
                 durations = [t.actual_duration for t in self.completed_tasks]
@@ -821,6 +1598,14 @@ def exercise_4_task_scheduler():
                     avg_duration = statistics.mean(durations)
                     print(f"  {priority}: 平均 {avg_duration:.2f}秒 ({len(durations)} 个任务)")
             
+            # 排队延迟百分位
+            percentiles = self.latency_percentiles()
+            if percentiles:
+                print("\n排队延迟（毫秒）:")
+                for priority, p in percentiles.items():
+                    print(f"  {priority.name:<8} p50 {p['p50']:8.1f}  p95 {p['p95']:8.1f}  "
+                          f"p99 {p['p99']:8.1f}  ({p['count']} 个任务)")
+            
             # 时间估算准确性
             if self.completed_tasks:
                 estimation_errors = []
@@ -831,8 +1616,8 @@ def exercise_4_task_scheduler():
                 avg_error = statistics.mean(estimation_errors)
                 print(f"\n时间估算平均误差: {avg_error:.2f}秒")
     
-    # 创建任务调度器
-    scheduler = TaskScheduler()
+    # 创建任务调度器：同一时间最多运行1个LOW任务
+    scheduler = TaskScheduler(aging_interval=5.0, priority_caps={TaskPriority.LOW: 1})
     
     # 添加各种优先级的任务
     tasks_data = [
@@ -855,11 +1640,71 @@ def exercise_4_task_scheduler():
         task = Task(task_id, name, priority, duration)
         scheduler.add_task(task)
     
-    # 执行所有任务
-    scheduler.execute_all_tasks()
+    # 取消一个等待中的任务
+    scheduler.cancel_task(6)
+    
+    # 使用4个工作线程执行所有任务
+    scheduler.execute_all_tasks(workers=4)
     
     # 生成性能报告
     scheduler.generate_performance_report()
+    
+    # 对比：顺序执行 vs 工作池，并在运行中取消任务
+    print("\n--- 顺序执行 vs 工作池 ---")
+    for workers in (1, 4):
+        bench = TaskScheduler(aging_interval=0.2)
+        for i in range(24):
+            bench.add_task(Task(100 + i, f"批处理{i}", TaskPriority(i % 5 + 1), 0.2))
+        if workers > 1:
+            # 第一批执行的CRITICAL任务至少运行0.1秒，0.05秒时取消它演示运行中取消
+            threading.Timer(0.05, bench.cancel_task, args=(104,)).start()
+        bench.execute_all_tasks(workers=workers)
+        percentiles = bench.latency_percentiles()
+        low = percentiles.get(TaskPriority.LOW)
+        print(f"{workers} 个工作线程: 实际耗时 {bench.stats['wall_time']:.2f}秒，"
+              f"取消 {bench.stats['cancelled_tasks']} 个，LOW 任务 p99 排队 {low['p99']:.0f} 毫秒")
+    
+    # 定时任务和周期任务
+    print("\n--- 定时任务（时间轮） ---")
+    timed = TaskScheduler()
+    fire_times = []
+    
+    def make_heartbeat():
+        fire_times.append(time.monotonic())
+        return Task(1000 + len(fire_times), f"心跳{len(fire_times)}", TaskPriority.HIGH, 0.15,
+                    func=lambda: "ok")
+    
+    heartbeat_id = timed.schedule_every(0.1, make_heartbeat)
+    heartbeat_start = time.monotonic() + 0.1
+    timed.schedule_at(datetime.now() + timedelta(seconds=0.35), Task(2001, "一次性报表", TaskPriority.NORMAL, 0.2))
+    cancelled_id = timed.schedule_at(datetime.now() + timedelta(seconds=0.5), Task(2002, "已取消", TaskPriority.LOW, 0.2))
+    print(f"取消定时任务 {cancelled_id}: {timed.cancel_timer(cancelled_id)}")
+    timed.run_scheduled(1.05, workers=2)
+    timed.cancel_timer(heartbeat_id)
+    
+    # 第n次心跳的理想时间是 heartbeat_start + n * 0.1，偏差不随次数增长
+    offsets = [(t - (heartbeat_start + n * 0.1)) * 1000 for n, t in enumerate(fire_times)]
+    print(f"心跳触发 {len(fire_times)} 次，偏差（毫秒，时间轮精度 {timed.timers.tick * 1000:.0f} 毫秒）："
+          f"{', '.join(f'{o:.1f}' for o in offsets)}")
+    print(f"完成任务 {timed.stats['completed_tasks']} 个")
+    
+    # 时间轮开销：添加/取消的单次耗时与等待中的定时器数量无关
+    print("\n--- 时间轮性能 ---")
+    for pending in (10000, 200000):
+        wheel = TimingWheel(tick=0.01)
+        delays = [random.uniform(0, 3600) for _ in range(pending)]
+        start = time.perf_counter()
+        ids = [wheel.add(delay, None) for delay in delays]
+        add_cost = (time.perf_counter() - start) / pending
+        start = time.perf_counter()
+        for timer_id in ids[::2]:
+            wheel.cancel(timer_id)
+        cancel_cost = (time.perf_counter() - start) / len(ids[::2])
+        start = time.perf_counter()
+        fired = wheel.advance(wheel.origin + 60)  # 推进60秒（6000个tick）
+        advance_cost = (time.perf_counter() - start) / 6000
+        print(f"{pending:>7,} 个定时器: 添加 {add_cost * 1e6:.2f} 微秒/次, 取消 {cancel_cost * 1e6:.2f} 微秒/次, "
+              f"推进 {advance_cost * 1e6:.2f} 微秒/tick（触发 {len(fired)} 个）")
 
 
 def exercise_5_web_crawler():
@@ -878,10 +1723,570 @@ def exercise_5_web_crawler():
     print("练习5: 简单网页爬虫")
     print("=" * 60)
     
+    class AsyncFetchEngine:
+        """
+        基于asyncio的HTTP/1.1抓取引擎（只使用标准库）
+        
+        - 每个主机维护空闲连接池，响应完整读完且服务器允许keep-alive时连接放回复用
+        - 全局并发上限和每主机并发上限（同时也是每主机的连接数上限）
+        - 礼貌延迟：同一主机两次请求的开始时间至少间隔 politeness_delay 秒
+        - 复用的空闲连接可能已被服务器关闭，这种情况下用新连接重试一次；
+          只有在收到响应头之前出错才重试，已经交给 on_chunk 的数据不会重复
+        - 自动跟随重定向（最多 max_redirects 次），1xx/204/304 和 HEAD 响应没有响应体
+        """
+        
+        USER_AGENT = 'Mozilla/5.0 (Python Web Crawler Exercise)'
+        REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+        
+        def __init__(self, max_concurrency=20, per_host_limit=4, politeness_delay=0.0,
+                     timeout=10, max_body_size=5 * 1024 * 1024, max_redirects=5):
+            self.max_concurrency = max_concurrency
+            self.per_host_limit = per_host_limit
+            self.politeness_delay = politeness_delay
+            self.timeout = timeout
+            self.max_body_size = max_body_size
+            self.max_redirects = max_redirects
+            self._global_limit = None
+            self._host_limits = {}
+            self._host_locks = {}
+            self._next_allowed = {}
+            self._idle = defaultdict(list)
+            self._ssl_context = None
+            self.stats = Counter()
+        
+        @staticmethod
+        def _host_key(parsed):
+            port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+            return parsed.scheme, parsed.hostname, port
+        
+        async def _wait_politely(self, key):
+            """为本次请求预约一个开始时间，保证同一主机的请求间隔"""
+            if not self.politeness_delay:
+                return
+            lock = self._host_locks.setdefault(key, asyncio.Lock())
+            async with lock:
+                now = time.monotonic()
+                start = max(now, self._next_allowed.get(key, now))
+                self._next_allowed[key] = start + self.politeness_delay
+            if start > now:
+                await asyncio.sleep(start - now)
+        
+        async def _acquire(self, key):
+            """取一个空闲连接，没有则新建；返回 (连接, 是否复用)"""
+            idle = self._idle[key]
+            while idle:
+                reader, writer = idle.pop()
+                if not writer.is_closing() and not reader.at_eof():
+                    self.stats['connections_reused'] += 1
+                    return (reader, writer), True
+                writer.close()
+            
+            scheme, host, port = key
+            ssl_context = None
+            if scheme == 'https':
+                if self._ssl_context is None:
+                    self._ssl_context = ssl.create_default_context()
+                ssl_context = self._ssl_context
+            reader, writer = await asyncio.open_connection(host, port, ssl=ssl_context)
+            self.stats['connections_opened'] += 1
+            return (reader, writer), False
+        
+        def _release(self, key, conn, reusable):
+            if reusable and len(self._idle[key]) < self.per_host_limit:
+                self._idle[key].append(conn)
+            else:
+                conn[1].close()
+        
+        async def _read_head(self, reader):
+            status_line = await reader.readline()
+            if not status_line:
+                raise ConnectionResetError("连接已被服务器关闭")
+            version, status, *_ = status_line.decode('latin-1').split(' ', 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            return version, int(status), headers
+        
+        async def _iter_body(self, reader, headers):
+            """按服务器声明的方式（chunked / Content-Length / 读到关闭）逐块产生响应体"""
+            if 'chunked' in headers.get('transfer-encoding', '').lower():
+                while True:
+                    size = int((await reader.readline()).split(b';')[0], 16)
+                    if size == 0:
+                        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                            pass
+                        return
+                    while size > 0:
+                        chunk = await reader.readexactly(min(size, 65536))
+                        size -= len(chunk)
+                        yield chunk
+                    await reader.readexactly(2)
+            elif 'content-length' in headers:
+                remaining = int(headers['content-length'])
+                while remaining > 0:
+                    chunk = await reader.read(min(remaining, 65536))
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b'', remaining)
+                    remaining -= len(chunk)
+                    yield chunk
+            else:
+                while True:
+                    chunk = await reader.read(65536)
+                    if not chunk:
+                        return
+                    yield chunk
+        
+        async def _send(self, parsed, conn, method):
+            """发送请求并读取响应头（跳过1xx临时响应），返回 (版本, 状态码, 响应头)"""
+            reader, writer = conn
+            path = parsed.path or '/'
+            if parsed.query:
+                path += '?' + parsed.query
+            host = parsed.netloc.rsplit('@', 1)[-1]
+            writer.write((f"{method} {path} HTTP/1.1\r\n"
+                          f"Host: {host}\r\n"
+                          f"User-Agent: {self.USER_AGENT}\r\n"
+                          f"Accept-Encoding: identity\r\n"
+                          f"Connection: keep-alive\r\n\r\n").encode('latin-1'))
+            await writer.drain()
+            
+            while True:
+                version, status, headers = await self._read_head(reader)
+                if not 100 <= status < 200 or status == 101:
+                    return version, status, headers
+        
+        async def _read_body(self, reader, version, status, headers, method, on_chunk):
+            """读取响应体，返回 (响应体, 连接是否可以复用)"""
+            chunks = []
+            size = 0
+            complete = True
+            # 这些响应按协议没有响应体，即使没有 Content-Length 也不能读到连接关闭
+            if method != 'HEAD' and status >= 200 and status not in (204, 304):
+                async for chunk in self._iter_body(reader, headers):
+                    size += len(chunk)
+                    if size > self.max_body_size:
+                        raise ValueError(f"响应体超过 {self.max_body_size} 字节")
+                    if on_chunk is not None:
+                        # 流式模式：数据块交给回调，不在内存中累积；回调返回False时停止读取
+                        if on_chunk(chunk) is False:
+                            complete = False
+                            break
+                        continue
+                    chunks.append(chunk)
+                framed = 'transfer-encoding' in headers or 'content-length' in headers
+            else:
+                framed = status != 101
+            
+            connection = headers.get('connection', '').lower()
+            reusable = (complete and framed
+                        and (connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'))
+            self.stats['bytes_received'] += size
+            return b''.join(chunks), reusable
+        
+        def _is_redirect(self, status, headers):
+            return status in self.REDIRECT_STATUSES and 'location' in headers
+        
+        async def _fetch_once(self, url, parsed, method, on_head, on_chunk):
+            """发送一次请求（不跟随重定向）；重定向响应的响应体直接丢弃"""
+            key = self._host_key(parsed)
+            
+            if self._global_limit is None:
+                self._global_limit = asyncio.Semaphore(self.max_concurrency)
+            host_limit = self._host_limits.setdefault(key, asyncio.Semaphore(self.per_host_limit))
+            
+            async with self._global_limit, host_limit:
+                await self._wait_politely(key)
+                self.stats['requests'] += 1
+                loop = asyncio.get_running_loop()
+                for attempt in range(2):
+                    conn, reused = await asyncio.wait_for(self._acquire(key), self.timeout)
+                    deadline = loop.time() + self.timeout
+                    try:
+                        version, status, headers = await asyncio.wait_for(
+                            self._send(parsed, conn, method), self.timeout)
+                    except (ConnectionError, asyncio.IncompleteReadError):
+                        conn[1].close()
+                        if reused and attempt == 0:
+                            self.stats['stale_retries'] += 1
+                            continue
+                        raise
+                    except BaseException:
+                        conn[1].close()
+                        raise
+                    break
+                
+                # 已经收到响应头，之后出错不再重试，避免同一段数据重复交给 on_chunk
+                if self._is_redirect(status, headers):
+                    on_chunk = lambda chunk: None
+                elif on_head is not None:
+                    on_head(url, status, headers)
+                try:
+                    body, reusable = await asyncio.wait_for(
+                        self._read_body(conn[0], version, status, headers, method, on_chunk),
+                        max(0, deadline - loop.time()))
+                except BaseException:
+                    conn[1].close()
+                    raise
+                self._release(key, conn, reusable)
+                return status, headers, body
+        
+        async def fetch(self, url, on_chunk=None, on_head=None, method='GET'):
+            """
+            获取URL，返回最终响应的 (状态码, 响应头, 响应体)
+            
+            自动跟随重定向，超过 max_redirects 次时抛出ValueError。
+            指定 on_chunk 时响应体逐块交给回调处理，返回的响应体为空；
+            on_head(最终URL, 状态码, 响应头) 在响应体到达之前调用
+            """
+            if method not in ('GET', 'HEAD'):
+                raise ValueError(f"不支持的请求方法: {method}")
+            for _ in range(self.max_redirects + 1):
+                parsed = urllib.parse.urlsplit(url)
+                if parsed.scheme not in ('http', 'https'):
+                    raise ValueError(f"不支持的协议: {parsed.scheme}")
+                status, headers, body = await self._fetch_once(url, parsed, method, on_head, on_chunk)
+                if not self._is_redirect(status, headers):
+                    return status, headers, body
+                url = urllib.parse.urljoin(url, headers['location'])
+                self.stats['redirects'] += 1
+            raise ValueError(f"重定向超过 {self.max_redirects} 次")
+        
+        async def close(self):
+            for idle in self._idle.values():
+                for _, writer in idle:
+                    writer.close()
+            self._idle.clear()
+    
+    def parse_content_type(value):
+        """解析Content-Type响应头，返回 (MIME类型, 字符集)；没有该响应头时返回 (None, None)"""
+        if not value:
+            return None, None
+        message = email.message.Message()
+        message['content-type'] = value
+        return message.get_content_type(), message.get_content_charset()
+    
+    HTML_TYPES = (None, 'text/html', 'application/xhtml+xml')
+    
+    def canonicalize_url(url, base=None):
+        """
+        URL规范化：同一资源的不同写法得到相同的字符串
+        
+        解析相对链接、协议和主机名转小写、去掉默认端口和片段、
+        处理路径中的 . 和 ..、查询参数排序；非http(s)链接返回None
+        """
+        if base:
+            url = urllib.parse.urljoin(base, url)
+        try:
+            parts = urllib.parse.urlsplit(url.strip())
+            port = parts.port
+        except ValueError:
+            return None
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https') or not parts.hostname:
+            return None
+        
+        host = parts.hostname.lower()
+        if ':' in host:
+            host = f"[{host}]"  # hostname 去掉了IPv6地址的方括号，拼回URL时要加上
+        if port and port != (443 if scheme == 'https' else 80):
+            host = f"{host}:{port}"
+        
+        path = parts.path or '/'
+        normalized = posixpath.normpath(path)
+        if normalized.startswith('//'):
+            normalized = '/' + normalized.lstrip('/')
+        if path.endswith('/') and normalized != '/':
+            normalized += '/'
+        
+        # quote_via=quote：空格编码为 %20 而不是 +，保持与常见写法一致
+        query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)),
+                                       quote_via=urllib.parse.quote)
+        return urllib.parse.urlunsplit((scheme, host, normalized, query, ''))
+    
+    class BloomFilter:
+        """
+        布隆过滤器：用紧凑的位数组判断"是否见过"
+        
+        不存在假阴性（见过的一定返回True），假阳性率约为 error_rate。
+        位数 m = -n·ln(p) / (ln2)²，哈希次数 k = m/n·ln2；
+        1亿个URL、1%误判率约需 114 MB，而字符串集合需要十几GB。
+        k 个位置由一次 blake2b 摘要的两半做双重哈希得到。
+        """
+        
+        def __init__(self, capacity, error_rate=0.01):
+            self.capacity = capacity
+            self.error_rate = error_rate
+            self.size, self.hash_count = self.parameters(capacity, error_rate)
+            self.bits = bytearray((self.size + 7) // 8)
+            self.count = 0
+        
+        @staticmethod
+        def parameters(capacity, error_rate):
+            """给定容量和误判率，返回 (位数, 哈希次数)"""
+            size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+            return size, max(1, round(size / capacity * math.log(2)))
+        
+        def _positions(self, item):
+            digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+            h1 = int.from_bytes(digest[:8], 'little')
+            h2 = int.from_bytes(digest[8:], 'little') | 1
+            return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+        
+        def __contains__(self, item):
+            bits = self.bits
+            return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+        
+        def add(self, item):
+            """加入元素；返回True表示之前（很可能）没见过"""
+            bits = self.bits
+            added = False
+            for pos in self._positions(item):
+                mask = 1 << (pos & 7)
+                if not bits[pos >> 3] & mask:
+                    bits[pos >> 3] |= mask
+                    added = True
+            if added:
+                self.count += 1
+            return added
+        
+        @property
+        def memory_bytes(self):
+            return len(self.bits)
+    
+    class URLFrontier:
+        """
+        爬虫待抓取队列
+        
+        - 入队前规范化URL，用布隆过滤器去重（入队即视为已见，队列中不会有重复）
+        - 每个主机一个子队列，出队时按主机轮转，避免单个站点占满抓取
+        - 内存中的URL超过 max_in_memory 时追加写入磁盘溢出文件，
+          内存队列降到一半以下时再按先进先出顺序读回；
+          溢出文件没读完之前新URL也写入溢出文件，不会排到更早的URL前面
+        """
+        
+        def __init__(self, capacity=1_000_000, error_rate=0.01, max_in_memory=100_000, spill_dir=None):
+            self.seen = BloomFilter(capacity, error_rate)
+            self.max_in_memory = max_in_memory
+            self.host_queues = {}
+            self.ready_hosts = deque()
+            self.in_memory = 0
+            self.spill_dir = spill_dir
+            self.spill_path = None
+            self.spill_writer = None
+            self.spill_read_offset = 0
+            self.spilled_pending = 0
+            self.stats = Counter()
+        
+        def __len__(self):
+            return self.in_memory + self.spilled_pending
+        
+        def add(self, url, base=None):
+            """规范化并加入队列，返回是否为新URL"""
+            url = canonicalize_url(url, base)
+            if url is None:
+                self.stats['rejected'] += 1
+                return False
+            if not self.seen.add(url):
+                self.stats['duplicates'] += 1
+                return False
+            
+            self.stats['added'] += 1
+            if self.spilled_pending or self.in_memory >= self.max_in_memory:
+                self._spill(url)
+            else:
+                self._enqueue(url)
+            return True
+        
+        def _enqueue(self, url):
+            host = urllib.parse.urlsplit(url).netloc
+            queue = self.host_queues.get(host)
+            if queue is None:
+                queue = self.host_queues[host] = deque()
+            if not queue:
+                self.ready_hosts.append(host)
+            queue.append(url)
+            self.in_memory += 1
+        
+        def _spill(self, url):
+            if self.spill_writer is None:
+                fd, self.spill_path = tempfile.mkstemp(prefix='frontier_', suffix='.txt', dir=self.spill_dir)
+                self.spill_writer = os.fdopen(fd, 'a', encoding='utf-8')
+            self.spill_writer.write(url + '\n')
+            self.spilled_pending += 1
+            self.stats['spilled'] += 1
+        
+        def _refill(self):
+            """从溢出文件读回URL，直到内存队列回到上限的一半"""
+            self.spill_writer.flush()
+            with open(self.spill_path, 'r', encoding='utf-8') as f:
+                f.seek(self.spill_read_offset)
+                target = self.max_in_memory // 2
+                while self.spilled_pending and self.in_memory < target:
+                    self._enqueue(f.readline().rstrip('\n'))
+                    self.spilled_pending -= 1
+                self.spill_read_offset = f.tell()
+            if not self.spilled_pending:
+                # 溢出文件已全部读回，截断后重新使用
+                self.spill_writer.seek(0)
+                self.spill_writer.truncate()
+                self.spill_read_offset = 0
+        
+        def pop(self):
+            """按主机轮转取出下一个URL，队列为空时返回None"""
+            if self.spilled_pending and self.in_memory < self.max_in_memory // 2:
+                self._refill()
+            if not self.ready_hosts:
+                return None
+            
+            host = self.ready_hosts.popleft()
+            queue = self.host_queues[host]
+            url = queue.popleft()
+            self.in_memory -= 1
+            if queue:
+                self.ready_hosts.append(host)
+            else:
+                del self.host_queues[host]
+            return url
+        
+        def close(self):
+            if self.spill_writer is not None:
+                self.spill_writer.close()
+                os.remove(self.spill_path)
+                self.spill_writer = None
+    
+    class PageExtractor(html.parser.HTMLParser):
+        """
+        流式页面解析器：边接收响应数据边提取标题、正文文本和链接
+        
+        - feed_bytes() 接收原始字节块，用增量解码器处理跨块的多字节字符；
+          字符编码默认UTF-8，收到响应头后可用 set_encoding() 换成Content-Type中的charset
+        - 发现链接时立即调用 on_link，爬虫可以在页面下载完之前就安排新链接
+        - 内存上限：正文最多保存 max_text_chars 个字符（单词数仍统计全文），
+          链接最多 max_links 个，页面超过 max_page_bytes 时停止解析
+        """
+        
+        SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+        
+        def __init__(self, base_url, on_link=None, max_text_chars=100_000,
+                     max_links=1000, max_page_bytes=5 * 1024 * 1024, encoding='utf-8'):
+            super().__init__(convert_charrefs=True)
+            self.base_url = base_url
+            self.on_link = on_link
+            self.max_text_chars = max_text_chars
+            self.max_links = max_links
+            self.max_page_bytes = max_page_bytes
+            self.set_encoding(encoding)
+            self.links = []
+            self._link_set = set()
+            self.text_parts = []
+            self.text_chars = 0
+            self.title_parts = []
+            self.word_count = 0
+            self.bytes_received = 0
+            self.chars_received = 0
+            self.truncated = False
+            self._in_title = False
+            self._skip_depth = 0
+            self._in_word = False
+            self._tag_break = False
+        
+        def set_encoding(self, encoding):
+            """设置页面的字符编码（必须在 feed_bytes 之前调用）；无法识别的编码按UTF-8处理"""
+            try:
+                self.encoding = codecs.lookup(encoding).name
+            except (LookupError, TypeError):
+                self.encoding = 'utf-8'
+            self._decoder = codecs.getincrementaldecoder(self.encoding)(errors='ignore')
+        
+        def feed_bytes(self, chunk):
+            """接收一块原始字节；超过页面大小上限时返回False"""
+            if self.bytes_received + len(chunk) > self.max_page_bytes:
+                self.truncated = True
+                return False
+            self.bytes_received += len(chunk)
+            self.feed_text(self._decoder.decode(chunk))
+            return True
+        
+        def feed_text(self, text):
+            self.chars_received += len(text)
+            self.feed(text)
+        
+        def finish(self):
+            """数据接收完毕：刷新解码器和解析器缓冲"""
+            tail = self._decoder.decode(b'', final=True)
+            if tail:
+                self.feed_text(tail)
+            self.close()
+            return self
+        
+        def handle_starttag(self, tag, attrs):
+            if tag in self.SKIP_TAGS:
+                self._skip_depth += 1
+            elif tag == 'title':
+                self._in_title = True
+            self._tag_break = True
+            self._in_word = False
+            
+            for name, value in attrs:
+                if name == 'href' and value:
+                    self._add_link(value)
+        
+        def handle_endtag(self, tag):
+            if tag in self.SKIP_TAGS:
+                self._skip_depth = max(0, self._skip_depth - 1)
+            elif tag == 'title':
+                self._in_title = False
+            self._tag_break = True
+            self._in_word = False
+        
+        def handle_data(self, data):
+            if self._skip_depth or not data:
+                return
+            if self._in_title:
+                self.title_parts.append(data)
+            
+            # 统计单词：同一段文本可能被拆成多次回调，拆开的单词只算一次
+            words = data.split()
+            if words:
+                self.word_count += len(words) - (1 if self._in_word and not data[0].isspace() else 0)
+            self._in_word = not data[-1].isspace()
+            
+            remaining = self.max_text_chars - self.text_chars
+            if remaining <= 0:
+                return
+            if self._tag_break:
+                self.text_parts.append(' ')
+                self._tag_break = False
+            piece = data[:remaining]
+            self.text_parts.append(piece)
+            self.text_chars += len(piece)
+        
+        def _add_link(self, href):
+            if len(self.links) >= self.max_links:
+                return
+            url = canonicalize_url(href, self.base_url)
+            if url is None or url in self._link_set:
+                return
+            self._link_set.add(url)
+            self.links.append(url)
+            if self.on_link is not None:
+                self.on_link(url)
+        
+        @property
+        def title(self):
+            return ' '.join(''.join(self.title_parts).split()) or "无标题"
+        
+        @property
+        def text(self):
+            return ' '.join(''.join(self.text_parts).split())
+    
     class WebCrawler:
-        def __init__(self):
-            self.visited_urls = set()
-            self.url_queue = deque()
+        def __init__(self, frontier=None):
+            self.frontier = frontier or URLFrontier()
             self.crawl_data = []
             self.stats = {
                 'total_requests': 0,
@@ -890,13 +2295,16 @@ def exercise_5_web_crawler():
                 'total_links_found': 0
             }
         
-        def add_url(self, url):
-            """添加URL到爬取队列"""
-            if url not in self.visited_urls:
-                self.url_queue.append(url)
+        def add_url(self, url, base=None):
+            """添加URL到爬取队列（规范化后去重）"""
+            return self.frontier.add(url, base)
         
-        def fetch_page(self, url, timeout=10):
-            """获取网页内容"""
+        def fetch_page(self, url, timeout=10, extractor=None):
+            """
+            获取网页内容
+            
+            指定 extractor 时响应按块交给解析器，不保存整个页面，返回解析器
+            """
             try:
                 self.stats['total_requests'] += 1
                 
@@ -909,6 +2317,17 @@ def exercise_5_web_crawler():
                 )
                 
                 with urllib.request.urlopen(req, timeout=timeout) as response:
+                    if extractor is not None:
+                        # urlopen 会跟随重定向，相对链接按最终URL解析
+                        extractor.base_url = response.geturl()
+                        extractor.set_encoding(response.headers.get_content_charset('utf-8'))
+                        while True:
+                            chunk = response.read(65536)
+                            if not chunk or not extractor.feed_bytes(chunk):
+                                break
+                        self.stats['successful_requests'] += 1
+                        return extractor.finish()
+                    
                     content = response.read().decode('utf-8', errors='ignore')
                     self.stats['successful_requests'] += 1
                     return content
@@ -918,41 +2337,33 @@ def exercise_5_web_crawler():
                 print(f"  获取失败 {url}: {e}")
                 return None
         
-        def extract_links(self, content, base_url):
-            """提取页面中的链接"""
-            if not content:
-                return []
-            
-            # 简单的链接提取（使用正则表达式）
-            link_pattern = r'href=["\']([^"\'>]+)["\']'
-            links = re.findall(link_pattern, content, re.IGNORECASE)
-            
-            # 处理相对链接
-            absolute_links = []
-            for link in links:
-                if link.startswith('http'):
-                    absolute_links.append(link)
-                elif link.startswith('/'):
-                    # 相对于根目录的链接
-                    parsed_base = urllib.parse.urlparse(base_url)
-                    absolute_link = f"{parsed_base.scheme}://{parsed_base.netloc}{link}"
-                    absolute_links.append(absolute_link)
-            
-            self.stats['total_links_found'] += len(absolute_links)
-            return absolute_links
-        
-        def extract_text_content(self, content):
-            """提取文本内容"""
-            if not content:
-                return ""
-            
-            # 移除HTML标签（简单方法）
-            text = re.sub(r'<[^>]+>', ' ', content)
-            # 清理多余空白
-            text = re.sub(r'\s+', ' ', text).strip()
-            return text
-        
-        def crawl(self, start_urls, max_pages=5):
+        def record_page(self, url, extractor, verbose=True):
+            """根据解析结果记录页面数据，返回页面中的链接"""
+            links = extractor.links
+            text_content = extractor.text
+            self.stats['total_links_found'] += len(links)
+            
+            # 存储爬取数据
+            page_data = {
+                'url': url,
+                'title': extractor.title,
+                'content_length': extractor.chars_received,
+                'text_length': len(text_content),
+                'links_count': len(links),
+                'links': links[:10],  # 只保存前10个链接
+                'crawl_time': datetime.now().isoformat(),
+                'word_count': extractor.word_count
+            }
+            self.crawl_data.append(page_data)
+            
+            if verbose:
+                print(f"  找到 {len(links)} 个链接")
+                print(f"  页面大小: {extractor.chars_received} 字符")
+                print(f"  文本长度: {len(text_content)} 字符")
+                print(f"  单词数: {extractor.word_count}")
+            return links
+        
+        def crawl(self, start_urls, max_pages=5, delay=1):
             """开始爬取"""
             print(f"开始爬取，最大页面数: {max_pages}")
             
@@ -962,59 +2373,120 @@ def exercise_5_web_crawler():
             
             pages_crawled = 0
             
-            while self.url_queue and pages_crawled < max_pages:
-                url = self.url_queue.popleft()
-                
-                if url in self.visited_urls:
-                    continue
+            while pages_crawled < max_pages:
+                url = self.frontier.pop()
+                if url is None:
+                    break
                 
                 print(f"\n正在爬取: {url}")
-                self.visited_urls.add(url)
                 
-                # 获取页面内容
-                content = self.fetch_page(url)
+                # 获取页面内容，边下载边解析
+                extractor = self.fetch_page(url, extractor=PageExtractor(url))
                 
-                if content:
-                    # 提取链接
-                    links = self.extract_links(content, url)
-                    print(f"  找到 {len(links)} 个链接")
-                    
-                    # 提取文本内容
-                    text_content = self.extract_text_content(content)
-                    
-                    # 存储爬取数据
-                    page_data = {
-                        'url': url,
-                        'title': self._extract_title(content),
-                        'content_length': len(content),
-                        'text_length': len(text_content),
-                        'links_count': len(links),
-                        'links': links[:10],  # 只保存前10个链接
-                        'crawl_time': datetime.now().isoformat(),
-                        'word_count': len(text_content.split())
-                    }
-                    
-                    self.crawl_data.append(page_data)
+                if extractor:
+                    links = self.record_page(url, extractor)
                     
                     # 添加新发现的链接到队列（限制数量）
                     for link in links[:5]:  # 只添加前5个链接
-                        self.add_url(link)
+                        self.add_url(link, base=url)
                     
                     pages_crawled += 1
-                    print(f"  页面大小: {len(content)} 字符")
-                    print(f"  文本长度: {len(text_content)} 字符")
-                    print(f"  单词数: {len(text_content.split())}")
                 
                 # 添加延迟，避免过于频繁的请求
-                import time
-                time.sleep(1)
+                if delay:
+                    time.sleep(delay)
             
             print(f"\n爬取完成，共处理 {pages_crawled} 个页面")
         
-        def _extract_title(self, content):
-            """提取页面标题"""
-            title_match = re.search(r'<title[^>]*>([^<]+)</title>', content, re.IGNORECASE)
-            return title_match.group(1).strip() if title_match else "无标题"
+        async def fetch_page_async(self, engine, url, extractor=None):
+            """
+            通过异步抓取引擎获取网页内容
+            
+            指定 extractor 时响应按块交给解析器，返回解析器；
+            只有状态码200的HTML响应才交给解析器，错误页面里的链接不会进入队列。
+            解析器按最终URL（重定向之后）解析相对链接，按Content-Type中的charset解码
+            """
+            self.stats['total_requests'] += 1
+            accepted = False
+            
+            def on_head(final_url, status, headers):
+                nonlocal accepted
+                mime_type, charset = parse_content_type(headers.get('content-type'))
+                accepted = status == 200 and mime_type in HTML_TYPES
+                if accepted and extractor is not None:
+                    extractor.base_url = final_url
+                    extractor.set_encoding(charset or 'utf-8')
+            
+            def on_chunk(chunk):
+                # 不解析的响应体直接丢弃，读完后连接仍可复用
+                return extractor.feed_bytes(chunk) if accepted else None
+            
+            try:
+                status, headers, body = await engine.fetch(
+                    url, on_chunk=on_chunk if extractor is not None else None, on_head=on_head)
+            except Exception as e:
+                self.stats['failed_requests'] += 1
+                print(f"  获取失败 {url}: {e!r}")
+                return None
+            if status != 200:
+                self.stats['failed_requests'] += 1
+                return None
+            self.stats['successful_requests'] += 1
+            if extractor is not None:
+                return extractor.finish() if accepted else None
+            _, charset = parse_content_type(headers.get('content-type'))
+            try:
+                return body.decode(charset or 'utf-8', errors='ignore')
+            except LookupError:
+                return body.decode('utf-8', errors='ignore')
+        
+        async def crawl_async(self, start_urls, max_pages=50, engine=None, workers=10):
+            """
+            并发爬取：workers 个协程从 URLFrontier 取URL，抓取交给 AsyncFetchEngine
+            
+            队列暂时为空但仍有请求在进行时，协程等待新链接；全部空闲时结束。
+            页面边下载边解析，解析出的链接立即进入队列，空闲的协程马上就能开始抓取
+            """
+            engine = engine or AsyncFetchEngine()
+            for url in start_urls:
+                self.add_url(url)
+            
+            pages_crawled = 0
+            in_flight = 0
+            wakeup = asyncio.Event()
+            
+            def schedule_link(link):
+                if self.add_url(link):
+                    wakeup.set()
+            
+            async def worker():
+                nonlocal pages_crawled, in_flight
+                while pages_crawled < max_pages:
+                    url = self.frontier.pop()
+                    if url is None:
+                        if in_flight == 0:
+                            wakeup.set()
+                            return
+                        wakeup.clear()
+                        await wakeup.wait()
+                        continue
+                    
+                    in_flight += 1
+                    try:
+                        extractor = PageExtractor(url, on_link=schedule_link)
+                        extractor = await self.fetch_page_async(engine, url, extractor)
+                        if extractor and pages_crawled < max_pages:
+                            pages_crawled += 1
+                            self.record_page(url, extractor, verbose=False)
+                    finally:
+                        in_flight -= 1
+                        wakeup.set()
+            
+            try:
+                await asyncio.gather(*(worker() for _ in range(workers)))
+            finally:
+                await engine.close()
+            return pages_crawled
         
         def generate_report(self):
             """生成爬取报告"""
@@ -1042,10 +2514,12 @@ def exercise_5_web_crawler():
                 
                 # 页面信息
                 print(f"\n爬取的页面:")
-                for i, page in enumerate(self.crawl_data, 1):
+                for i, page in enumerate(self.crawl_data[:10], 1):
                     print(f"  {i}. {page['title'][:50]}...")
                     print(f"     URL: {page['url']}")
                     print(f"     大小: {page['content_length']} 字符, {page['word_count']} 单词")
+                if len(self.crawl_data) > 10:
+                    print(f"  ... 共 {len(self.crawl_data)} 个页面")
         
         def save_results(self):
             """保存爬取结果"""
@@ -1075,58 +2549,159 @@ def exercise_5_web_crawler():
             print("  - crawl_results.json")
             print("  - crawl_summary.csv")
     
-    # 注意：这里使用一些公开的、允许爬取的网站作为示例
-    # 实际使用时请确保遵守网站的robots.txt和使用条款
+    def start_local_site(page_count=500, latency=0.01):
+        """
+        启动本地测试站点：/page/N 页面链接到 /page/3N+1 … /page/3N+6
+        
+        使用HTTP/1.1并返回Content-Length，支持keep-alive；latency模拟网络延迟
+        """
+        class SiteHandler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 响应头和响应体分两次发送，keep-alive连接上Nagle算法会与延迟确认叠加出约40毫秒的停顿
+            disable_nagle_algorithm = True
+            
+            def do_GET(self):
+                if self.path == '/big':
+                    self.send_big_page()
+                    return
+                match = re.fullmatch(r'/page/(\d+)', self.path)
+                if not match or int(match.group(1)) >= page_count:
+                    self.send_error(404)
+                    return
+                n = int(match.group(1))
+                links = ''.join(f'<li><a href="/page/{m}">页面{m}</a></li>'
+                                for m in range(3 * n + 1, 3 * n + 7) if m < page_count)
+                body = (f'<html><head><title>测试页面{n}</title></head><body>'
+                        f'<h1>页面{n}</h1><p>{"Python标准库练习 " * 50}</p><ul>{links}</ul>'
+                        f'</body></html>').encode('utf-8')
+                time.sleep(latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def send_big_page(self):
+                """约1.5MB的大页面，分块慢速发送，模拟慢速网络"""
+                section = ('<p>' + '大页面内容 big page text ' * 200 + '</p>').encode('utf-8')
+                parts = [b'<html><head><title>\xe5\xa4\xa7\xe9\xa1\xb5\xe9\x9d\xa2</title></head><body>']
+                for i in range(260):
+                    parts.append(f'<a href="/page/{i}">链接{i}</a>'.encode('utf-8'))
+                    parts.append(section)
+                parts.append(b'</body></html>')
+                body = b''.join(parts)
+                
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                for offset in range(0, len(body), 65536):
+                    self.wfile.write(body[offset:offset + 65536])
+                    time.sleep(0.005)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), SiteHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
     
     print("注意: 这是一个教学示例，实际使用时请遵守网站的robots.txt和使用条款")
-    print("由于网络连接和网站可用性的限制，这里只演示爬虫的基本结构")
-    
-    crawler = WebCrawler()
-    
-    # 模拟爬取结果（避免实际网络请求）
-    print("\n模拟爬取过程...")
-    
-    # 生成模拟数据
-    sample_pages = [
-        {
-            'url': 'https://example.com/page1',
-            'title': 'Python编程教程',
-            'content_length': 5420,
-            'text_length': 3200,
-            'links_count': 15,
-            'links': ['https://example.com/tutorial1', 'https://example.com/tutorial2'],
-            'crawl_time': datetime.now().isoformat(),
-            'word_count': 580
-        },
-        {
-            'url': 'https://example.com/page2',
-            'title': '数据结构与算法',
-            'content_length': 7830,
-            'text_length': 4500,
-            'links_count': 22,
-            'links': ['https://example.com/algorithm1', 'https://example.com/datastructure1'],
-            'crawl_time': datetime.now().isoformat(),
-            'word_count': 720
-        },
-        {
-            'url': 'https://example.com/page3',
-            'title': 'Web开发实践',
-            'content_length': 6200,
-            'text_length': 3800,
-            'links_count': 18,
-            'links': ['https://example.com/web1', 'https://example.com/web2'],
-            'crawl_time': datetime.now().isoformat(),
-            'word_count': 650
-        }
-    ]
+    print("为避免访问外部网站，下面爬取的是本机启动的测试站点（http.server）")
+    
+    server = start_local_site()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        # 顺序爬取：urllib，每个请求新建连接
+        sync_crawler = WebCrawler()
+        start = time.perf_counter()
+        sync_crawler.crawl([f"{base_url}/page/0"], max_pages=20, delay=0)
+        sync_elapsed = time.perf_counter() - start
+        
+        # 异步爬取：连接池 + 并发
+        crawler = WebCrawler()
+        engine = AsyncFetchEngine(max_concurrency=32, per_host_limit=8)
+        start = time.perf_counter()
+        pages = asyncio.run(crawler.crawl_async([f"{base_url}/page/0"], max_pages=300,
+                                                engine=engine, workers=16))
+        async_elapsed = time.perf_counter() - start
+        
+        print("\n--- 抓取性能对比 ---")
+        print(f"urllib 顺序抓取: {len(sync_crawler.crawl_data)} 页，"
+              f"{len(sync_crawler.crawl_data) / sync_elapsed:.1f} 页/秒")
+        print(f"asyncio 连接池:  {pages} 页，{pages / async_elapsed:.1f} 页/秒，"
+              f"新建连接 {engine.stats['connections_opened']} 个，"
+              f"复用 {engine.stats['connections_reused']} 次")
+        
+        # 礼貌延迟：同一主机请求间隔0.05秒，吞吐量受延迟限制
+        polite = AsyncFetchEngine(per_host_limit=8, politeness_delay=0.05)
+        polite_crawler = WebCrawler()
+        start = time.perf_counter()
+        polite_pages = asyncio.run(polite_crawler.crawl_async([f"{base_url}/page/0"], max_pages=20,
+                                                              engine=polite, workers=8))
+        print(f"礼貌延迟0.05秒:  {polite_pages} 页，{polite_pages / (time.perf_counter() - start):.1f} 页/秒")
+        
+        # 流式解析：大页面下载过程中就能拿到链接，正文只保留前2万字符
+        print("\n--- 流式解析大页面 ---")
+        
+        async def stream_big_page():
+            engine = AsyncFetchEngine()
+            start = time.perf_counter()
+            link_times = []
+            extractor = PageExtractor(f"{base_url}/big", max_text_chars=20000,
+                                      on_link=lambda link: link_times.append(time.perf_counter() - start))
+            await engine.fetch(f"{base_url}/big", on_chunk=extractor.feed_bytes)
+            extractor.finish()
+            total = time.perf_counter() - start
+            await engine.close()
+            return extractor, link_times, total
+        
+        extractor, link_times, total = asyncio.run(stream_big_page())
+        print(f"页面 {extractor.bytes_received / 1024:.0f} KB，标题: {extractor.title}")
+        print(f"第一个链接在 {link_times[0] * 1000:.1f} 毫秒时发现，整页下载完成用时 {total * 1000:.1f} 毫秒")
+        print(f"共 {len(extractor.links)} 个链接，{extractor.word_count:,} 个单词，"
+              f"保存的正文 {extractor.text_chars:,} 字符（上限 {extractor.max_text_chars:,}）")
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    # URL队列：规范化去重、按主机轮转、溢出到磁盘
+    print("\n--- URL队列（布隆过滤器 + 磁盘溢出） ---")
+    print(f"爬取过程中过滤重复URL {crawler.frontier.stats['duplicates']} 个")
+    
+    url_count = 200000
+    frontier = URLFrontier(capacity=url_count, error_rate=0.01, max_in_memory=20000)
+    raw_urls = []
+    for i in range(url_count):
+        host = f"site{i % 50}.example.com"
+        raw_urls.append(f"https://{host}/articles/{i}?b=2&a=1")
+        if i % 4 == 0:
+            # 同一资源的不同写法
+            raw_urls.append(f"HTTPS://{host.upper()}:443/news/../articles/{i}?a=1&b=2#comments")
+    
+    start = time.perf_counter()
+    for url in raw_urls:
+        frontier.add(url)
+    add_rate = len(raw_urls) / (time.perf_counter() - start)
+    print(f"添加 {len(raw_urls):,} 个URL（{add_rate:,.0f} 个/秒）：新URL {frontier.stats['added']:,}，"
+          f"重复 {frontier.stats['duplicates']:,}，溢出到磁盘 {frontier.stats['spilled']:,}")
+    print(f"布隆过滤器误判丢弃 {url_count - frontier.stats['added']:,} 个URL"
+          f"（{(url_count - frontier.stats['added']) / url_count:.2%}，上限约 {frontier.seen.error_rate:.0%}）")
+    
+    first_hosts = [urllib.parse.urlsplit(frontier.pop()).netloc for _ in range(3)]
+    print(f"按主机轮转出队：{', '.join(first_hosts)}")
+    drained = 3
+    while frontier.pop() is not None:
+        drained += 1
+    print(f"全部出队 {drained:,} 个URL")
+    frontier.close()
     
-    crawler.crawl_data = sample_pages
-    crawler.stats = {
-        'total_requests': 3,
-        'successful_requests': 3,
-        'failed_requests': 0,
-        'total_links_found': 55
-    }
+    set_memory = sys.getsizeof(set(raw_urls)) + sum(sys.getsizeof(url) for url in set(raw_urls))
+    print(f"内存对比：布隆过滤器 {frontier.seen.memory_bytes / 1024:.0f} KB，"
+          f"字符串集合约 {set_memory / 1024:.0f} KB")
+    bits, hash_count = BloomFilter.parameters(100_000_000, 0.01)
+    print(f"1亿个URL、1%误判率的布隆过滤器：{bits / 8 / 1024 ** 2:.0f} MB，{hash_count} 次哈希")
     
     crawler.generate_report()
     crawler.save_results()
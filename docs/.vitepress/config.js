@@ -573,7 +573,8 @@ export default defineConfig({
             { text: '💾 二进制文件', link: '/guide/17-file-operations/07_binary_files' },
             { text: '📂 路径操作', link: '/guide/17-file-operations/08_path_operations' },
             { text: '⚠️ 文件异常处理', link: '/guide/17-file-operations/09_file_exceptions' },
-            { text: '💪 综合练习', link: '/guide/17-file-operations/10_exercises' }
+            { text: '💪 综合练习', link: '/guide/17-file-operations/10_exercises' },
+            { text: '⚡ 异步文件I/O', link: '/guide/17-file-operations/11_async_file_io' }
           ]
         }
       ],